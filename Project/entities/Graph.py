@@ -1,22 +1,46 @@
 from entities.Product import Product
+import numpy as np
 import copy
 
 
 class Graph:
     """ Implements a graph of instances of Products, it is not necessary to work indexing the
-    products but the instantiated objects has to be used"""
+    products but the instantiated objects has to be used.
+
+    Internally the graph is a dense matrix of weights over the nodes (in insertion order) with a mask of the edges,
+    a map from product id to node index and the ordered children of every node: the Product based methods are thin
+    wrappers over these arrays """
 
     def __init__(self, g: 'Graph' = None):
         if g:
-            self.graph = copy.deepcopy(g.graph)
-            self.node_list = g.node_list.copy()
-            self.n_nodes = len(self.node_list)
+            self.node_list = copy.deepcopy(g.node_list)
+            self.index = dict(g.index)
+            self.weights = g.weights.copy()
+            self.edges = g.edges.copy()
+            self.children = [children.copy() for children in g.children]
             self.ids = copy.deepcopy(g.ids)
         else:
-            self.graph = {}
             self.node_list = []
-            self.n_nodes = 0
+            self.index = {}  # product id -> index of the node in node_list, weights and edges
+            self.weights = np.zeros((0, 0))  # weights[i, j]: weight of the edge from node i to node j, 0 if no edge
+            self.edges = np.zeros((0, 0), dtype = bool)
+            self.children = []  # indexes of the children of every node, in the order the edges were added
             self.ids = set()
+        self.n_nodes = len(self.node_list)
+
+        # incremented at every change of nodes, edges or weights, lets users of the graph know their results are stale
+        self.version = 0
+
+    @property
+    def adjacency(self) -> np.ndarray:
+        """ Weights matrix of the graph, not a copy: change it only through set_weight """
+        return self.weights
+
+    def get_node_index(self, node: Product) -> int:
+        """ Index of the node in the weights matrix """
+        if node.id not in self.index:
+            raise Exception("node is not in the graph")
+        return self.index[node.id]
 
     def add_edge(self, src, dest, weight) -> None:
         """Add an edge to the graph """
@@ -24,99 +48,92 @@ class Graph:
             raise Exception("source of edge Value Error")
         if not isinstance(dest, Product):
             raise Exception("destination of edge Value Error")
-        if src not in self.graph:
+        if src.id not in self.index:
             raise Exception("source of edge is not in the graph")
-        if dest not in self.graph:
+        if dest.id not in self.index:
             raise Exception("dest of edge is not in the graph")
 
-        self.graph[src].append((dest, weight))
+        i, j = self.index[src.id], self.index[dest.id]
+        if not self.edges[i, j]:
+            self.edges[i, j] = True
+            self.children[i].append(j)
+        self.weights[i, j] = weight
         self.ids.add(src.id)
+        self.version += 1
 
     def add_node(self, item) -> None:
         """Add a Product node to the graph """
         if not isinstance(item, Product):
             raise Exception("item is not a product Value Error")
-        if item in self.graph:
+        if item.id in self.index:
             print("Item already in the graph")
             return
 
-        self.graph[item] = list()
+        self.index[item.id] = self.n_nodes
+        self.weights = np.pad(self.weights, ((0, 1), (0, 1)))
+        self.edges = np.pad(self.edges, ((0, 1), (0, 1)))
+        self.children.append([])
         self.node_list.append(item)
         self.n_nodes += 1
+        self.version += 1
 
     def get_child_nodes(self, father_node) -> list:
         """ get all child nodes given a father """
         if not isinstance(father_node, Product):
             raise Exception("node is not a product Value Error")
-        if father_node not in self.graph:
+        if father_node.id not in self.index:
             print("No match")
             return []
 
-        return self.graph[father_node]
+        i = self.index[father_node.id]
+        return [(self.node_list[j], self.weights[i, j]) for j in self.children[i]]
 
     def get_all_nodes(self) -> list:
         """ return all nodes composing the graph """
-        return [*self.graph].copy()  # this notation make a list of all keys of dict graph
+        return self.node_list.copy()
 
     def printGraph(self) -> None:
         """ print adjacency list representation """
-        for (src, node_list) in self.graph.items():
+        for src in self.node_list:
             print(f"--- node: {src} ---")
-            for (node, weight) in node_list:
+            for (node, weight) in self.get_child_nodes(src):
                 print(f"\t( {src} )--[w:{weight:.3f}]-—>( {node} )")
 
-    def get_adjacency_matrix(self) -> list:
-        """ get adjacency matrix representation """
-        matrix = []
-
-        for (src, node_list) in self.graph.items():
-            row = [0.0 for _ in range(len(self.graph.items()))]
-            for (node, weight) in node_list:
-                row[node.id - 1] = weight
-
-            matrix.append(row)
-
-        return matrix
+    def get_adjacency_matrix(self) -> np.ndarray:
+        """ get adjacency matrix representation (a copy, see adjacency) """
+        return self.weights.copy()
 
     def get_neighbours(self, node: Product) -> list:
         """ get a list of all the neighbours of a given node """
-        if node not in self.graph:
+        if node.id not in self.index:
             raise Exception("source node is not in the graph")
 
-        return [pair[0] for pair in self.graph[node]]  # each pair is a (dest, weight) tuple
+        return [self.node_list[j] for j in self.children[self.index[node.id]]]
 
     def get_not_dangling_nodes(self) -> list:
         """ get a list of all the nodes having out-degree > 0 """
-        keysList = list(self.graph.keys())
-        return [keysList[i] for i in range(len(keysList)) if len(self.graph[keysList[i]]) > 0]
-
-    # TODO: set_weight and get_weight methods could be improved if a dict of dicts is used instead of a dicts of lists
-    #  for self.graph, like self.betas in LearnableGraph. Changes are minimal.
+        return [node for node, children in zip(self.node_list, self.children) if len(children) > 0]
 
     def set_weight(self, src: Product, dest: Product, weight) -> None:
         """Set edge's weight """
-        if src.id not in self.ids:
-            raise Exception("source of edge is not in the graph")
-        if dest.id not in self.ids:
-            raise Exception("dest of edge is not in the graph")
+        i, j = self.__edge_index(src, dest)
 
-        for i in range(len(self.graph[src])):
-            if self.graph[src][i][0] == dest:
-                self.graph[src][i] = (self.graph[src][i][0], weight)
-                break
+        if self.edges[i, j]:
+            self.weights[i, j] = weight
+            self.version += 1
 
     def get_weight(self, src: Product, dest: Product, fromId = False):
+        """Get edge's weight, None if there is no edge. Nodes are always matched by id, fromId is kept for
+           compatibility """
+        i, j = self.__edge_index(src, dest)
 
-        """Set edge's weight """
-        if src.id not in self.ids:
+        if self.edges[i, j]:
+            return self.weights[i, j]
+
+    def __edge_index(self, src: Product, dest: Product):
+        if src.id not in self.index:
             raise Exception("source of edge is not in the graph")
-        if dest.id not in self.ids:
+        if dest.id not in self.index:
             raise Exception("dest of edge is not in the graph")
 
-        if fromId:
-            src = [p for p in self.graph.keys() if p.id == src.id][0]
-            dest = [p for p in self.graph.keys() if p.id == dest.id][0]
-
-        for i in range(len(self.graph[src])):
-            if self.graph[src][i][0] == dest:
-                return self.graph[src][i][1]
+        return self.index[src.id], self.index[dest.id]
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from entities.Graph import Graph
+from entities.Product import Product
+
+
+def get_products():
+    # added out of id order, indexes follow the insertion order
+    return [Product(3, 0.75), Product(1, 0.5), Product(2, 0.625)]
+
+
+class TestGraph:
+
+    def testIndexMap(self) -> None:
+        p3, p1, p2 = get_products()
+        graph = Graph()
+        for product in [p3, p1, p2]:
+            graph.add_node(product)
+
+        graph.add_edge(p3, p2, 0.2)
+        graph.add_edge(p3, p1, 0.3)
+        graph.add_edge(p1, p3, 0.4)
+
+        assert [graph.get_node_index(p) for p in [p3, p1, p2]] == [0, 1, 2]
+        assert graph.index == {3: 0, 1: 1, 2: 2}
+        # children in the order the edges were added, the adjacency in insertion order
+        assert [(node.id, weight) for node, weight in graph.get_child_nodes(p3)] == [(2, 0.2), (1, 0.3)]
+        assert np.array_equal(graph.get_adjacency_matrix(), [[0, 0.3, 0.2], [0.4, 0, 0], [0, 0, 0]])
+        assert graph.get_weight(p1, p3) == 0.4 and graph.get_weight(p2, p3) is None
+        assert [node.id for node in graph.get_not_dangling_nodes()] == [3, 1]
+
+        # get_adjacency_matrix is a copy, adjacency is not
+        graph.get_adjacency_matrix()[0, 1] = 1
+        assert graph.adjacency[0, 1] == 0.3
+
+        with pytest.raises(Exception):
+            graph.get_node_index(Product(7, 1.0))
+
+    def testVersionBumps(self) -> None:
+        p3, p1, p2 = get_products()
+        graph = Graph()
+        versions = [graph.version]
+
+        for product in [p3, p1, p2]:
+            graph.add_node(product)
+            versions.append(graph.version)
+        graph.add_edge(p3, p1, 0.3)
+        versions.append(graph.version)
+        graph.set_weight(p3, p1, 0.6)
+        versions.append(graph.version)
+
+        # every change gives a new version
+        assert len(set(versions)) == len(versions)
+
+        version = graph.version
+        graph.add_node(p3)  # already in the graph
+        graph.set_weight(p1, p2, 0.5)  # not an edge
+        graph.get_child_nodes(p3)
+        graph.get_adjacency_matrix()
+        assert graph.version == version and graph.get_weight(p1, p2) is None
+
+    def testCopy(self) -> None:
+        p3, p1, p2 = get_products()
+        graph = Graph()
+        for product in [p3, p1, p2]:
+            graph.add_node(product)
+        graph.add_edge(p3, p1, 0.3)
+
+        copied = Graph(g = graph)
+        copied.set_weight(p3, p1, 0.9)
+        copied.add_edge(p1, p2, 0.1)
+
+        assert graph.get_weight(p3, p1) == 0.3 and graph.get_weight(p1, p2) is None
+        assert [node.id for node, _ in graph.get_child_nodes(p1)] == []
+        assert copied.get_node_index(p2) == 2
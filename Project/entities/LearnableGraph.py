@@ -5,24 +5,30 @@ from entities.Beta import Beta
 
 
 class LearnableGraph(Graph):
+    """ Graph whose unknown edge weights are learnt with Beta posteriors: alpha, beta and played of every edge are kept
+        in n x n arrays, with the mask of the learnable edges (the ones added without a known weight) """
 
     def __init__(self, g: 'Graph' = None):
         super().__init__(g)
 
-        self.betas = {}
+        self.learnable = self.edges.copy()
+        self.alphas = np.ones((self.n_nodes, self.n_nodes), dtype = int)
+        self.betas = np.ones((self.n_nodes, self.n_nodes), dtype = int)
+        self.played = np.zeros((self.n_nodes, self.n_nodes), dtype = int)
 
         if g:
             self.__clear_weights()
 
-            for node in self.graph.keys():
-                self.betas[node] = {}
-                for neighbor in self.get_neighbours(node):
-                    self.betas[node][neighbor] = Beta()
-
     def add_node(self, item):
         """Add a Product node to the graph """
+        n_nodes = self.n_nodes
         super().add_node(item = item)
-        self.betas[item] = {}  # dict -> (dest, weight)
+
+        if self.n_nodes > n_nodes:
+            self.learnable = np.pad(self.learnable, ((0, 1), (0, 1)))
+            self.alphas = np.pad(self.alphas, ((0, 1), (0, 1)), constant_values = 1)
+            self.betas = np.pad(self.betas, ((0, 1), (0, 1)), constant_values = 1)
+            self.played = np.pad(self.played, ((0, 1), (0, 1)))
 
     def add_edge(self, src, dest, weight = None):
         """Add an edge to the graph """
@@ -31,56 +37,74 @@ class LearnableGraph(Graph):
         if not isinstance(dest, Product):
             raise Exception("destination of edge Value Error")
 
-        if not weight:
-            w = 0.5  # no knowledge weight
-            self.betas[src][dest] = Beta()
-        else:
-            w = weight
-            self.betas[src][dest] = None  # this is not safe, find out better approach
-
+        w = 0.5 if not weight else weight  # no knowledge weight
         super().add_edge(src = src, dest = dest, weight = w)
 
-    def get_betas_matrix(self):
-        """ get betas matrix representation """
-        n_nodes = len(self.node_list)
-        betas = np.empty((n_nodes, n_nodes), dtype = object)
+        i, j = self.get_node_index(src), self.get_node_index(dest)
+        self.learnable[i, j] = not weight
+        self.alphas[i, j] = 1
+        self.betas[i, j] = 1
+        self.played[i, j] = 0
 
-        for (src, beta_dict) in self.betas.items():
-            row = np.empty(n_nodes, dtype = object)
-            for (node, beta) in beta_dict.items():
-                row[node.id - 1] = beta
+    def get_betas_matrix(self):
+        """ get betas matrix representation, None for the not learnable edges """
+        betas = np.empty((self.n_nodes, self.n_nodes), dtype = object)
 
-            betas[src.id - 1] = row
+        for i, j in zip(*np.nonzero(self.learnable)):
+            beta = Beta()
+            beta.a, beta.b, beta.played = self.alphas[i, j], self.betas[i, j], self.played[i, j]
+            betas[i, j] = beta
 
         return betas
 
     def update_beta_values(self, src: Product, dest: Product, param: str) -> None:
-        if src not in self.graph:
-            raise Exception("source of edge is not in the graph")
-        if dest not in self.graph:
-            raise Exception("dest of edge is not in the graph")
+        i, j = self.get_node_index(src), self.get_node_index(dest)
 
-        if self.betas[src][dest]:
+        if self.learnable[i, j]:
             if param == 'alpha':
-                self.betas[src][dest].a += 1
+                self.alphas[i, j] += 1
             if param == 'beta':
-                self.betas[src][dest].b += 1
+                self.betas[i, j] += 1
+
+            self.played[i, j] += 1
 
-            self.betas[src][dest].played += 1
+    def update_betas(self, activations, failures) -> None:
+        """ Bulk version of update_beta_values: activations[i, j] and failures[i, j] are the number of times the edge
+            from node i to node j activated or failed to activate its destination """
+        activations = np.where(self.learnable, activations, 0).astype(int)
+        failures = np.where(self.learnable, failures, 0).astype(int)
+
+        self.alphas += activations
+        self.betas += failures
+        self.played += activations + failures
 
     def get_beta_parameters(self, src: Product, dest: Product):
         """given a source and a destination node, returns the beta parameters
            associated with the corresponding graph's edge"""
-        if src not in self.graph:
-            raise Exception("source of edge is not in the graph")
-        if dest not in self.graph:
-            raise Exception("dest of edge is not in the graph")
+        i, j = self.get_node_index(src), self.get_node_index(dest)
+
+        if self.learnable[i, j]:
+            return self.alphas[i, j], self.betas[i, j], self.played[i, j]
+
+    def sample_weights(self, rng = None) -> np.ndarray:
+        """ Thompson sampling of all the learnable weights from their Beta posteriors at once, in row major order of
+            the edges. Return the updated weights matrix """
+        rng = np.random if rng is None else rng  # as Utils.get_rng, which cannot be imported here (circular import)
+        self.weights[self.learnable] = rng.beta(a = self.alphas[self.learnable], b = self.betas[self.learnable])
+        self.version += 1
+
+        return self.weights
+
+    def get_posterior_means(self) -> np.ndarray:
+        """ Means of the Beta posteriors of the learnable edges, the known weights elsewhere """
+        return np.where(self.learnable, self.alphas / (self.alphas + self.betas), self.weights)
 
-        if self.betas[src][dest]:
-            return self.betas[src][dest].a, self.betas[src][dest].b, self.betas[src][dest].played
+    def get_posterior_variances(self) -> np.ndarray:
+        """ Variances of the Beta posteriors of the learnable edges, 0 elsewhere """
+        total = self.alphas + self.betas
+        return np.where(self.learnable, self.alphas * self.betas / (total ** 2 * (total + 1)), 0.0)
 
     def __clear_weights(self):
         """conversion to known to unknown weights graph"""
-        for key in self.graph.keys():
-            for i in range(len(self.graph[key])):
-                self.graph[key][i] = (self.graph[key][i][0], 0.5)
+        self.weights[self.edges] = 0.5
+        self.version += 1
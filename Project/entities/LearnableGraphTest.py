@@ -0,0 +1,80 @@
+import numpy as np
+
+from entities.Graph import Graph
+from entities.LearnableGraph import LearnableGraph
+from entities.Product import Product
+
+
+def get_graph() -> LearnableGraph:
+    products = [Product(i + 1, 1.0) for i in range(4)]
+    graph = LearnableGraph()
+    for product in products:
+        graph.add_node(product)
+
+    for i, src in enumerate(products):
+        for j, dest in enumerate(products):
+            if i != j:
+                graph.add_edge(src, dest, 0.7 if (i, j) == (0, 1) else None)  # a single known edge
+
+    return graph
+
+
+class TestLearnableGraph:
+
+    def testUpdateBetas(self) -> None:
+        graph = get_graph()
+        single_updates = get_graph()
+        products = graph.get_all_nodes()
+        rng = np.random.default_rng(0)
+        activations = rng.integers(0, 3, size = (4, 4)) * graph.edges
+        failures = rng.integers(0, 3, size = (4, 4)) * graph.edges
+
+        graph.update_betas(activations = activations, failures = failures)
+        for i, src in enumerate(products):
+            for j, dest in enumerate(products):
+                for _ in range(activations[i, j]):
+                    single_updates.update_beta_values(src, dest, 'alpha')
+                for _ in range(failures[i, j]):
+                    single_updates.update_beta_values(src, dest, 'beta')
+
+        # same posteriors of one update per outcome, the known edge is not learnt
+        assert np.array_equal(graph.alphas, single_updates.alphas)
+        assert np.array_equal(graph.betas, single_updates.betas)
+        assert np.array_equal(graph.played, single_updates.played)
+        assert graph.alphas[0, 1] == 1 and graph.played[0, 1] == 0
+        assert graph.get_beta_parameters(products[0], products[1]) is None
+        assert graph.get_beta_parameters(products[1], products[0]) == \
+            (1 + activations[1, 0], 1 + failures[1, 0], activations[1, 0] + failures[1, 0])
+
+        means = graph.get_posterior_means()
+        assert means[0, 1] == 0.7
+        assert means[2, 3] == graph.alphas[2, 3] / (graph.alphas[2, 3] + graph.betas[2, 3])
+
+    def testSampleWeights(self) -> None:
+        graph = get_graph()
+        graph.update_betas(activations = 2 * graph.edges, failures = graph.edges)
+        version = graph.version
+
+        weights = graph.sample_weights(rng = np.random.default_rng(5))
+
+        # one beta draw per learnable edge, in row major order
+        expected = np.random.default_rng(5).beta(a = graph.alphas[graph.learnable], b = graph.betas[graph.learnable])
+        assert np.array_equal(weights[graph.learnable], expected)
+        assert weights[0, 1] == 0.7 and np.all(np.diag(weights) == 0)
+        assert graph.version > version
+
+    def testFromGraph(self) -> None:
+        products = [Product(i + 1, 1.0) for i in range(3)]
+        graph = Graph()
+        for product in products:
+            graph.add_node(product)
+        graph.add_edge(products[0], products[2], 0.2)
+        graph.add_edge(products[2], products[1], 0.9)
+
+        learnable = LearnableGraph(g = graph)
+
+        # every edge of the graph becomes unknown, with the no knowledge weight
+        assert np.array_equal(learnable.learnable, graph.edges)
+        assert np.array_equal(learnable.adjacency, 0.5 * graph.edges)
+        assert graph.get_weight(products[0], products[2]) == 0.2
+        assert learnable.get_betas_matrix()[0, 2].a == 1 and learnable.get_betas_matrix()[0, 1] is None
@@ -1,3 +1,6 @@
+import threading
+from collections import OrderedDict
+
 import numpy as np
 
 from entities.LearnableGraph import LearnableGraph
@@ -11,6 +14,8 @@ class User:
                  weighted_graph,
                  alpha_functions,
                  exp_number_purchase,
+                 cache_size = 256,
+                 graph_cache_size = 4,
                  ):
         self.id = id
         self.reservation_prices = reservation_prices
@@ -19,12 +24,33 @@ class User:
         self.alpha_functions = alpha_functions  # list of alpha_function specifing how the user react to a specific campaign
         self.exp_number_purchase = exp_number_purchase
         self.is_estimated_graph = True if isinstance(weighted_graph, LearnableGraph) else False
+        # expected profit of the navigations over the last graph_cache_size graphs, see get_path_coefficients.
+        # The caches are keyed by graph (see __graph_key), so swapping between the same graphs keeps them valid
+        self.graph_cache_size = graph_cache_size
+        self.path_coefficients_cache = OrderedDict()
+
+        # expected profits already computed, keyed by (graph key, noise over the number of units)
+        self.cache_size = cache_size
+        self.profit_cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # the caches and their counters are shared, they are read and updated under this lock
+        self.cache_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['cache_lock']  # locks can not be pickled nor copied, every copy gets its own
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.cache_lock = threading.Lock()
 
     def __recursive_visit(self, graph, root_id, node, node_prob, prob_list, purchased_set, secondary_list,
-                          expected_profits,
-                          user, exp_number_noise, debug,
+                          path_coefficients,
+                          user, debug,
                           on_estimated_graph = False):
-        """ DFS visit of every node: the expected profit array is updated for every successful payment,
+        """ DFS visit of every node: the path coefficient of the root is updated for every successful payment,
             in case of not purchase the navigation is interrupted """
 
         if node.id not in secondary_list or node in purchased_set:
@@ -42,8 +68,8 @@ class User:
         if user.reservation_prices[node.id - 1] >= node.price:
 
             prob_to_be_here = np.prod(np.array(prob_list))  # cumulative probability to be in this node of the graph
-            expected_profits[root_id] += prob_to_be_here * node.price * user.exp_number_purchase[
-                node.id - 1] * exp_number_noise[node.id - 1]  # compute profit of this purchase
+            path_coefficients[root_id][node.id - 1] += prob_to_be_here * node.price * user.exp_number_purchase[
+                node.id - 1]  # profit of this purchase, still to be scaled by the noise of the number of units
             purchased_set.add(node)
 
             if debug:
@@ -60,9 +86,8 @@ class User:
                         prob_list = prob_list,
                         purchased_set = purchased_set,
                         secondary_list = node.secondary_list,
-                        expected_profits = expected_profits,
+                        path_coefficients = path_coefficients,
                         user = user,
-                        exp_number_noise = exp_number_noise,
                         debug = debug
                 )
 
@@ -75,10 +100,27 @@ class User:
     def set_graph(self, weighted_graph):
         self.weighted_graph = weighted_graph
 
-    def expected_profit(self, exp_number_noise, debug=False):
-        """ Return the expected profit for each primary product"""
+    def __graph_key(self) -> tuple:
+        """ Key of the current graph in the caches: its id, version and kind. The cached entries hold a reference to
+            their graph, so the id can not be reused by another graph while they are cached """
+        return id(self.weighted_graph), self.weighted_graph.version, self.is_estimated_graph
+
+    def get_path_coefficients(self, debug = False) -> np.ndarray:
+        """ Return the (primary products x products) matrix of the expected profit of every product purchased
+            navigating from a primary product, before the noise over the number of units. The DFS over a graph
+            is done once and kept until the graph changes """
+        with self.cache_lock:
+            return self.__path_coefficients(debug)
+
+    def __path_coefficients(self, debug) -> np.ndarray:
+        key = self.__graph_key()
+
+        if key in self.path_coefficients_cache and not debug:
+            self.path_coefficients_cache.move_to_end(key)
+            return self.path_coefficients_cache[key][1]
+
         nodes = self.weighted_graph.get_all_nodes()
-        expected_profits = [0, 0, 0, 0, 0]
+        path_coefficients = np.zeros((len(nodes), len(self.exp_number_purchase)))
 
         # apply dfs starting from every product page
         for i, node in enumerate(nodes):
@@ -92,21 +134,56 @@ class User:
                                    prob_list=prob_list,
                                    purchased_set=purchased_set,
                                    secondary_list=[node.id, -1],
-                                   expected_profits=expected_profits,
+                                   path_coefficients=path_coefficients,
                                    user=self,
                                    debug=debug,
-                                   exp_number_noise=exp_number_noise,
                                    on_estimated_graph = self.is_estimated_graph
                                    )
 
             # self._simulation_done = True
             if debug:
-                print(f"\t\t$$$ Expected profit of visited products: {expected_profits[node.id - 1]} $$$")
                 print(f"\t\t--- End navigation started from {node} ---\n")
-                # print(f"\t\t--- Expected profit of visit: {self.value_per_click(node.id)} ---\n")
+                # print(f"\t\t--- Expected profit of visited products: {self.value_per_click(node.id)} ---\n")
+
+        self.path_coefficients_cache[key] = (self.weighted_graph, path_coefficients)
+        if len(self.path_coefficients_cache) > self.graph_cache_size:
+            # drop the least recently used graph
+            self.path_coefficients_cache.popitem(last = False)
+
+        return path_coefficients
 
-        return expected_profits
+    def expected_profit(self, exp_number_noise, debug=False):
+        """ Return the expected profit for each primary product"""
+        with self.cache_lock:
+            return self.__expected_profit(exp_number_noise, debug)
+
+    def __expected_profit(self, exp_number_noise, debug) -> list:
+        key = self.__graph_key() + (tuple(np.array(exp_number_noise).tolist()),)
+
+        if key in self.profit_cache and not debug:
+            self.cache_hits += 1
+            self.profit_cache.move_to_end(key)
+            return list(self.profit_cache[key][1])
+
+        self.cache_misses += 1
+        expected_profits = self.__path_coefficients(debug) @ np.array(exp_number_noise)
+
+        self.profit_cache[key] = (self.weighted_graph, expected_profits)
+        if len(self.profit_cache) > self.cache_size:
+            # drop the least recently used result
+            self.profit_cache.popitem(last = False)
+
+        if debug:
+            for i, profit in enumerate(expected_profits):
+                print(f"\t\t$$$ Expected profit of navigation started from product {i + 1}: {profit} $$$")
+
+        return list(expected_profits)
 
     def change_graph(self, weighted_graph):
         self.weighted_graph = weighted_graph
         self.is_estimated_graph = True if isinstance(weighted_graph, LearnableGraph) else False
+
+    def get_cache_info(self) -> dict:
+        """ Return hits, misses and current size of the expected profit cache """
+        with self.cache_lock:
+            return {'hits': self.cache_hits, 'misses': self.cache_misses, 'size': len(self.profit_cache)}
@@ -0,0 +1,127 @@
+import copy
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import entities.Utils as util
+from entities.LearnableGraph import LearnableGraph
+from entities.Product import Product
+from entities.User import User
+
+
+def reference_expected_profit(user: User, exp_number_noise) -> np.ndarray:
+    """ Expected profits computed as before the path coefficients: a DFS per call with the noise applied at every
+        purchase """
+
+    def visit(node, node_prob, prob_list, purchased_set, secondary_list, root_id, on_estimated_graph = False):
+        if node.id not in secondary_list or node in purchased_set:
+            return
+
+        prob_list.append(node_prob)
+        if on_estimated_graph and node.id == secondary_list[1]:
+            prob_list.append(user.lmbda)
+
+        if user.reservation_prices[node.id - 1] >= node.price:
+            expected_profits[root_id] += np.prod(np.array(prob_list)) * node.price * \
+                user.exp_number_purchase[node.id - 1] * exp_number_noise[node.id - 1]
+            purchased_set.add(node)
+
+            for child, weight in user.weighted_graph.get_child_nodes(node):
+                visit(child, weight, prob_list, purchased_set, node.secondary_list, root_id)
+
+        prob_list.remove(node_prob)
+        if on_estimated_graph and node.id == secondary_list[1]:
+            prob_list.remove(user.lmbda)
+
+    nodes = user.weighted_graph.get_all_nodes()
+    expected_profits = np.zeros(len(nodes))
+    for i, node in enumerate(nodes):
+        visit(node, 1, [1], set(), [node.id, -1], i, on_estimated_graph = user.is_estimated_graph)
+
+    return expected_profits
+
+
+def random_user(n_products, rng, estimated = False) -> User:
+    products = []
+    for i in range(n_products):
+        others = [j + 1 for j in range(n_products) if j != i]
+        products.append(Product(i + 1, float(rng.uniform(0.5, 1.0)),
+                                secondary_list = [int(j) for j in rng.choice(others, 2, replace = False)]))
+
+    graph = util.random_fully_connected_graph(products = products, rng = rng)
+    if estimated:
+        graph = LearnableGraph(g = graph)
+        graph.sample_weights(rng = rng)
+
+    return User(id = 1,
+                reservation_prices = list(rng.uniform(0.5, 1.1, size = n_products)),
+                lmbda = float(rng.uniform(0.3, 0.9)),
+                weighted_graph = graph,
+                alpha_functions = None,
+                exp_number_purchase = list(rng.uniform(1, 3, size = n_products)))
+
+
+class TestUser:
+
+    @pytest.mark.parametrize("n_products, estimated", [(5, False), (5, True), (7, False), (7, True)])
+    def testPathCoefficientsMatchDfs(self, n_products, estimated) -> None:
+        rng = np.random.default_rng(n_products)
+
+        for _ in range(10):
+            user = random_user(n_products, rng, estimated = estimated)
+            for _ in range(5):
+                noise = rng.uniform(0.5, 1.5, size = n_products)
+                assert np.allclose(user.get_path_coefficients() @ noise, reference_expected_profit(user, noise),
+                                   rtol = 1e-12, atol = 1e-12)
+                assert np.allclose(user.expected_profit(noise), reference_expected_profit(user, noise),
+                                   rtol = 1e-12, atol = 1e-12)
+
+    def testCacheKeptAcrossGraphSwaps(self) -> None:
+        rng = np.random.default_rng(0)
+        user = random_user(5, rng)
+        real_graph = user.weighted_graph
+        estimated_graph = LearnableGraph(g = real_graph)
+        noise = [1.0] * 5
+
+        # as the days of SimulationHandler: the real graph for the clairvoyant, then the estimated one
+        for _ in range(4):
+            user.change_graph(real_graph)
+            real_profits = user.expected_profit(noise)
+            user.change_graph(estimated_graph)
+            estimated_profits = user.expected_profit(noise)
+
+        assert user.get_cache_info()['misses'] == 2
+        assert np.allclose(real_profits, reference_expected_profit(User(1, user.reservation_prices, user.lmbda,
+                                                                        real_graph, None, user.exp_number_purchase),
+                                                                   noise))
+        assert np.allclose(estimated_profits, reference_expected_profit(user, noise))
+
+        # a change of the weights gives a new version of the graph, its results are computed again
+        estimated_graph.sample_weights(rng = rng)
+        assert np.allclose(user.expected_profit(noise), reference_expected_profit(user, noise))
+        assert user.get_cache_info()['misses'] == 3
+
+    def testCacheSharedByThreads(self) -> None:
+        rng = np.random.default_rng(1)
+        # a small cache, so that the threads keep evicting the results read by the others
+        user = random_user(5, rng)
+        user.cache_size = 4
+        noises = [list(rng.uniform(0.5, 1.5, size = 5)) for _ in range(8)]
+        calls = [noises[i % len(noises)] for i in range(2000)]
+
+        with ThreadPoolExecutor(max_workers = 8) as executor:
+            profits = list(executor.map(user.expected_profit, calls))
+
+        for noise, profit in zip(calls, profits):
+            assert np.allclose(profit, reference_expected_profit(user, noise), rtol = 1e-12, atol = 1e-12)
+        info = user.get_cache_info()
+        assert info['hits'] + info['misses'] == len(calls)
+        assert info['size'] <= user.cache_size
+
+        # copies get their own lock and keep the cached results
+        for user_copy in [copy.deepcopy(user), pickle.loads(pickle.dumps(user))]:
+            assert user_copy.cache_lock is not user.cache_lock
+            assert user_copy.get_cache_info() == info
+            assert np.allclose(user_copy.expected_profit(noises[0]), reference_expected_profit(user, noises[0]))
@@ -1,6 +1,7 @@
 import os
 import random
 from enum import Enum
+from functools import partial
 from random import randint
 from time import sleep
 from typing import Union
@@ -14,7 +15,12 @@ from entities.Graph import Graph
 import inspect
 
 
-def get_probabilities(quantity, padding):
+def get_rng(rng = None):
+    """ Return the given np.random.Generator, or the numpy global random state when it is None """
+    return np.random if rng is None else rng
+
+
+def get_probabilities(quantity, padding, rng = None):
     """it return a random list of probabilities that sum to 1-padding"""
 
     if int(quantity) <= 0:
@@ -26,7 +32,7 @@ def get_probabilities(quantity, padding):
     random_samples = np.array([0] * quantity)
 
     for i in range(quantity):
-        random_samples[i] = float(randint(1, 100))
+        random_samples[i] = float(randint(1, 100)) if rng is None else float(rng.integers(1, 101))
 
     normalizer = (1 - padding) / np.sum(random_samples)
 
@@ -39,38 +45,43 @@ def get_probabilities(quantity, padding):
     return probabilities
 
 
-def random_fully_connected_graph(products = [], padding = 0.1):
+def random_fully_connected_graph(products = [], padding = 0.1, rng = None):
     """ Generate a fully connected random graph with the given Products
         the weights will sum to 1-padding """
     return __get_graph_specify_neighbours(products = products,
                                           padding = padding,
                                           num_of_neighbours = len(products) - 1,
                                           weighted = True,
-                                          known = True)
+                                          known = True,
+                                          rng = rng)
 
 
-def random_fully_connected_unknown_graph(products = []):
+def random_fully_connected_unknown_graph(products = [], rng = None):
     """ Generate a fully connected random unknown weighted graph
         with the given Products"""
     return __get_graph_specify_neighbours(products = products,
                                           num_of_neighbours = len(products) - 1,
                                           padding = None,
                                           weighted = False,
-                                          known = False)
+                                          known = False,
+                                          rng = rng)
 
 
-def get_ecommerce_graph(products = [], padding = 0.1):
+def get_ecommerce_graph(products = [], padding = 0.1, rng = None):
     return __get_graph_specify_neighbours(products = products,
                                           num_of_neighbours = 2,
                                           padding = padding,
                                           weighted = True,
-                                          known = True)
+                                          known = True,
+                                          rng = rng)
 
 
 def __get_graph_specify_neighbours(products: list,
                                    num_of_neighbours: Union[int, list],
                                    padding = None,
-                                   weighted = True, known = True):
+                                   weighted = True, known = True,
+                                   rng = None):
+    """ Without a np.random.Generator the stdlib random module is used """
     graph = Graph() if known else LearnableGraph()
 
     if known and not padding:
@@ -93,14 +104,14 @@ def __get_graph_specify_neighbours(products: list,
 
         if known:
             if weighted:
-                weights = get_probabilities(num_of_neighbours[i], padding = padding[i])  # to change weights change here
+                weights = get_probabilities(num_of_neighbours[i], padding = padding[i], rng = rng)  # to change weights change here
             else:
                 weights = [0.0 for _ in range(len(num_of_neighbours))]
         child_nodes = products.copy()
         child_nodes.remove(prod)
 
         for _ in range(len(products) - 1 - num_of_neighbours[i]):
-            child_nodes.pop(random.randrange(len(child_nodes)))
+            child_nodes.pop(random.randrange(len(child_nodes)) if rng is None else rng.integers(len(child_nodes)))
 
         for k, prod_child in enumerate(child_nodes):
             if known:
@@ -111,18 +122,31 @@ def __get_graph_specify_neighbours(products: list,
     return graph
 
 
+def alpha_function(x, saturation_speed = 1, max_value = 1, activation = 0.1):
+    return (-1 + 2 / (1 + np.exp(- saturation_speed * (x - activation)))) * max_value
+
+
 def new_alpha_function(saturation_speed = 1, max_value = 1, activation = 0.1):
-    """ When using the alpha functions remember to clip them to 0 """
-    return lambda x: (-1 + 2 / (1 + np.exp(- saturation_speed * (x - activation)))) * max_value
+    """ When using the alpha functions remember to clip them to 0.
+        A partial is returned instead of a lambda so that environments can be pickled (e.g. by process pools) """
+    return partial(alpha_function, saturation_speed = saturation_speed, max_value = max_value, activation = activation)
 
 
-def noise_matrix_alpha(max_reduction = 0.1, max_global_influence = 0.1, n_user = 3, n_product = 5):
+def noise_matrix_alpha(max_reduction = 0.1, max_global_influence = 0.1, n_user = 3, n_product = 5, rng = None):
     """ return a 2D list: one row for user and column for products
-        it returns the multiplier for a stochastic reduction on alpha function """
-    global_influence = uniform(0.0, max_global_influence)  # set day trend
-    # generate a random contraction and add a random addition
+        it returns the multiplier for a stochastic reduction on alpha function.
+        Without a np.random.Generator the stdlib random module is used """
+    if rng is None:
+        global_influence = uniform(0.0, max_global_influence)  # set day trend
+        # generate a random contraction and add a random addition
+        return [
+            [1 + uniform(-0.1, 0.1) + random.gauss(0, 0.4 / 3)
+             for c in range(n_product)] for r in range(n_user)
+        ]
+
+    global_influence = rng.uniform(0.0, max_global_influence)  # set day trend
     return [
-        [1 + uniform(-0.1, 0.1) + random.gauss(0, 0.4 / 3)
+        [1 + rng.uniform(-0.1, 0.1) + rng.normal(0, 0.4 / 3)
          for c in range(n_product)] for r in range(n_user)
     ]
 
@@ -251,6 +275,7 @@ def compute_delta(banditX, banditY, clairvoyantX, clairvoyantY, campaigns):
 
 
 class BanditNames(Enum):
+    BatchedGPTS_Learner = 'Batched-GP-TS'
     CusumGPUCB1Learner = 'CUSUM-GP-UCB1'
     CusumGTSLearner = 'CUSUM-GTS'
     GPTS_Learner = 'GP-TS'
@@ -10,17 +10,211 @@ np.set_printoptions(threshold=sys.maxsize)
 
 
 class Knapsack:
+    NINF = -100
 
-    def __init__(self, rewards: np.ndarray = None, budgets: np.ndarray = None) -> None:
+    def __init__(self, rewards: np.ndarray = None, budgets: np.ndarray = None, compact = False) -> None:
+        """ In compact mode only an argmax backpointer per dp cell is stored, allocations are rebuilt on demand
+            and the (rows x columns x rows) allocations tensor is built lazily by get_output """
+        self.compact = compact
+        self.optimized = False
+        self.__dp_rewards = None
         self.reset(rewards = rewards, budgets = budgets)
-        self.NINF = -100
 
-    def solve(self) -> None:
+    def solve(self, vectorized = True) -> None:
+        """ Fill the dp table, the backpointers and (unless compact) the allocations tensor. The vectorized solver
+            computes each row of the table with a max-plus convolution over NumPy arrays and gives the same output
+            of the loop based one, which is kept as reference implementation (vectorized = False) """
 
         if not (isinstance(self.rewards, np.ndarray) and isinstance(self.budgets, np.ndarray)):
             raise Exception("You need to properly initialize the problem by calling reset method")
 
         self.optimized = False
+
+        if vectorized:
+            self.__solve_vectorized(first_row = 1)
+        else:
+            self.__solve_loop()
+
+        self.__restore_output()
+
+    def resolve(self, rewards: np.ndarray, budgets: np.ndarray) -> int:
+        """ Incremental version of reset + solve: the dp rows of the campaigns before the first one whose rewards
+            changed are kept and only the following rows are recomputed, so it pays to put the campaigns that change
+            less often first. Falls back to a full solve when there is no previous solution for the same budgets and
+            number of campaigns. Return the number of dp rows recomputed """
+        if not self.optimized or not np.array_equal(budgets, self.__input_budgets) or \
+                rewards.shape[0] != self.__dp_rewards.shape[0]:
+            self.reset(rewards = rewards, budgets = budgets)
+            self.solve()
+            return self.rows - 1
+
+        if self.toRestore:
+            rewards = np.append(np.zeros((rewards.shape[0], 1), dtype = rewards.dtype), rewards, 1)
+
+        changed_rows = np.flatnonzero(np.any(rewards != self.__dp_rewards, axis = 1))
+
+        if len(changed_rows) == 0:
+            return 0
+
+        # go back to the padded problem solved last time and recompute from the first changed campaign
+        self.rewards = self.__dp_rewards = rewards.copy()
+        self.budgets = self.__dp_budgets
+        self.dp_table = self.__dp_table
+        self.allocations = self.__dp_allocations
+        self.columns = self.dp_table.shape[1]
+        self.optimized = False
+
+        first_row = changed_rows[0] + 1
+        self.__solve_vectorized(first_row = first_row)
+        self.__restore_output()
+
+        return self.rows - first_row
+
+    def __restore_output(self) -> None:
+        self.optimized = True
+
+        if self.toRestore:
+            # get rid of first column of zeros
+            self.dp_table = self.dp_table[:, 1:]
+
+            self.budgets = self.budgets[1:]
+
+            self.rewards = self.rewards[: 1:]
+
+            if not self.compact:
+                self.allocations = self.allocations[:, 1:, :]
+
+            self.columns -= 1
+
+    @staticmethod
+    def solve_batch(rewards: np.ndarray, budgets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ Solve B independent problems sharing the same budgets in one stacked pass over the rows.
+            rewards has shape (B, rows, columns). Return for each problem the best value of the last dp row and its
+            allocation, shape (B, rows), i.e. the same np.max(dp_table[-1]) and get_allocation(arg_max)[1:] given by
+            solving every problem on its own """
+        rewards = np.asarray(rewards)
+        budgets = np.asarray(budgets)
+
+        # same handling of the missing 0 budget column done by reset
+        first_column = 0
+
+        if budgets[0] != 0:
+            budgets = np.insert(budgets, 0, 0)
+            rewards = np.append(np.zeros(rewards.shape[:2] + (1,), dtype = rewards.dtype), rewards, 2)
+            first_column = 1
+
+        n_problems, rows, columns = rewards.shape
+
+        dp_row = np.zeros((n_problems, columns), dtype = float)
+        backpointers = -np.ones((n_problems, rows + 1, columns), dtype = int)
+
+        for row in range(1, rows + 1):
+            dp_row, best, infeasible = Knapsack.__max_plus_row(previous = dp_row,
+                                                               rewards = rewards[:, row - 1],
+                                                               ninf = Knapsack.NINF)
+            backpointers[:, row] = np.where(infeasible, -1, best)
+
+        arg_max = first_column + np.argmax(dp_row[:, first_column:], axis = 1)
+        values = dp_row[np.arange(n_problems), arg_max]
+        allocations = Knapsack.__walk_back(backpointers = backpointers, budgets = budgets, row = rows, columns = arg_max)
+
+        return values, allocations[:, 1:]
+
+    def get_top_k(self, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """ k-best version of the dp: return the values and the allocations, shape (k, campaigns), of the k best
+            allocations of the whole budget in decreasing order of value. Every campaign gets one of the budgets
+            with a non negative reward (negative rewards are infeasible) and the budget indexes must sum up to at
+            most the last column. Less than k rows are returned if there are not enough feasible allocations """
+        if not isinstance(self.__dp_rewards, np.ndarray):
+            raise Exception("You need to properly initialize the problem by calling reset method")
+
+        rewards = self.__dp_rewards
+        campaigns, columns = rewards.shape
+
+        # top[column, rank] best values spending exactly column budget indexes, -inf when not reachable
+        top = np.full((columns, k), -np.inf)
+        top[0, 0] = 0
+        # budget index and rank in the previous row of every entry, to walk back the allocations
+        back_index = np.zeros((campaigns, columns, k), dtype = int)
+        back_rank = np.zeros((campaigns, columns, k), dtype = int)
+
+        column = np.arange(columns).reshape((-1, 1))
+        index = np.arange(columns).reshape((1, -1))
+        valid = index <= column
+
+        for row in range(campaigns):
+            # [column, index, rank] candidates: rewards of the budget index plus the k best of the remaining budget
+            candidates = top[np.where(valid, column - index, 0)] + rewards[row][np.newaxis, :, np.newaxis]
+            candidates[~valid | (rewards[row] < 0)[np.newaxis, :]] = -np.inf
+            candidates = candidates.reshape((columns, -1))
+
+            best = np.argsort(-candidates, axis = 1, kind = 'stable')[:, :k]
+            top = np.take_along_axis(candidates, best, axis = 1)
+            back_index[row], back_rank[row] = np.divmod(best, k)
+
+        # merge the k best lists of all the columns
+        flat = np.argsort(-top, axis = None, kind = 'stable')[:k]
+        flat = flat[np.isfinite(top.reshape(-1)[flat])]
+        columns, ranks = np.divmod(flat, k)
+        values = top[columns, ranks]
+
+        allocations = np.zeros((len(flat), campaigns), dtype = int)
+        for row in range(campaigns - 1, -1, -1):
+            index = back_index[row, columns, ranks]
+            allocations[:, row] = self.__dp_budgets[index]
+            columns, ranks = columns - index, back_rank[row, columns, ranks]
+
+        return values, allocations
+
+    def __solve_vectorized(self, first_row: int) -> None:
+        for row in range(first_row, self.rows):
+            values, best, infeasible = self.__max_plus_row(previous = self.dp_table[row - 1],
+                                                           rewards = self.rewards[row - 1],
+                                                           ninf = self.NINF)
+
+            # infeasible cells keep an empty allocation, as in the loop based solver
+            feasible = np.flatnonzero(~infeasible)
+            self.backpointers[row] = np.where(infeasible, -1, best)
+
+            if not self.compact:
+                self.allocations[row] = 0
+                self.allocations[row, feasible] = self.allocations[row - 1, feasible - best[feasible]]
+                self.allocations[row, feasible, row] = self.budgets[best[feasible]]
+
+            self.dp_table[row] = values
+
+    @staticmethod
+    def __max_plus_row(previous: np.ndarray, rewards: np.ndarray, ninf: Number) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Compute a whole row of the dp table given the previous one and the rewards of the campaign added by the
+            row. Every cell [column] is the max over index <= column of the same candidate values used by the loop
+            based solver, so that ties are broken in the same way (first index wins).
+            Leading dimensions of the inputs are treated as independent problems.
+            Return the new row, the budget index assigned to the new campaign and the mask of cells set to NINF """
+        columns = previous.shape[-1]
+        column = np.arange(columns).reshape((-1, 1))
+        index = np.arange(columns).reshape((1, -1))
+        valid = index <= column
+
+        # [..., column, index] views of the previous row and of the rewards
+        shifted_previous = previous[..., np.where(valid, column - index, 0)]
+        candidate_rewards = rewards[..., np.newaxis, :]
+        same_column_previous = previous[..., :, np.newaxis]
+
+        current = np.where((shifted_previous >= 0) & (candidate_rewards >= 0),
+                           candidate_rewards + shifted_previous,
+                           np.where(candidate_rewards >= 0, candidate_rewards, same_column_previous))
+        current = np.where(valid, current, -np.inf)
+
+        best = np.argmax(current, axis = -1)
+        values = np.take_along_axis(current, best[..., np.newaxis], axis = -1)[..., 0]
+
+        infeasible = ((rewards < 0) & (previous == 0)) | ((rewards == 0) & (previous < 0)) | \
+                     ((rewards < 0) & (previous < 0))
+
+        return np.where(infeasible, ninf, values), best, infeasible
+
+    def __solve_loop(self) -> None:
         # cycle for each row of the dp_table
         for row in range(1, self.rows):
             # cycle for each row of the dp_table
@@ -62,29 +256,18 @@ class Knapsack:
                         # update max value
                     if current_value > max_value:
                         max_value = current_value
-                        allocation = np.copy(self.allocations[row - 1][column - index])
-                        allocation[row] = self.budgets[index]
+                        best_index = index
 
                 # update max value in the dp table
-                if row > 0:
+                self.backpointers[row][column] = best_index
+
+                if not self.compact:
+                    allocation = np.copy(self.allocations[row - 1][column - best_index])
+                    allocation[row] = self.budgets[best_index]
                     self.allocations[row][column] = allocation
 
                 self.dp_table[row][column] = max_value
 
-        self.optimized = True
-
-        if self.toRestore:
-            # get rid of first column of zeros
-            self.dp_table = self.dp_table[:, 1:]
-
-            self.budgets = self.budgets[1:]
-
-            self.rewards = self.rewards[: 1:]
-
-            self.allocations = self.allocations[:, 1:, :]
-
-            self.columns -= 1
-
     def init_for_pretty_print(self, row_labels, col_labels) -> None:
         self.row_labels = row_labels
         self.column_labels = col_labels
@@ -128,7 +311,7 @@ class Knapsack:
                 rew_str = "\t|Reward: " + str(self.dp_table[row][column]) + "|"
                 alloc_str = "\n|Allocations: " + format_allocation(start_campaign = 1,
                                                                    end_campaign = row,
-                                                                   allocs = self.allocations,
+                                                                   allocs = self.__allocations_tensor(),
                                                                    row = row,
                                                                    col = column,
                                                                    spaces = len("Allocations: "))
@@ -140,14 +323,68 @@ class Knapsack:
         print(formatted_output)
 
     def get_output(self, dp_as_dataframe = False) -> Tuple[Union[pd.DataFrame, np.ndarray], np.ndarray]:
+        """ dp table and allocations tensor. In compact mode the tensor is rebuilt from the backpointers at the first
+            call after every solve, callers needing only the dp table should read dp_table instead """
         if not self.optimized:
             raise Exception("Run optimization first!")
 
         if dp_as_dataframe:
             dp_table_dataframe = pd.DataFrame(self.dp_table, columns = self.column_labels, index = self.row_labels)
-            return dp_table_dataframe, self.allocations
+            return dp_table_dataframe, self.__allocations_tensor()
         else:
-            return self.dp_table, self.allocations
+            return self.dp_table, self.__allocations_tensor()
+
+    def get_allocation(self, column: int, row: int = -1) -> np.ndarray:
+        """ Return the allocation of a single dp cell, with the same layout of get_output()[1][row][column] """
+        if not self.optimized:
+            raise Exception("Run optimization first!")
+
+        if not self.compact:
+            return self.allocations[row][column].copy()
+
+        return self.get_allocations(row = row)[column]
+
+    def get_allocations(self, row: int = -1) -> np.ndarray:
+        """ Return the allocations of all the cells of a dp row rebuilding them from the backpointers """
+        if not self.optimized:
+            raise Exception("Run optimization first!")
+
+        if not self.compact:
+            return self.allocations[row].copy()
+
+        columns = np.arange(self.columns) + self.__column_offset
+        # every column walks back the same table
+        backpointers = np.broadcast_to(self.backpointers, (self.columns,) + self.backpointers.shape)
+
+        return self.__walk_back(backpointers = backpointers,
+                                budgets = self.__dp_budgets,
+                                row = row % self.rows,
+                                columns = columns)
+
+    @staticmethod
+    def __walk_back(backpointers: np.ndarray, budgets: np.ndarray, row: int, columns: np.ndarray) -> np.ndarray:
+        """ Rebuild the allocations of the cells [row][columns[i]] of the tables backpointers[i], shape (N, rows) """
+        problems = np.arange(len(columns))
+        columns = np.array(columns)
+
+        allocations = np.zeros((len(columns), backpointers.shape[1]), dtype = int)
+        # a cell set to NINF has an empty allocation, so the walk back stops there
+        reachable = np.ones(len(columns), dtype = bool)
+
+        for previous_row in range(row, 0, -1):
+            index = backpointers[problems, previous_row, columns]
+            reachable &= index >= 0
+            allocations[reachable, previous_row] = budgets[index[reachable]]
+            columns = np.where(reachable, columns - index, columns)
+
+        return allocations
+
+    def __allocations_tensor(self) -> np.ndarray:
+        """ Legacy (rows x columns x rows) allocations tensor, built and cached on first request in compact mode """
+        if self.allocations is None:
+            self.allocations = np.array([self.get_allocations(row = row) for row in range(self.rows)])
+
+        return self.allocations
 
     def pretty_print_dp_table(self, multiplier: Number = None):
         if not self.optimized:
@@ -174,6 +411,7 @@ class Knapsack:
 
         # initialize budgets vector
         self.budgets = budgets.copy()
+        self.__input_budgets = budgets.copy()
 
         # initialize rewards matrix
         self.rewards = rewards.copy()
@@ -192,12 +430,27 @@ class Knapsack:
             # we keep track of the changes to restore the original shape when returning results.
             self.toRestore = True
 
-        # initialize allocations tensor
-        self.allocations = np.zeros((self.rewards.shape[0] + 1, self.rewards.shape[1], self.rewards.shape[0] + 1), dtype = int)
+        # initialize allocations tensor, not needed in compact mode
+        if self.compact:
+            self.allocations = None
+        else:
+            self.allocations = np.zeros((self.rewards.shape[0] + 1, self.rewards.shape[1], self.rewards.shape[0] + 1), dtype = int)
+
+        # budget index assigned to the campaign of the row for each dp cell, -1 for cells set to NINF
+        self.backpointers = -np.ones((self.rewards.shape[0] + 1, self.rewards.shape[1]), dtype = int)
+
+        # budgets and column offset to walk back the backpointers once the first column has been restored
+        self.__dp_budgets = self.budgets
+        self.__column_offset = 1 if self.toRestore else 0
 
         # initialize dynamic programming table, dimensions: (subcampaigns + 1, budgets)
         self.dp_table = np.zeros((len(self.rewards) + 1, len(self.budgets)), dtype = float)
 
+        # padded problem kept for incremental re-solves
+        self.__dp_rewards = self.rewards
+        self.__dp_table = self.dp_table
+        self.__dp_allocations = self.allocations
+
         self.rows = self.dp_table.shape[0]
         self.columns = self.dp_table.shape[1]
 
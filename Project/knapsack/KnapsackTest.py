@@ -187,6 +187,141 @@ class TestKnapsack:
             self.K.pretty_print_dp_table()
             raise Exception("**" * 5 + " Test some negs failed " + "**" * 5)
 
+    def testVectorizedMatchesLoop(self) -> None:
+        rng = np.random.default_rng(15)
+
+        for trial in range(50):
+            rows = rng.integers(1, 6)
+            columns = rng.integers(1, 10)
+            rew = rng.choice([-100, -5, 0, 10, 20, 35, 50], size = (rows, columns)).astype(np.int32)
+            # budgets both with and without the leading 0, to cover the column restore
+            budgets = np.arange(columns) * 10 + (10 if trial % 2 else 0)
+
+            K_loop = Knapsack(rewards = rew, budgets = budgets)
+            K_loop.solve(vectorized = False)
+            K_vect = Knapsack(rewards = rew, budgets = budgets)
+            K_vect.solve()
+
+            dp_loop, allocs_loop = K_loop.get_output()
+            dp_vect, allocs_vect = K_vect.get_output()
+
+            if not (np.equal(dp_loop, dp_vect).all() and np.equal(allocs_loop, allocs_vect).all()):
+                K_vect.pretty_print_output()
+                raise Exception("**" * 5 + " Test vectorized solver failed " + "**" * 5)
+
+    def testCompactAllocations(self) -> None:
+        rew = np.empty(shape = (5, 8), dtype = np.int32)
+        NINF = -100
+
+        rew[0] = np.array([NINF, 90, 100, 105, 110, NINF, NINF, NINF])
+        rew[1] = np.array([0, 82, 90, 92, NINF, NINF, NINF, NINF])
+        rew[2] = np.array([0, 80, 83, 85, 86, NINF, NINF, NINF])
+        rew[3] = np.array([NINF, 90, 110, 115, 118, 120, NINF, NINF])
+        rew[4] = np.array([NINF, 111, 130, 138, 142, 148, 155, NINF])
+
+        for budgets in [np.array([0, 10, 20, 30, 40, 50, 60, 70]), np.array([10, 20, 30, 40, 50, 60, 70, 80])]:
+            K_full = Knapsack(rewards = rew, budgets = budgets)
+            K_full.solve()
+            K_compact = Knapsack(rewards = rew, budgets = budgets, compact = True)
+            K_compact.solve()
+
+            dp_full, allocs_full = K_full.get_output()
+
+            for column in range(dp_full.shape[1]):
+                if not np.equal(K_compact.get_allocation(column), allocs_full[-1][column]).all():
+                    raise Exception("**" * 5 + " Test compact allocation failed " + "**" * 5)
+
+            # the legacy tensor is rebuilt lazily from the backpointers
+            dp_compact, allocs_compact = K_compact.get_output()
+
+            if not (np.equal(dp_full, dp_compact).all() and np.equal(allocs_full, allocs_compact).all()):
+                raise Exception("**" * 5 + " Test compact output failed " + "**" * 5)
+
+    def testCompactLazyTensor(self) -> None:
+        rew = np.array([[-100, 10, 30, 35],
+                        [0, 20, 25, -100],
+                        [5, -100, 40, 45]])
+        budgets = np.array([10, 20, 30, 40])
+
+        K = Knapsack(compact = True)
+        K.resolve(rewards = rew, budgets = budgets)
+        arg_max = np.argmax(K.dp_table[-1])
+        K.get_allocation(arg_max)
+
+        # reading the dp table and one allocation does not build the allocations tensor
+        if K.allocations is not None:
+            raise Exception("**" * 5 + " Test compact lazy tensor failed " + "**" * 5)
+
+        K.get_output()
+        rew[0][0] += 1
+        K.resolve(rewards = rew, budgets = budgets)
+
+        # a new solve drops the tensor of the previous one
+        if K.allocations is not None:
+            raise Exception("**" * 5 + " Test compact lazy tensor reset failed " + "**" * 5)
+
+    def testSolveBatch(self) -> None:
+        rng = np.random.default_rng(3)
+        rew = rng.choice([-100, -5, 0, 10, 20, 35, 50], size = (6, 4, 8)).astype(np.int32)
+
+        for budgets in [np.array([0, 10, 20, 30, 40, 50, 60, 70]), np.array([10, 20, 30, 40, 50, 60, 70, 80])]:
+            values, allocations = Knapsack.solve_batch(rewards = rew, budgets = budgets)
+
+            for problem in range(rew.shape[0]):
+                K = Knapsack(rewards = rew[problem], budgets = budgets)
+                K.solve()
+                dp_table, allocs = K.get_output()
+                arg_max = np.argmax(dp_table[-1])
+
+                if values[problem] != dp_table[-1][arg_max] or \
+                        not np.equal(allocations[problem], allocs[-1][arg_max][1:]).all():
+                    raise Exception("**" * 5 + " Test solve batch failed " + "**" * 5)
+
+    def testIncrementalResolve(self) -> None:
+        rng = np.random.default_rng(4)
+        rew = rng.choice([-100, -5, 0, 10, 20, 35, 50], size = (5, 8)).astype(np.int32)
+        budgets = np.array([10, 20, 30, 40, 50, 60, 70, 80])
+
+        K = Knapsack(compact = True)
+        if K.resolve(rewards = rew, budgets = budgets) != 5:
+            raise Exception("**" * 5 + " Test incremental first solve failed " + "**" * 5)
+
+        for first_changed in [4, 2, 0]:
+            rew = rew.copy()
+            rew[first_changed:] = rng.choice([-100, 0, 15, 40], size = rew[first_changed:].shape)
+            rew[first_changed][0] += 1  # make sure the row changed
+
+            recomputed = K.resolve(rewards = rew, budgets = budgets)
+
+            K_full = Knapsack(rewards = rew, budgets = budgets)
+            K_full.solve()
+            dp_full, allocs_full = K_full.get_output()
+            dp_incr, allocs_incr = K.get_output()
+
+            if recomputed != 5 - first_changed or not np.equal(dp_full, dp_incr).all() \
+                    or not np.equal(allocs_full, allocs_incr).all():
+                raise Exception("**" * 5 + " Test incremental resolve failed " + "**" * 5)
+
+        if K.resolve(rewards = rew, budgets = budgets) != 0:
+            raise Exception("**" * 5 + " Test incremental unchanged failed " + "**" * 5)
+
+    def testTopK(self) -> None:
+        rew = np.array([[-100, 10, 30, 35],
+                        [0, 20, 25, -100],
+                        [5, -100, 40, 45]])
+        budgets = np.array([0, 10, 20, 30])
+
+        K = Knapsack(rewards = rew, budgets = budgets, compact = True)
+        values, allocs = K.get_top_k(4)
+
+        if not np.equal(values, [55, 50, 40, 40]).all() or not np.equal(allocs[:2], [[20, 10, 0], [10, 0, 20]]).all():
+            raise Exception("**" * 5 + " Test top k failed " + "**" * 5)
+
+        for value, alloc in zip(values, allocs):
+            indexes = np.searchsorted(budgets, alloc)
+            if np.sum(alloc) > budgets[-1] or value != np.sum(rew[np.arange(3), indexes]):
+                raise Exception("**" * 5 + " Test top k allocation failed " + "**" * 5)
+
     def testAll(self) -> None:
         self.setup()
         self.testBaseKnp()
@@ -195,6 +330,11 @@ class TestKnapsack:
         self.testAlternatingNegs()
         self.testAlternatingNegsAndZeros()
         self.testSomeNegs()
+        self.testVectorizedMatchesLoop()
+        self.testCompactAllocations()
+        self.testSolveBatch()
+        self.testIncrementalResolve()
+        self.testTopK()
 
 
 """KT = TestKnapsack()
@@ -0,0 +1,44 @@
+import numpy as np
+
+
+class ArmStatistics:
+    """ Running count, mean and sum of squared deviations (Welford) of the rewards of every arm,
+        samples can be added and removed in O(1) """
+
+    def __init__(self, n_arms):
+        self.n_arms = n_arms
+        self.counts = np.zeros(n_arms, dtype = int)
+        self.means = np.zeros(n_arms)
+        self.m2 = np.zeros(n_arms)
+
+    def add(self, arm, reward):
+        self.counts[arm] += 1
+        delta = reward - self.means[arm]
+        self.means[arm] += delta / self.counts[arm]
+        self.m2[arm] += delta * (reward - self.means[arm])
+
+    def remove(self, arm, reward):
+        """ Remove a reward previously added to arm """
+        if self.counts[arm] <= 1:
+            self.counts[arm] = 0
+            self.means[arm] = 0
+            self.m2[arm] = 0
+            return
+
+        old_mean = self.means[arm]
+        self.counts[arm] -= 1
+        self.means[arm] = (old_mean * (self.counts[arm] + 1) - reward) / self.counts[arm]
+
+        if self.counts[arm] == 1:  # a single reward has no spread, do not keep the rounding error of the update
+            self.m2[arm] = 0
+        else:
+            self.m2[arm] = max(self.m2[arm] - (reward - old_mean) * (reward - self.means[arm]), 0.0)
+
+    def std(self, arm):
+        """ Population standard deviation of the rewards of arm, as np.std """
+        return np.sqrt(self.m2[arm] / self.counts[arm]) if self.counts[arm] > 0 else 0.0
+
+    def clear(self):
+        self.counts[:] = 0
+        self.means[:] = 0
+        self.m2[:] = 0
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from learners.ArmStatistics import ArmStatistics
+from learners.GTS_Learner import GTS_Learner
+from learners.ObservationStore import ObservationStore
+from learners.SwGTSLearner import SwGTSLearner
+
+
+class TestArmStatistics:
+
+    @pytest.mark.parametrize("window", [1, 2, 5])
+    def testRingWindowMatchesRecompute(self, window) -> None:
+        rng = np.random.default_rng(window)
+        statistics = ArmStatistics(4)
+        ring = ObservationStore(window = window)
+
+        for t in range(60):
+            arm, reward = int(rng.integers(4)), float(rng.normal(10, 3))
+            evicted = ring.append(arm, reward, t)
+            if evicted is not None:
+                statistics.remove(evicted[0], evicted[1])
+            statistics.add(arm, reward)
+
+            # same statistics of the rewards in the window computed from scratch
+            for a in range(4):
+                rewards = ring.rewards[ring.pulled_arms == a]
+                assert statistics.counts[a] == len(rewards)
+                assert statistics.means[a] == pytest.approx(np.mean(rewards) if len(rewards) > 0 else 0.0, abs = 1e-9)
+                assert statistics.std(a) == pytest.approx(np.std(rewards) if len(rewards) > 0 else 0.0, abs = 1e-6)
+                if len(rewards) <= 1:
+                    assert statistics.m2[a] == 0
+
+    def testSlidingWindowLearnerMatchesRecompute(self) -> None:
+        arms = np.linspace(0, 300, 4)
+        rng = np.random.default_rng(3)
+        learner = SwGTSLearner(arms, prior_mean = 7, prior_sigma = 2, window_size = 3)
+        window = []
+
+        for t in range(50):
+            arm, reward = int(rng.integers(4)), float(rng.normal(10, 3))
+            learner.update(arm, reward)
+            window = (window + [(arm, reward)])[-3:]
+
+            # a learner given only the observations of the window
+            recomputed = GTS_Learner(arms, prior_mean = 7, prior_sigma = 2)
+            for observation in window:
+                recomputed.update(*observation)
+
+            assert np.allclose(learner.means, recomputed.means, atol = 1e-9)
+            assert np.allclose(learner.sigmas, recomputed.sigmas, atol = 1e-6)
@@ -0,0 +1,230 @@
+import numpy as np
+from scipy.linalg import solve_triangular
+from scipy.optimize import minimize
+from entities.Utils import BanditNames, get_rng
+from learners.IncrementalGP import DEFAULT_HP_POLICY
+from learners.Learner import Learner
+from learners.ObservationStore import ObservationStore
+
+
+class BatchedGPTS_Learner(Learner):
+    """
+    GP-TS over all the campaigns of a CombWrapper in a single object. Every campaign has its own GP, with the kernel
+    C * RBF and the normalization of GPTS_Learner and its own hyperparameters, but the observations of all the
+    campaigns are stacked ([campaigns, n], every campaign gets one observation per update) and the hyperparameter
+    optimisation, the Cholesky factorizations and the predictions run as batched linear algebra over the
+    [campaigns, n, n] kernel matrices.
+
+    hp_policy has the keys of the one of GPTS_Learner (see IncrementalGP). As there, between two refits the
+    Cholesky factors are extended by one row per update in O(n^2) instead of being recomputed.
+    """
+
+    is_batched = True  # CombWrapper builds one of these for all the campaigns
+
+    def __init__(self, arms, n_campaigns, prior_mean, prior_sigma = 1, hp_policy = None):
+        super().__init__(n_arms = len(arms), needs_boost = True)
+        self.arms = arms
+        self.arm_values = np.array(arms, dtype = float)
+        self.n_campaigns = n_campaigns
+        self.prior_mean = prior_mean
+        self.prior_sigma = prior_sigma
+        self.means = np.ones((n_campaigns, self.n_arms)) * prior_mean
+        self.sigmas = np.ones((n_campaigns, self.n_arms)) * prior_sigma
+        self.observations = ObservationStore(width = n_campaigns)  # arms pulled and rewards of every campaign
+        self.bandit_name = BanditNames.BatchedGPTS_Learner.name
+
+        alpha = 0.5
+        self.alpha = alpha ** 2
+        # log of the hyperparameters (constant, length scale) of every campaign, C(1.0, (1e-3, 1e3)) * RBF(1.0, (1e-3, 1e3))
+        self.theta = np.zeros((n_campaigns, 2))
+        self.theta_bounds = np.log([[1e-3, 1e3], [1e-3, 1e3]])
+        self.hp_policy = dict(DEFAULT_HP_POLICY) if hp_policy is None else hp_policy
+        self.n_fits = 0
+        self.n_refits = 0
+        self.lml = None  # log marginal likelihood per observation of every campaign
+        self.refit_lml = None
+
+        # per campaign L L^T = K(X, X) + alpha I, z_y = L^-1 y, z_1 = L^-1 1 and V = L^-1 K(X, arms)
+        self.__L = None
+        self.__z_y = None
+        self.__z_1 = None
+        self.__V = None
+
+    def update(self, pulled_arms, rewards):
+        """ pulled_arms: index of the arm pulled for every campaign, rewards: reward of every campaign """
+        self.t += 1
+        self.observations.append(pulled_arms, rewards, self.t)
+        self.update_model()
+
+    def update_model(self):
+        X = self.arm_values[self.observations.pulled_arms.T]
+        y = self.observations.rewards.T
+
+        # same normalization of sklearn normalize_y, for every campaign
+        y_mean = np.mean(y, axis = 1, keepdims = True)
+        y_std = np.std(y, axis = 1, keepdims = True)
+        y_std[y_std == 0] = 1.0
+
+        refit_every = self.hp_policy.get('refit_every', 1)
+        lml_drift = self.hp_policy.get('lml_drift', None)
+
+        if self.n_fits == 0 or (refit_every is not None and self.n_fits % refit_every == 0):
+            self.__refit(X, y, y_mean, y_std)
+        else:
+            if self.__L is not None and self.__L.shape[1] == X.shape[1] - 1:
+                self.__append(X, y)
+            else:
+                self.__set_factors(X, y)
+            self.lml = self.__log_marginal_likelihood(y_mean, y_std)
+
+            if lml_drift is not None and np.any(np.abs(self.lml - self.refit_lml) > lml_drift):
+                self.__refit(X, y, y_mean, y_std)
+        self.n_fits += 1
+
+        constants = np.exp(self.theta[:, 0])[:, None]
+        means = np.einsum('cnm,cn->cm', self.__V, self.__z_y - y_mean * self.__z_1)
+        variances = np.maximum(constants - np.sum(self.__V ** 2, axis = 1), 0.0)
+
+        self.means = y_mean + means
+        self.sigmas = y_std * np.sqrt(variances)
+
+    def __refit(self, X, y, y_mean, y_std):
+        """ Optimise the hyperparameters on the normalized observations and factorize from scratch with them """
+        self.__optimize((X[:, :, None] - X[:, None, :]) ** 2, (y - y_mean) / y_std)
+        self.__set_factors(X, y)
+        self.lml = self.refit_lml = self.__log_marginal_likelihood(y_mean, y_std)
+
+    def __cross_kernel(self, A, B):
+        """ [campaigns, a, b] kernel matrices between the points A [campaigns, a] and B [campaigns or 1, b] """
+        constants = np.exp(self.theta[:, 0])[:, None, None]
+        length_scales = np.exp(2 * self.theta[:, 1])[:, None, None]
+        return constants * np.exp(-(A[:, :, None] - B[:, None, :]) ** 2 / (2 * length_scales))
+
+    @staticmethod
+    def __solve_lower(L, B):
+        """ L^-1 B for every campaign, B is [campaigns, n] or [campaigns, n, m] """
+        return np.array([solve_triangular(L[c], B[c], lower = True) for c in range(len(L))])
+
+    def __set_factors(self, X, y):
+        """ Factors of the observations X, y [campaigns, n] under the current hyperparameters, in O(n^3) """
+        K = self.__cross_kernel(X, X) + self.alpha * np.eye(X.shape[1])
+        self.__L = np.linalg.cholesky(K)
+        self.__z_y = self.__solve_lower(self.__L, y)
+        self.__z_1 = self.__solve_lower(self.__L, np.ones(y.shape))
+        self.__V = self.__solve_lower(self.__L, self.__cross_kernel(X, self.arm_values[None, :]))
+
+    def __append(self, X, y):
+        """ Rank one extension of the factors with the last observation of every campaign, in O(n^2) """
+        x = X[:, -1:]
+        l = self.__solve_lower(self.__L, self.__cross_kernel(X[:, :-1], x)[:, :, 0])
+        d = np.sqrt(np.maximum(np.exp(self.theta[:, 0]) + self.alpha - np.sum(l ** 2, axis = 1), 1e-12))
+
+        n = X.shape[1] - 1
+        L = np.zeros((self.n_campaigns, n + 1, n + 1))
+        L[:, :n, :n] = self.__L
+        L[:, n, :n] = l
+        L[:, n, n] = d
+        self.__L = L
+
+        self.__z_y = np.append(self.__z_y, ((y[:, -1] - np.sum(l * self.__z_y, axis = 1)) / d)[:, None], axis = 1)
+        self.__z_1 = np.append(self.__z_1, ((1 - np.sum(l * self.__z_1, axis = 1)) / d)[:, None], axis = 1)
+
+        v = (self.__cross_kernel(x, self.arm_values[None, :])[:, 0] - np.einsum('cn,cnm->cm', l, self.__V)) / d[:, None]
+        self.__V = np.append(self.__V, v[:, None, :], axis = 1)
+
+    def __log_marginal_likelihood(self, y_mean, y_std):
+        """ Log marginal likelihood per observation of the normalized observations of every campaign, from the factors """
+        n = self.__L.shape[1]
+        z = (self.__z_y - y_mean * self.__z_1) / y_std
+        lml = -0.5 * np.sum(z ** 2, axis = 1) - np.sum(np.log(np.diagonal(self.__L, axis1 = 1, axis2 = 2)), axis = 1) \
+            - n / 2 * np.log(2 * np.pi)
+        return lml / n
+
+    def __kernel(self, D2, theta):
+        """ [campaigns, n, n] kernel matrices and their derivatives w.r.t. the log hyperparameters """
+        constants = np.exp(theta[:, 0])[:, None, None]
+        length_scales = np.exp(2 * theta[:, 1])[:, None, None]
+        K = constants * np.exp(-D2 / (2 * length_scales))
+        return K, K * D2 / length_scales
+
+    def __factorize(self, D2, y, theta):
+        """ Cholesky factors, L^-1 y and log marginal likelihood per observation of every campaign """
+        K, _ = self.__kernel(D2, theta)
+        n = D2.shape[1]
+        L = np.linalg.cholesky(K + self.alpha * np.eye(n))
+        z = np.linalg.solve(L, y[:, :, None])[:, :, 0]
+        lml = -0.5 * np.sum(z ** 2, axis = 1) - np.sum(np.log(np.diagonal(L, axis1 = 1, axis2 = 2)), axis = 1) \
+            - n / 2 * np.log(2 * np.pi)
+        return L, z, lml / n
+
+    def __negative_lml(self, theta, D2, y):
+        """ Sum over the campaigns of the negative log marginal likelihood and its gradient, the campaigns are
+            independent so the optimum of the sum is the optimum of every campaign """
+        theta = theta.reshape(self.n_campaigns, 2)
+        K, dK_length_scale = self.__kernel(D2, theta)
+        n = D2.shape[1]
+
+        try:
+            L = np.linalg.cholesky(K + self.alpha * np.eye(n))
+        except np.linalg.LinAlgError:
+            return np.inf, np.zeros(theta.size)
+
+        L_inv = np.linalg.solve(L, np.broadcast_to(np.eye(n), L.shape))
+        K_inv = np.transpose(L_inv, (0, 2, 1)) @ L_inv
+        a = np.einsum('cij,cj->ci', K_inv, y)
+
+        lml = -0.5 * np.sum(y * a) - np.sum(np.log(np.diagonal(L, axis1 = 1, axis2 = 2))) \
+            - self.n_campaigns * n / 2 * np.log(2 * np.pi)
+
+        W = a[:, :, None] * a[:, None, :] - K_inv
+        gradient = 0.5 * np.stack([np.sum(W * K, axis = (1, 2)), np.sum(W * dK_length_scale, axis = (1, 2))], axis = 1)
+
+        return -lml, -gradient.ravel()
+
+    def __optimize(self, D2, y):
+        """ L-BFGS-B over the hyperparameters of all the campaigns, from the initial (or, with warm_start, the last)
+            hyperparameters plus n_restarts_optimizer random ones, keeping the best of every campaign """
+        warm_start = self.hp_policy.get('warm_start', False) and self.n_refits > 0
+        n_restarts = 0 if warm_start else self.hp_policy.get('n_restarts_optimizer', 9)
+
+        starts = [self.theta if warm_start else np.zeros((self.n_campaigns, 2))]
+        for _ in range(n_restarts):
+            starts.append(get_rng(self.rng).uniform(self.theta_bounds[:, 0], self.theta_bounds[:, 1],
+                                                    size = (self.n_campaigns, 2)))
+
+        best_theta = None
+        best_lml = np.full(self.n_campaigns, -np.inf)
+        for start in starts:
+            result = minimize(self.__negative_lml, start.ravel(), args = (D2, y), jac = True, method = 'L-BFGS-B',
+                              bounds = np.tile(self.theta_bounds, (self.n_campaigns, 1)))
+            theta = result.x.reshape(self.n_campaigns, 2)
+            _, _, lml = self.__factorize(D2, y, theta)
+
+            if best_theta is None:
+                best_theta = theta.copy()
+            better = lml > best_lml
+            best_theta[better] = theta[better]
+            best_lml[better] = lml[better]
+
+        self.theta = best_theta
+        self.n_refits += 1
+
+    def pull_arm(self) -> np.array:
+        """ Pull an arm for every campaign and the set of value of all the arms, [campaigns, arms] """
+        arms_value = get_rng(self.rng).normal(self.means, self.sigmas)
+        idx = np.argmax(arms_value, axis = 1)
+        return idx, arms_value
+
+    def reset(self):
+        super(BatchedGPTS_Learner, self).reset()
+        self.means = np.ones((self.n_campaigns, self.n_arms)) * self.prior_mean
+        self.sigmas = np.ones((self.n_campaigns, self.n_arms)) * self.prior_sigma
+        self.theta = np.zeros((self.n_campaigns, 2))
+        self.n_fits = 0
+        self.n_refits = 0
+        self.lml = None
+        self.refit_lml = None
+        self.__L = None
+        self.__z_y = None
+        self.__z_1 = None
+        self.__V = None
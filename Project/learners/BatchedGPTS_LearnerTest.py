@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel as C, RBF
+
+from learners.BatchedGPTS_Learner import BatchedGPTS_Learner
+
+
+class TestBatchedGPTS_Learner:
+
+    @pytest.mark.parametrize("hp_policy", [{'refit_every': 1, 'n_restarts_optimizer': 1},
+                                           {'refit_every': 7, 'n_restarts_optimizer': 1},
+                                           {'refit_every': None, 'n_restarts_optimizer': 0}])
+    def testPosteriorMatchesSklearn(self, hp_policy) -> None:
+        arms = np.linspace(0, 300, 16)
+        learner = BatchedGPTS_Learner(arms, 3, 10, hp_policy = hp_policy)
+        learner.set_rng(np.random.default_rng(0))
+        rng = np.random.default_rng(1)
+
+        for _ in range(25):
+            pulled = rng.integers(len(arms), size = 3)
+            learner.update(pulled, np.sin(arms[pulled] / 60) * 10 + rng.normal(size = 3))
+
+        # posterior of every campaign given by sklearn with the same fixed hyperparameters
+        for campaign in range(3):
+            constant, length_scale = np.exp(learner.theta[campaign])
+            regressor = GaussianProcessRegressor(kernel = C(constant) * RBF(length_scale), alpha = learner.alpha,
+                                                 normalize_y = True, optimizer = None)
+            regressor.fit(arms[learner.observations.pulled_arms[:, campaign]][:, None],
+                          learner.observations.rewards[:, campaign])
+            means, sigmas = regressor.predict(arms[:, None], return_std = True)
+
+            assert np.allclose(learner.means[campaign], means, atol = 1e-9)
+            assert np.allclose(learner.sigmas[campaign], sigmas, atol = 1e-9)
+
+    def testReset(self) -> None:
+        arms = np.linspace(0, 300, 8)
+        learner = BatchedGPTS_Learner(arms, 2, 10, hp_policy = {'refit_every': None, 'n_restarts_optimizer': 0})
+        learner.update(np.array([1, 2]), np.array([3.0, 4.0]))
+        learner.update(np.array([3, 2]), np.array([5.0, 1.0]))
+        learner.reset()
+        learner.update(np.array([1, 2]), np.array([3.0, 4.0]))
+
+        assert len(learner.observations) == 1
+        assert np.all(np.isfinite(learner.means)) and np.all(np.isfinite(learner.sigmas))
@@ -31,7 +31,58 @@ class CUSUM:
         self.gMinus = 0
 
 
+class CUSUMBank:
+    """ CUSUM change detectors of every arm of n_campaigns campaigns, kept in [campaigns, arms] arrays.
+        Every detector behaves as a CUSUM object, but a whole vector of samples is processed in one update """
 
+    def __init__(self, n_arms, samplesForRefPoint, epsilon, detectionThreshold, n_campaigns = 1):
+        self.samplesForRefPoint = samplesForRefPoint
+        self.epsilon = epsilon
+        self.detectionThreshold = detectionThreshold
+        self.referencePoints = np.zeros((n_campaigns, n_arms))
+        self.gPlus = np.zeros((n_campaigns, n_arms))
+        self.gMinus = np.zeros((n_campaigns, n_arms))
+        self.t = np.zeros((n_campaigns, n_arms), dtype = int)
+
+    def update(self, arms, samples, campaigns = None) -> np.ndarray:
+        """ Update the detectors of the given arms (of the given campaigns, the first one if None) with one sample each,
+            return the mask of the detected changes """
+        arms = np.atleast_1d(arms)
+        samples = np.atleast_1d(np.array(samples, dtype = float))
+        campaigns = np.zeros(len(arms), dtype = int) if campaigns is None else np.atleast_1d(campaigns)
+
+        if len(set(zip(campaigns.tolist(), arms.tolist()))) < len(arms):
+            raise Exception("Every detector can receive only one sample per update")
 
+        self.t[campaigns, arms] += 1
+        t = self.t[campaigns, arms]
+        collecting = t <= self.samplesForRefPoint  # still building the reference point, no detection
 
+        reference_points = self.referencePoints[campaigns, arms]
+        reference_points = np.where(collecting,
+                                    reference_points + samples / self.samplesForRefPoint,
+                                    (reference_points * (t - 1) + samples) / t)
+        self.referencePoints[campaigns, arms] = reference_points
+
+        s_plus = (samples - reference_points) - self.epsilon
+        s_minus = -(samples - reference_points) - self.epsilon
+        g_plus = np.where(collecting, self.gPlus[campaigns, arms], np.maximum(0, self.gPlus[campaigns, arms] + s_plus))
+        g_minus = np.where(collecting, self.gMinus[campaigns, arms], np.maximum(0, self.gMinus[campaigns, arms] + s_minus))
+        self.gPlus[campaigns, arms] = g_plus
+        self.gMinus[campaigns, arms] = g_minus
+
+        return ~collecting & ((g_plus > self.detectionThreshold) | (g_minus > self.detectionThreshold))
+
+    def reset(self, arms = None, campaigns = None):
+        """ Reset the detectors of the given arms of the given campaigns, as CUSUM.reset. As in update, when both are
+            given the arm arms[i] of the campaign campaigns[i] is reset, with None all the arms or campaigns are """
+        if arms is not None and campaigns is not None:
+            index = (np.atleast_1d(campaigns), np.atleast_1d(arms))
+        else:
+            arms = slice(None) if arms is None else np.atleast_1d(arms)
+            campaigns = slice(None) if campaigns is None else np.atleast_1d(campaigns)
+            index = np.ix_(np.arange(len(self.t))[campaigns], np.arange(self.t.shape[1])[arms])
 
+        self.t[index] = 0
+        self.gPlus[index] = 0
+        self.gMinus[index] = 0
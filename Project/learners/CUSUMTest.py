@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from learners.CUSUM import CUSUM, CUSUMBank
+
+
+class TestCUSUM:
+
+    def testBankMatchesScalarDetectors(self) -> None:
+        n_campaigns, n_arms = 2, 4
+        args = {'samplesForRefPoint': 5, 'epsilon': 0.05, 'detectionThreshold': 2}
+        bank = CUSUMBank(n_arms = n_arms, n_campaigns = n_campaigns, **args)
+        detectors = [[CUSUM(**args) for _ in range(n_arms)] for _ in range(n_campaigns)]
+        rng = np.random.default_rng(0)
+        alarms = 0
+
+        for t in range(300):
+            # a subset of the detectors receives a sample, the mean shifts every 60 rounds
+            pairs = rng.permutation(n_campaigns * n_arms)[:rng.integers(1, n_campaigns * n_arms + 1)]
+            campaigns, arms = np.divmod(pairs, n_arms)
+            samples = rng.normal(1.0 + (t // 60) % 2 * 1.5, 0.3, size = len(pairs))
+
+            detected = bank.update(arms, samples, campaigns = campaigns)
+            expected = [bool(detectors[c][a].update(s)) for c, a, s in zip(campaigns, arms, samples)]
+            assert detected.tolist() == expected
+
+            # the learners reset the detectors raising an alarm
+            for c, a in zip(campaigns[detected], arms[detected]):
+                detectors[c][a].reset()
+            bank.reset(arms = arms[detected], campaigns = campaigns[detected])
+            alarms += np.count_nonzero(detected)
+
+            for c in range(n_campaigns):
+                for a in range(n_arms):
+                    assert bank.t[c, a] == detectors[c][a].t
+                    assert bank.gPlus[c, a] == pytest.approx(detectors[c][a].gPlus, abs = 1e-12)
+                    assert bank.gMinus[c, a] == pytest.approx(detectors[c][a].gMinus, abs = 1e-12)
+                    assert bank.referencePoints[c, a] == pytest.approx(detectors[c][a].referencePoint, abs = 1e-12)
+
+        assert alarms > 0
+
+    def testReset(self) -> None:
+        bank = CUSUMBank(n_arms = 3, n_campaigns = 2, samplesForRefPoint = 1, epsilon = 0.1, detectionThreshold = 1)
+        bank.update(np.tile(np.arange(3), 2), np.ones(6), campaigns = np.repeat(np.arange(2), 3))
+
+        # pairs of campaign and arm
+        bank.reset(arms = [0, 2], campaigns = [0, 1])
+        assert bank.t.tolist() == [[0, 1, 1], [1, 1, 0]]
+
+        # a whole campaign, then an arm of every campaign
+        bank.reset(campaigns = 1)
+        bank.reset(arms = 1)
+        assert bank.t.tolist() == [[0, 0, 1], [0, 0, 0]]
+
+    def testOneSamplePerDetector(self) -> None:
+        bank = CUSUMBank(n_arms = 3, samplesForRefPoint = 2, epsilon = 0.1, detectionThreshold = 1)
+
+        with pytest.raises(Exception):
+            bank.update([1, 1], [0.5, 0.7])
@@ -1,5 +1,6 @@
 import numpy as np
 from knapsack.Knapsack import Knapsack
+from learners.CUSUM import CUSUMBank
 
 
 class CombWrapper:
@@ -13,6 +14,12 @@ class CombWrapper:
      ->   def update(self, pulled_arm, reward)
 
     (as GTS_Learner class)
+
+    A learner class with is_batched = True (as BatchedGPTS_Learner) is instead built once for all the campaigns:
+     ->   def __init__(self, arms, n_campaigns, prior_mean, prior_sigma=1)
+     ->   def pull_arm(self) -> np.array
+            return idx, arms_value (one row per campaign)
+     ->   def update(self, pulled_arms, rewards)
     """
 
     def __init__(self,
@@ -23,12 +30,17 @@ class CombWrapper:
                  arm_distance = None,
                  is_ucb = False,
                  is_gaussian = False,
+                 top_k = None,
                  kwargs = None):  # arms are the budgets (e.g 0,10,20...)
 
         self.learners = []
+        self.batched_learner = None  # single learner of all the campaigns, for batched learner classes
+        self.n_campaigns = n_campaigns
         self.max_b = max_budget
         self.last_knapsack_reward = []
         self.is_ucb = is_ucb
+        # ucb bandits choose among the top_k allocations of the sampled rewards (None: best allocation per budget)
+        self.top_k = top_k
 
         if arm_distance is None:
             arm_distance = max_budget / n_arms
@@ -40,20 +52,45 @@ class CombWrapper:
         # this init does not affect GP
         mean = 0
         var = 90
-        for _ in range(n_campaigns):
-
-            if is_gaussian:
-                if kwargs is None:
-                    self.learners.append(learner_constructor(self.arms, mean, var))
-                else:
-                    self.learners.append(learner_constructor(self.arms, mean, var, **kwargs))
+        if getattr(learner_constructor, 'is_batched', False):
+            if is_ucb:
+                raise Exception("Batched learners cannot be used as ucb bandits")
+            if kwargs is None:
+                self.batched_learner = learner_constructor(self.arms, n_campaigns, mean, var)
             else:
-                if kwargs is None:
-                    self.learners.append(learner_constructor(self.arms))
+                self.batched_learner = learner_constructor(self.arms, n_campaigns, mean, var, **kwargs)
+        else:
+            for _ in range(n_campaigns):
+
+                if is_gaussian:
+                    if kwargs is None:
+                        self.learners.append(learner_constructor(self.arms, mean, var))
+                    else:
+                        self.learners.append(learner_constructor(self.arms, mean, var, **kwargs))
                 else:
-                    self.learners.append(learner_constructor(self.arms, **kwargs))
+                    if kwargs is None:
+                        self.learners.append(learner_constructor(self.arms))
+                    else:
+                        self.learners.append(learner_constructor(self.arms, **kwargs))
 
-        if len(self.learners) > 0:
+        # change detectors of all the campaigns in one bank, updated once per day by update_observations
+        self.change_detection = None
+        if len(self.learners) > 0 and self.learners[0].cd_enabled:
+            detectors = self.learners[0].change_detection
+            self.change_detection = CUSUMBank(n_arms = len(self.arms),
+                                              samplesForRefPoint = detectors.samplesForRefPoint,
+                                              epsilon = detectors.epsilon,
+                                              detectionThreshold = detectors.detectionThreshold,
+                                              n_campaigns = n_campaigns)
+            for campaign, learner in enumerate(self.learners):
+                learner.change_detection = self.change_detection
+                learner.cd_campaign = campaign
+
+        if self.batched_learner is not None:
+            self.bandit_name = self.batched_learner.bandit_name
+            self.needs_boost = self.batched_learner.needs_boost
+
+        elif len(self.learners) > 0:
             self.bandit_name = self.learners[0].bandit_name
 
             self.needs_boost = self.learners[0].needs_boost
@@ -64,7 +101,66 @@ class CombWrapper:
 
     def pull_super_arm(self) -> np.array:
         """ Return an array budget with the suggested allocation of budgets """
+        rewards, budgets = self.__knapsack_problem()
+
+        k = Knapsack(rewards = rewards, budgets = budgets, compact = True)
+        k.solve()
+
+        if self.is_ucb:
+            # candidate allocations, one budget per campaign
+            if self.top_k is None:
+                allocs = k.get_allocations()[:, 1:]  # last row allocs
+            else:
+                _, allocs = k.get_top_k(self.top_k)
+
+            # update all the upper confidence bounds once, then compute cumulative ucb for each super arm
+            ucbs = []
+            for learner in self.learners:
+                learner.update_ucbs()
+                ucbs.append(learner.ucbs)
+
+            indexes = np.searchsorted(self.arms, allocs)  # [[0, 3, 5 , 10], ...]
+            cumulative_ucbs = np.sum(np.array(ucbs)[np.arange(len(self.learners)), indexes], axis = 1)
+
+            alloc = allocs[np.argmax(cumulative_ucbs)]
+        else:
+            arg_max = np.argmax(k.dp_table[-1])
+            alloc = k.get_allocation(arg_max)[1:]
+
+        # best allocation possible after combinatorial optimization problem
+        return self.__super_arm_from_allocation(alloc)
+
+    @staticmethod
+    def pull_super_arms(comb_wrappers: list) -> list:
+        """ Pull a super arm from every wrapper, solving in a single Knapsack.solve_batch call the knapsack problems
+            of the wrappers sharing the same budgets and number of campaigns. UCB wrappers need the whole last dp row,
+            so they are pulled one by one """
+        super_arms = [None for _ in range(len(comb_wrappers))]
+        batches = {}
+
+        for idx, comb_wrapper in enumerate(comb_wrappers):
+            if comb_wrapper.is_ucb:
+                super_arms[idx] = comb_wrapper.pull_super_arm()
+                continue
+
+            rewards, budgets = comb_wrapper.__knapsack_problem()
+            key = (rewards.shape, tuple(budgets))
+            batches.setdefault(key, []).append((idx, rewards, budgets))
+
+        for batch in batches.values():
+            _, allocs = Knapsack.solve_batch(rewards = np.array([rewards for _, rewards, _ in batch]),
+                                             budgets = batch[0][2])
+
+            for (idx, _, _), alloc in zip(batch, allocs):
+                super_arms[idx] = comb_wrappers[idx].__super_arm_from_allocation(alloc)
+
+        return super_arms
+
+    def __knapsack_problem(self):
+        """ Sample the learners and return the knapsack rewards and budgets of today's combinatorial problem """
         rewards = []
+        if self.batched_learner is not None:
+            _, rewards = self.batched_learner.pull_arm()
         for learner in self.learners:
             idx_max, all_samples = learner.pull_arm()
             knapsack_r = np.array(all_samples)  # don't remove allocation cost, let learner work with estimated profits
@@ -82,39 +178,15 @@ class CombWrapper:
             _min = np.min(r)
             if _min < 0:
                 r += _min*-1"""
-        padding_reward = 0 * np.ones((len(self.learners), len(padding_budgets)))
+        padding_reward = 0 * np.ones((len(rewards), len(padding_budgets)))
         rewards = np.concatenate([np.array(rewards), padding_reward], axis = 1)
 
-        k = Knapsack(rewards = np.array(rewards), budgets = budgets)
-        k.solve()
-
-        if self.is_ucb:
-            # update all the upper confidence bounds
-            # for learner in self.learners:
-            #    learner.update_ucbs()
-
-            # last row allocs
-            allocs = k.get_output()[1][-1]
-
-            # compute cumulative ucb for each super arm
-            cumulative_ucbs = np.zeros(len(self.arms))
-
-            for idxAlloc, alloc in enumerate(allocs):
-                indexes = self.__indexes_super_arm(super_arm = alloc)  # [0, 3, 5 , 10]
-                for learner, indexArm in zip(self.learners, indexes):
-                    learner.update_ucbs()
-                    cumulative_ucbs[idxAlloc] += learner.ucbs[indexArm]
-
-            arg_max = np.argmax(cumulative_ucbs)
-        else:
-            arg_max = np.argmax(k.get_output()[0][-1])
-
-        alloc = k.get_output()[1][-1][arg_max]
-
         self.last_knapsack_reward = rewards
-        # best allocation possible after combinatorial optimization problem
-        super_arms = alloc[1:]
 
+        return rewards, budgets
+
+    def __super_arm_from_allocation(self, super_arms):
+        """ Map the knapsack allocation (one budget per learner) to the super arm returned to the caller """
         if len(super_arms) > 5:
             # reshape superarms in case of multi campaign knapsack
             # knapsack output [c11,c12,c13,c21,c22,c23] -> [c11,c21, c12, c22. c13.c23]
@@ -128,15 +200,22 @@ class CombWrapper:
 
     def update_observations(self, super_arm, env_rewards, show_warning = False):
         index_arm = self.__indexes_super_arm(super_arm)
-        not_pulled = 0
+        if self.batched_learner is not None:
+            self.batched_learner.update(index_arm, np.array(env_rewards).flatten()[:len(index_arm)])
+        if self.change_detection is not None:
+            change_detected = self.change_detection.update(index_arm,
+                                                           np.array(env_rewards).flatten()[:len(self.learners)],
+                                                           np.arange(len(self.learners)))
         for i, learner in enumerate(self.learners):
             # if index_arm[i] != 0:   # TRY not update pulling of zero
             reward = np.array(env_rewards).flatten()[i]
-            learner.update(index_arm[i], reward)
-            if index_arm[i] == 0:
-                not_pulled += 1
+            if self.change_detection is not None:
+                learner.update(index_arm[i], reward, change_detected = change_detected[i])
+            else:
+                learner.update(index_arm[i], reward)
+        not_pulled = index_arm.count(0)
         if not_pulled > 0 and show_warning:
-            print(f"\n\033[93mWarning: {not_pulled}/{len(self.learners)} learners are not pulling arms")
+            print(f"\n\033[93mWarning: {not_pulled}/{len(index_arm)} learners are not pulling arms")
 
     def __indexes_super_arm(self, super_arm):
         """Given a super arm return the corresponding index for every learner
@@ -147,11 +226,26 @@ class CombWrapper:
         return indexes
 
     def reset(self):
+        if self.batched_learner is not None:
+            self.batched_learner.reset()
         for learner in self.learners:
             learner.reset()
 
+    def set_seed(self, seed):
+        """ Give every learner its own np.random.Generator, spawned from seed (an int or a np.random.SeedSequence) """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+
+        if self.batched_learner is not None:
+            self.batched_learner.set_rng(np.random.default_rng(seed))
+
+        for learner, learner_seed in zip(self.learners, seed.spawn(len(self.learners))):
+            learner.set_rng(np.random.default_rng(learner_seed))
+
     def get_gp_data(self):
-        if self.is_gaussian:
+        if self.is_gaussian and self.batched_learner is not None:
+            return list(self.batched_learner.means), list(self.batched_learner.sigmas)
+        elif self.is_gaussian:
             sigmas = []
             means = []
             for lrn in self.learners:
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from knapsack.Knapsack import Knapsack
+from learners.BatchedGPTS_Learner import BatchedGPTS_Learner
+from learners.CombWrapper import CombWrapper
+from learners.GPUCB1_Learner import GPUCB1_Learner
+from learners.GTS_Learner import GTS_Learner
+
+# one refit per update without random restarts, so that the GP learners do not use the global random state
+GP_KWARGS = {'hp_policy': {'refit_every': 1, 'n_restarts_optimizer': 0}}
+
+
+def trained_wrapper(learner_constructor, n_arms, max_budget, seed, days = 4, **kwargs) -> CombWrapper:
+    """ CombWrapper with its own seed, updated with the same random super arms and rewards for a given seed """
+    comb_wrapper = CombWrapper(learner_constructor, 5, n_arms, max_budget, is_gaussian = True, **kwargs)
+    comb_wrapper.set_seed(seed)
+    rng = np.random.default_rng(seed)
+
+    for _ in range(days):
+        super_arm = [comb_wrapper.arms[i] for i in rng.integers(len(comb_wrapper.arms), size = 5)]
+        comb_wrapper.update_observations(super_arm, rng.normal(50, 20, size = 5) + np.array(super_arm) / 2)
+
+    return comb_wrapper
+
+
+def get_wrappers() -> list:
+    # two grids of 16 arms over 300 sharing a batch, a grid of 10 arms, a grid over 200, a batched and a ucb learner
+    return [trained_wrapper(GTS_Learner, 16, 300, seed = 1),
+            trained_wrapper(GTS_Learner, 10, 300, seed = 2),
+            trained_wrapper(GTS_Learner, 16, 300, seed = 3),
+            trained_wrapper(GTS_Learner, 16, 200, seed = 4),
+            trained_wrapper(BatchedGPTS_Learner, 16, 300, seed = 5, kwargs = GP_KWARGS),
+            trained_wrapper(GPUCB1_Learner, 16, 300, seed = 6, is_ucb = True, kwargs = GP_KWARGS),
+            trained_wrapper(GTS_Learner, 10, 300, seed = 7)]
+
+
+def budget_loop_super_arm(comb_wrapper: CombWrapper) -> np.ndarray:
+    """ ucb super arm chosen as the loop over the allocations of every budget of the last dp row did, updating the
+        upper confidence bounds of every learner for every allocation """
+    rewards, budgets = comb_wrapper._CombWrapper__knapsack_problem()
+    k = Knapsack(rewards = rewards, budgets = budgets)
+    k.solve()
+
+    allocs = k.get_output()[1][-1]
+    cumulative_ucbs = np.zeros(len(allocs))
+    for idx_alloc, alloc in enumerate(allocs):
+        # the first element of an allocation is the empty row of the dp, learner i gets the budget of campaign i
+        for learner, budget in zip(comb_wrapper.learners, alloc[1:]):
+            learner.update_ucbs()
+            cumulative_ucbs[idx_alloc] += learner.ucbs[comb_wrapper.arms.index(budget)]
+
+    return allocs[np.argmax(cumulative_ucbs)][1:]
+
+
+class TestCombWrapper:
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def testUcbMatchesBudgetLoop(self, seed) -> None:
+        super_arm = trained_wrapper(GPUCB1_Learner, 16, 300, seed = seed, is_ucb = True, kwargs = GP_KWARGS).pull_super_arm()
+        expected = budget_loop_super_arm(trained_wrapper(GPUCB1_Learner, 16, 300, seed = seed, is_ucb = True,
+                                                         kwargs = GP_KWARGS))
+
+        assert np.array_equal(super_arm, expected)
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def testTopOneIsBestAllocation(self, seed) -> None:
+        kwargs = {'hp_policy': {'refit_every': None, 'n_restarts_optimizer': 0}}
+        top_one = trained_wrapper(GPUCB1_Learner, 8, 300, seed = seed, days = 0, is_ucb = True, top_k = 1, kwargs = kwargs)
+        best = trained_wrapper(GPUCB1_Learner, 8, 300, seed = seed, days = 0, is_ucb = False, kwargs = kwargs)
+
+        # high rewards on every arm, so that all the sampled rewards are non negative: negative rewards are
+        # infeasible budgets for the dp, which is then an exact maximum as the k-best one
+        rng = np.random.default_rng(seed)
+        for day in range(2 * len(top_one.arms)):
+            super_arm = [top_one.arms[(day + i) % len(top_one.arms)] for i in range(5)]
+            rewards = rng.normal(1000, 20, size = 5) + np.array(super_arm) / 2
+            top_one.update_observations(super_arm, rewards)
+            best.update_observations(super_arm, rewards)
+
+        # with k = 1 the only ucb candidate is the best allocation of the sampled rewards, the one chosen without ucb
+        super_arm = top_one.pull_super_arm()
+        assert np.all(top_one.last_knapsack_reward >= 0)
+        assert np.array_equal(super_arm, best.pull_super_arm())
+
+    def testTopKCandidates(self) -> None:
+        comb_wrapper = trained_wrapper(GPUCB1_Learner, 16, 300, seed = 4, is_ucb = True, top_k = 30, kwargs = GP_KWARGS)
+        super_arm = comb_wrapper.pull_super_arm()
+
+        # the chosen super arm is the best by ucb among the 30 best allocations of the same sampled rewards
+        _, allocs = Knapsack(rewards = comb_wrapper.last_knapsack_reward,
+                             budgets = np.array(comb_wrapper.arms)).get_top_k(30)
+        ucbs = [sum(learner.ucbs[comb_wrapper.arms.index(budget)] for learner, budget in zip(comb_wrapper.learners, alloc))
+                for alloc in allocs]
+        assert len(allocs) == 30
+        assert np.array_equal(super_arm, allocs[np.argmax(ucbs)])
+
+    def testPullSuperArmsMatchesSingle(self) -> None:
+        wrappers = get_wrappers()
+        expected = [comb_wrapper.pull_super_arm() for comb_wrapper in get_wrappers()]
+
+        super_arms = CombWrapper.pull_super_arms(wrappers)
+
+        assert len(super_arms) == len(expected)
+        for super_arm, expected_super_arm in zip(super_arms, expected):
+            assert np.array_equal(super_arm, expected_super_arm)
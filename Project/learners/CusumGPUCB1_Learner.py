@@ -1,7 +1,5 @@
 import numpy as np
-import warnings
-from sklearn.exceptions import ConvergenceWarning
-from entities.Utils import BanditNames
+from entities.Utils import BanditNames, get_rng
 from learners.GPUCB1_Learner import GPUCB1_Learner
 
 
@@ -14,48 +12,54 @@ class CusumGPUCB1Learner(GPUCB1_Learner):
                  epsilon = 0.05,
                  detectionThreshold = 20,
                  explorationAlpha = 0.01,
-                 delta = 0.1):
+                 delta = 0.1,
+                 hp_policy = None,
+                 grid_gp = False):
 
         cusum_args = {"samplesForRefPoint": samplesForRefPoint,
                         "epsilon":            epsilon,
                         "detectionThreshold": detectionThreshold,
                         "explorationAlpha":   explorationAlpha}
 
-        super().__init__(arms, prior_mean, prior_sigma = prior_sigma, delta = delta, cusum_args = cusum_args)
+        super().__init__(arms, prior_mean, prior_sigma = prior_sigma, delta = delta, cusum_args = cusum_args,
+                         hp_policy = hp_policy, grid_gp = grid_gp)
 
         self.bandit_name = BanditNames.CusumGPUCB1Learner.name
 
     # Same as gts_learner
     def pull_arm(self) -> np.array:
-        arms_value = np.random.normal(self.means, self.sigmas)
+        arms_value = get_rng(self.rng).normal(self.means, self.sigmas)
 
         """ Pull an arm and the set of value of all the arms"""
 
         """ With probability 1- alpha exploit,
             with probability alpha explore """
 
-        if np.random.binomial(1, 1 - self.explorationAlpha):
+        if get_rng(self.rng).binomial(1, 1 - self.explorationAlpha):
             idx = np.argmax(arms_value)
         else:
-            idx = np.random.choice(self.n_arms)
+            idx = get_rng(self.rng).choice(self.n_arms)
 
         return idx, arms_value
 
-    def update(self, pulled_arm, reward):
+    def update(self, pulled_arm, reward, change_detected = None):
+        """ change_detected: outcome of the detector of the pulled arm when already updated by the caller """
         self.t += 1
-        if self.change_detection[pulled_arm].update(reward):
+
+        if change_detected is None:
+            change_detected = self.change_detection.update(pulled_arm, reward, self.cd_campaign)[0]
+
+        if change_detected:
                 self.detections[pulled_arm].append(self.t)
-                self.valid_collected_rewards = []
-                self.pulled_arms = []
-                self.change_detection[pulled_arm].reset()
+                self.valid_observations.clear()
+                self.change_detection.reset(pulled_arm, self.cd_campaign)
 
         self.update_observations(pulled_arm, reward)
         self.update_model()
 
     def update_model(self):
-        x = np.atleast_2d(self.pulled_arms).T
-        y = self.valid_collected_rewards
-        warnings.simplefilter(action = 'ignore', category = ConvergenceWarning)
+        x = np.take(self.arms, self.valid_observations.pulled_arms)[:, None]
+        y = self.valid_observations.rewards
         self.gp.fit(x, y)  # TODO: y IS NOT NORMALIZED. DO IT MANUALLY IF NECESSARY
         self.means, self.sigmas = self.gp.predict(
                 np.atleast_2d(self.arms).T,
@@ -1,6 +1,6 @@
 from learners.GTS_Learner import GTS_Learner
 import numpy as np
-from entities.Utils import BanditNames
+from entities.Utils import BanditNames, get_rng
 
 class CusumGTSLearner(GTS_Learner):
 
@@ -18,32 +18,28 @@ class CusumGTSLearner(GTS_Learner):
                       "explorationAlpha":   explorationAlpha}
 
         super().__init__(arms, prior_mean = prior_mean, prior_sigma = prior_sigma, cusum_args = cusum_args)
-        self.window_collected_rewards_per_arm = [[] for _ in range(self.n_arms)]
+        # self.statistics only holds the rewards since the last detection
 
         self.bandit_name = BanditNames.CusumGTSLearner.name
 
     def pull_arm(self) -> np.array:
         """ Pull an arm and the set of value of all the arms"""
-        arms_value = np.random.normal(self.means, self.sigmas)
+        arms_value = get_rng(self.rng).normal(self.means, self.sigmas)
         idx = np.argmax(arms_value)
         return idx, arms_value
 
-    def update(self, pulled_arm, reward):
+    def update(self, pulled_arm, reward, change_detected = None):
+        """ change_detected: outcome of the detector of the pulled arm when already updated by the caller """
         self.t += 1
 
-        if self.change_detection[pulled_arm].update(reward):
+        if change_detected is None:
+            change_detected = self.change_detection.update(pulled_arm, reward, self.cd_campaign)[0]
+
+        if change_detected:
             self.detections[pulled_arm].append(self.t)
-            self.window_collected_rewards_per_arm = [[] for _ in range(self.n_arms)]
-            self.change_detection[pulled_arm].reset()
+            self.statistics.clear()
+            self.change_detection.reset(pulled_arm, self.cd_campaign)
 
         self.update_observations(pulled_arm, reward)
-        self.window_collected_rewards_per_arm[pulled_arm].append(reward)
-        self.means[pulled_arm] = np.mean(self.window_collected_rewards_per_arm[pulled_arm])  # update mean of pulled arm
-        n_samples = len(self.window_collected_rewards_per_arm[pulled_arm])
-
-        if n_samples > 1:  # update std of pulled arm
-            self.sigmas[pulled_arm] = np.std(self.window_collected_rewards_per_arm[pulled_arm]) / n_samples
-
-    def reset(self):
-        super(CusumGTSLearner, self).reset()
-        self.window_collected_rewards_per_arm = [[] for _ in range(self.n_arms)]
+        self.statistics.add(pulled_arm, reward)
+        self.update_arm(pulled_arm)
@@ -1,13 +1,12 @@
 import numpy as np
-import warnings
-from sklearn.exceptions import ConvergenceWarning
-from sklearn.gaussian_process import GaussianProcessRegressor
 from sklearn.gaussian_process.kernels import RBF, ConstantKernel as C
+from learners.IncrementalGP import DEFAULT_HP_POLICY, make_gp
 from learners.Learner import Learner
-from entities.Utils import BanditNames
+from entities.Utils import BanditNames, get_rng
 
 class GPTS_Learner(Learner):
-    def __init__(self, arms, n_campaigns, prior_mean, prior_sigma=1):  # arms are the budgets (e.g 0,10,20...)
+    def __init__(self, arms, n_campaigns, prior_mean, prior_sigma=1,
+                 hp_policy=None, grid_gp=False):  # arms are the budgets (e.g 0,10,20...)
         super().__init__(len(arms))
         self.n_arms = len(arms)
         self.arms = arms
@@ -15,7 +14,6 @@ class GPTS_Learner(Learner):
         self.prior_sigma = prior_sigma
         self.means = np.ones(self.n_arms) * prior_mean      # cannot be controlled directly
         self.sigmas = np.ones(self.n_arms) * prior_sigma    # cannot be controlled directly
-        self.pulled_arms = []
         self.bandit_name = BanditNames.GPTS_Learner.name
         self.needs_boost = True
 
@@ -25,19 +23,16 @@ class GPTS_Learner(Learner):
         kernel = C(theta, (1e-3, 1e3)) * RBF(l, (1e-3, 1e3))  # to be adjusted
         self.kernel = kernel
         self.alpha = alpha
-        self.gp = GaussianProcessRegressor(kernel=kernel,
-                                           alpha=alpha**2,
-                                           normalize_y=True,
-                                           n_restarts_optimizer=9)
+        self.hp_policy = dict(DEFAULT_HP_POLICY) if hp_policy is None else hp_policy
+        self.grid_gp = grid_gp
+        self.gp = self.__new_gp()
 
-    def update_observations(self, pulled_arm, reward):
-        super().update_observations(pulled_arm, reward)
-        self.pulled_arms.append(self.arms[pulled_arm])
+    def __new_gp(self):
+        return make_gp(self.arms, self.kernel, self.alpha**2, self.hp_policy, grid_gp=self.grid_gp, normalize_y=True)
 
     def update_model(self):
-        x = np.atleast_2d(self.pulled_arms).T
-        y = self.collected_rewards
-        warnings.simplefilter(action='ignore', category=ConvergenceWarning)
+        x = np.take(self.arms, self.observations.pulled_arms)[:, None]
+        y = self.observations.rewards
         self.gp.fit(x, y)
         self.means, self.sigmas = self.gp.predict(
             np.atleast_2d(self.arms).T,
@@ -50,7 +45,7 @@ class GPTS_Learner(Learner):
 
     def pull_arm(self) -> np.array:
         """ Pull an arm and the set of value of all the arms"""
-        arms_value = np.random.normal(self.means, self.sigmas)
+        arms_value = get_rng(self.rng).normal(self.means, self.sigmas)
         idx = np.argmax(arms_value)
         return idx, arms_value
 
@@ -60,9 +55,4 @@ class GPTS_Learner(Learner):
         self.means = np.ones(self.n_arms) * self.prior_mean
         self.sigmas = np.ones(self.n_arms) * self.prior_sigma
 
-        self.gp = GaussianProcessRegressor(kernel=self.kernel,
-                                           alpha=self.alpha ** 2,
-                                           normalize_y=True,
-                                           n_restarts_optimizer=9)
-
-        self.pulled_arms = []
+        self.gp = self.__new_gp()
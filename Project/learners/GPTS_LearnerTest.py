@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from sklearn.gaussian_process.kernels import ConstantKernel as C, RBF
+
+from learners.GPTS_Learner import GPTS_Learner
+from learners.GridGP import GridGP
+from learners.IncrementalGP import IncrementalGP
+
+
+def fixed_kernel_learner(arms, grid_gp) -> GPTS_Learner:
+    """ GPTS_Learner with fixed kernel hyperparameters, so that the GP over the whole data and the one over per-arm
+        statistics have the same posterior """
+    learner = GPTS_Learner(arms, 1, 10, hp_policy = {'refit_every': None, 'n_restarts_optimizer': 0},
+                           grid_gp = grid_gp)
+    learner.kernel = C(4.0, 'fixed') * RBF(60.0, 'fixed')
+    learner.reset()
+    learner.set_rng(np.random.default_rng(0))
+    return learner
+
+
+class TestGPTS_Learner:
+
+    @pytest.mark.parametrize("grid_gp, regressor", [(False, IncrementalGP), (True, GridGP)])
+    def testRegressor(self, grid_gp, regressor) -> None:
+        learner = GPTS_Learner(np.linspace(0, 300, 16), 1, 10, grid_gp = grid_gp)
+
+        assert isinstance(learner.gp, regressor)
+        assert learner.gp.normalize_y
+
+    def testGridGpSamePulls(self) -> None:
+        arms = np.linspace(0, 300, 16)
+        learners = [fixed_kernel_learner(arms, grid_gp = False), fixed_kernel_learner(arms, grid_gp = True)]
+        rng = np.random.default_rng(1)
+
+        # repeated pulls of the arms, as over the days of a simulation
+        for _ in range(60):
+            pulled = [learner.pull_arm() for learner in learners]
+            assert pulled[0][0] == pulled[1][0]
+            assert np.allclose(pulled[0][1], pulled[1][1], rtol = 0, atol = 1e-6)
+
+            arm = pulled[0][0] if rng.uniform() < 0.5 else rng.integers(len(arms))
+            reward = np.sin(arms[arm] / 60) * 10 + rng.normal()
+            for learner in learners:
+                learner.update(arm, reward)
+
+            assert np.allclose(learners[0].means, learners[1].means, rtol = 0, atol = 1e-8)
+            assert np.allclose(learners[0].sigmas, learners[1].sigmas, rtol = 0, atol = 1e-8)
@@ -1,22 +1,19 @@
 import numpy as np
-import warnings
-from sklearn.exceptions import ConvergenceWarning
-from sklearn.gaussian_process import GaussianProcessRegressor
 from sklearn.gaussian_process.kernels import RBF, ConstantKernel as C
-from entities.Utils import BanditNames
+from entities.Utils import BanditNames, get_rng
+from learners.IncrementalGP import DEFAULT_HP_POLICY, make_gp
 from learners.Learner import Learner
 
 
 class GPUCB1_Learner(Learner):
     def __init__(self, arms, prior_mean, prior_sigma = 1, delta = 0.1,
-                 cusum_args = None):  # arms are the budgets (e.g 0,10,20...)
+                 cusum_args = None, hp_policy = None, grid_gp = False):  # arms are the budgets (e.g 0,10,20...)
         super().__init__(n_arms = len(arms), cusum_args = cusum_args, needs_boost = True)
         self.n_arms = len(arms)
         self.arms = arms
         self.means = np.ones(self.n_arms) * prior_mean
         self.sigmas = np.ones(self.n_arms) * prior_sigma
         self.ucbs = np.ones(self.n_arms) * np.inf
-        self.pulled_arms = []
         self.prior_mean = prior_mean
         self.prior_sigma = prior_sigma
         self.bandit_name = BanditNames.GPUCB1_Learner.name
@@ -24,25 +21,20 @@ class GPUCB1_Learner(Learner):
         """controls beta parameter"""
         self.delta = delta
 
+        self.hp_policy = dict(DEFAULT_HP_POLICY) if hp_policy is None else hp_policy
+        self.grid_gp = grid_gp
+
+        self.gp = self.__new_gp()
+
+    def __new_gp(self):
         alpha = 0.5
         kernel = C(1.0, (1e-3, 1e3)) * RBF(1.0, (1e-3, 1e3))  # to be adjusted
-        self.gp = GaussianProcessRegressor(kernel = kernel,
-                                           alpha = alpha ** 2,
-                                           # normalize_y=True, #  TODO: SKLEARN NORMALIZATION DOES NOT WORK/I AM NOT
-                                           #                          USING IT RIGHT. NORMALIZE Y MANUALLY
-                                           n_restarts_optimizer = 9)
-
-    def update_observations(self, pulled_arm, reward):
-        super().update_observations(pulled_arm, reward)
-        self.pulled_arms.append(self.arms[pulled_arm])
-        """        if not self.pulled_arms.any():
-            self.pulled_arms = np.append(self.pulled_arms, gpucb1_super_arm)
-        else:
-            self.pulled_arms = np.append(np.atleast_2d(self.pulled_arms), np.atleast_2d(gpucb1_super_arm), axis=0)"""
+        # normalize_y=True, #  TODO: SKLEARN NORMALIZATION DOES NOT WORK/I AM NOT
+        #                          USING IT RIGHT. NORMALIZE Y MANUALLY
+        return make_gp(self.arms, kernel, alpha ** 2, self.hp_policy, grid_gp = self.grid_gp)
 
     def update_ucbs(self):
-        for armIdx in range(self.n_arms):
-            self.ucbs[armIdx] = self.compute_UCB(armIdx)
+        self.ucbs = self.compute_UCB(np.arange(self.n_arms))
 
     def compute_UCB(self, idx):
         if self.t == 0:
@@ -52,9 +44,8 @@ class GPUCB1_Learner(Learner):
         return self.means[idx] + self.sigmas[idx] * np.sqrt(beta)
 
     def update_model(self):
-        x = np.atleast_2d(self.pulled_arms).T
-        y = self.collected_rewards
-        warnings.simplefilter(action = 'ignore', category = ConvergenceWarning)
+        x = np.take(self.arms, self.observations.pulled_arms)[:, None]
+        y = self.observations.rewards
         self.gp.fit(x, y)  # TODO: y IS NOT NORMALIZED. DO IT MANUALLY IF NECESSARY
         self.means, self.sigmas = self.gp.predict(
                 np.atleast_2d(self.arms).T,
@@ -70,7 +61,7 @@ class GPUCB1_Learner(Learner):
     # Same as gts_learner
     def pull_arm(self) -> np.array:
         """ Pull an arm and the set of value of all the arms"""
-        arms_value = np.random.normal(self.means, self.sigmas)
+        arms_value = get_rng(self.rng).normal(self.means, self.sigmas)
         idx = np.argmax(arms_value)
         return idx, arms_value
 
@@ -79,12 +70,5 @@ class GPUCB1_Learner(Learner):
         self.means = np.ones(self.n_arms) * self.prior_mean
         self.sigmas = np.ones(self.n_arms) * self.prior_sigma
         self.ucbs = np.ones(self.n_arms) * np.inf
-        self.pulled_arms = []
 
-        alpha = 0.5
-        kernel = C(1.0, (1e-3, 1e3)) * RBF(1.0, (1e-3, 1e3))  # to be adjusted
-        self.gp = GaussianProcessRegressor(kernel = kernel,
-                                           alpha = alpha ** 2,
-                                           # normalize_y=True, #  TODO: SKLEARN NORMALIZATION DOES NOT WORK/I AM NOT
-                                           #                          USING IT RIGHT. NORMALIZE Y MANUALLY
-                                           n_restarts_optimizer = 9)
+        self.gp = self.__new_gp()
@@ -1,6 +1,7 @@
+from learners.ArmStatistics import ArmStatistics
 from learners.Learner import Learner
 import numpy as np
-from entities.Utils import BanditNames
+from entities.Utils import BanditNames, get_rng
 
 class GTS_Learner(Learner):
     """ every arms induces a gaussian distribution over its expected reward """
@@ -13,23 +14,38 @@ class GTS_Learner(Learner):
         self.prior_mean = prior_mean
         self.prior_sigma = prior_sigma
         self.bandit_name = BanditNames.GTS_Learner.name
+        self.statistics = ArmStatistics(self.n_arms)  # running mean and std of the rewards of every arm
 
     def pull_arm(self) -> np.array:
         """ Pull an arm and the set of value of all the arms"""
-        arms_value = np.random.normal(self.means, self.sigmas)
+        arms_value = get_rng(self.rng).normal(self.means, self.sigmas)
         idx = np.argmax(arms_value)
         return idx, arms_value
 
     def update(self, pulled_arm, reward):
         self.t += 1
         self.update_observations(pulled_arm, reward)
-        self.means[pulled_arm] = np.mean(self.rewards_per_arm[pulled_arm])  # update mean of pulled arm
-        n_samples = len(self.rewards_per_arm[pulled_arm])
+        self.statistics.add(pulled_arm, reward)
+        self.update_arm(pulled_arm)
+
+    def update_arm(self, pulled_arm):
+        """ Update mean and std of the pulled arm from its running statistics """
+        n_samples = self.statistics.counts[pulled_arm]
+        if n_samples == 0:  # every reward of the arm has been removed
+            self.means[pulled_arm] = self.prior_mean
+            self.sigmas[pulled_arm] = self.prior_sigma
+            return
+
+        self.means[pulled_arm] = self.statistics.means[pulled_arm]
 
         if n_samples > 1:  # update std of pulled arm
-            self.sigmas[pulled_arm] = np.std(self.rewards_per_arm[pulled_arm]) / n_samples
+            self.sigmas[pulled_arm] = self.statistics.std(pulled_arm) / n_samples
+        else:  # as an arm pulled once, also when the other rewards have been removed from a window
+            self.sigmas[pulled_arm] = self.prior_sigma
 
     def reset(self):
         super(GTS_Learner, self).reset()
         self.means = np.ones(self.n_arms) * self.prior_mean
         self.sigmas = np.ones(self.n_arms) * self.prior_sigma
+
+        self.statistics.clear()
@@ -0,0 +1,161 @@
+import warnings
+
+import numpy as np
+from scipy.linalg import cholesky, solve_triangular
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.gaussian_process import GaussianProcessRegressor
+
+
+class GridGP:
+    """
+    Gaussian process regressor for observations taken only at the points of a fixed grid (the arms), with the same
+    fit/predict interface and hyperparameter policy (refit_every, n_restarts_optimizer, lml_drift, warm_start) of
+    IncrementalGP.
+
+    The data are kept as per-arm count, sum and sum of squares: c noisy observations of an arm are equivalent to their
+    mean observed with noise alpha / c, so the posterior is computed over the pulled arms, B = I + S^1/2 K S^1/2 with
+    S = diag(c / alpha), and its cost depends on the number of arms and not on the number of observations.
+    The kernel matrix over the grid is computed once for every hyperparameter setting. Hyperparameters are optimised
+    by sklearn over the per-arm means, which have the same likelihood optimum of the whole data.
+    """
+
+    def __init__(self, arms, kernel, alpha = 1e-10, normalize_y = False, refit_every = 1, n_restarts_optimizer = 9,
+                 lml_drift = None, warm_start = False):
+        self.arms = np.array(arms, dtype = float)
+        self.regressor = GaussianProcessRegressor(kernel = kernel,
+                                                  alpha = alpha,
+                                                  n_restarts_optimizer = n_restarts_optimizer)
+        self.alpha = alpha
+        self.normalize_y = normalize_y
+        self.refit_every = refit_every
+        self.lml_drift = lml_drift
+        self.warm_start = warm_start
+        self.kernel_ = None  # hyperparameters found by the last refit
+        self.lml_ = None  # log marginal likelihood per observation of the data with the current hyperparameters
+        self.refit_lml_ = None  # same, at the last refit
+        self.n_fits = 0
+        self.n_refits = 0
+
+        # sufficient statistics of the observations of every arm
+        self.counts = np.zeros(len(self.arms))
+        self.sums = np.zeros(len(self.arms))
+        self.sumsqs = np.zeros(len(self.arms))
+
+        self.__K = None  # kernel matrix over the grid under kernel_
+        self.__pulled = None  # indexes of the arms with at least one observation
+        self.__s = None  # S^1/2 of the pulled arms
+        self.__L = None  # L L^T = B
+        self.__z = None  # L^-1 S^1/2 y of the pulled arms
+        self.__V = None  # L^-1 S^1/2 K(pulled, grid)
+        self.__means = None
+        self.__sigmas = None
+
+    def fit(self, X, y) -> 'GridGP':
+        x = np.array(X, dtype = float).reshape(-1)
+        y = np.array(y, dtype = float)
+        idx = np.searchsorted(self.arms, x)
+        if np.any(idx >= len(self.arms)) or np.any(self.arms[np.minimum(idx, len(self.arms) - 1)] != x):
+            raise Exception("GridGP can be fitted only with observations at the arms of the grid")
+
+        self.counts = np.bincount(idx, minlength = len(self.arms)).astype(float)
+        self.sums = np.bincount(idx, weights = y, minlength = len(self.arms))
+        self.sumsqs = np.bincount(idx, weights = y ** 2, minlength = len(self.arms))
+
+        scheduled = self.refit_every is not None and self.n_fits % self.refit_every == 0
+
+        if self.kernel_ is None or scheduled:
+            self.__refit()
+        else:
+            self.__factorize()
+            if self.lml_drift is not None and abs(self.lml_ - self.refit_lml_) > self.lml_drift:
+                self.__refit()
+
+        self.n_fits += 1
+
+        return self
+
+    def predict(self, X, return_std = False):
+        if self.kernel_ is None:
+            return self.regressor.predict(X, return_std = return_std)
+
+        x = np.array(X, dtype = float).reshape(-1)
+        y_mean, y_std = self.__normalization()
+
+        if np.array_equal(x, self.arms):
+            means, sigmas = self.__means, self.__sigmas
+        else:
+            V = solve_triangular(self.__L,
+                                 self.__s[:, None] * self.kernel_(self.arms[self.__pulled, None], x[:, None]),
+                                 lower = True)
+            means = V.T @ self.__z
+            sigmas = np.sqrt(np.maximum(self.kernel_.diag(x[:, None]) - np.sum(V ** 2, axis = 0), 0.0))
+
+        if not return_std:
+            return y_mean + y_std * means
+
+        return y_mean + y_std * means, y_std * sigmas
+
+    def __normalization(self):
+        """ Same normalization of sklearn: the posterior is the one of (y - mean) / std, scaled back """
+        n = np.sum(self.counts)
+        if not self.normalize_y or n == 0:
+            return 0.0, 1.0
+        y_mean = np.sum(self.sums) / n
+        y_std = np.sqrt(max(np.sum(self.sumsqs) / n - y_mean ** 2, 0.0))
+        return y_mean, y_std if y_std > 0 else 1.0
+
+    def __arm_means(self):
+        """ Pulled arms and their normalized mean observation """
+        y_mean, y_std = self.__normalization()
+        pulled = np.flatnonzero(self.counts)
+        return pulled, (self.sums[pulled] / self.counts[pulled] - y_mean) / y_std
+
+    def __refit(self) -> None:
+        if self.warm_start and self.kernel_ is not None:
+            # start the optimizer from the last hyperparameters, bounds are kept by the fitted kernel
+            self.regressor.kernel = self.kernel_
+            self.regressor.n_restarts_optimizer = 0
+
+        pulled, y_means = self.__arm_means()
+        self.regressor.alpha = self.alpha / self.counts[pulled]
+
+        warnings.simplefilter(action = 'ignore', category = ConvergenceWarning)
+        self.regressor.fit(self.arms[pulled, None], y_means)
+        self.kernel_ = self.regressor.kernel_
+        self.n_refits += 1
+        self.__K = self.kernel_(self.arms[:, None])
+
+        self.__factorize()
+        self.refit_lml_ = self.lml_
+
+    def __factorize(self) -> None:
+        pulled, y_means = self.__arm_means()
+        s = np.sqrt(self.counts[pulled] / self.alpha)
+
+        B = np.eye(len(pulled)) + s[:, None] * self.__K[np.ix_(pulled, pulled)] * s[None, :]
+        self.__L = cholesky(B, lower = True)
+        self.__z = solve_triangular(self.__L, s * y_means, lower = True)
+        self.__V = solve_triangular(self.__L, s[:, None] * self.__K[pulled], lower = True)
+        self.__pulled = pulled
+        self.__s = s
+
+        self.__means = self.__V.T @ self.__z
+        self.__sigmas = np.sqrt(np.maximum(np.diag(self.__K) - np.sum(self.__V ** 2, axis = 0), 0.0))
+        self.lml_ = self.__log_marginal_likelihood()
+
+    def __log_marginal_likelihood(self) -> float:
+        """ Log marginal likelihood per observation of all the (normalized) observations: the one of the per-arm means
+            plus the spread of the observations around the mean of their arm """
+        _, y_std = self.__normalization()
+        counts = self.counts[self.__pulled]
+        n = np.sum(counts)
+
+        # (K + S^-1)^-1 = S^1/2 B^-1 S^1/2, log |K + S^-1| = log |B| - log |S|
+        lml = -0.5 * self.__z @ self.__z - np.sum(np.log(np.diag(self.__L))) + np.sum(np.log(self.__s)) \
+            - len(counts) / 2 * np.log(2 * np.pi)
+
+        spread = (self.sumsqs[self.__pulled] - self.sums[self.__pulled] ** 2 / counts) / y_std ** 2
+        lml += np.sum(-(counts - 1) / 2 * np.log(2 * np.pi * self.alpha) - 0.5 * np.log(counts)
+                      - spread / (2 * self.alpha))
+
+        return lml / n
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel as C, RBF
+
+from learners.GridGP import GridGP
+
+
+class TestGridGP:
+
+    @pytest.mark.parametrize("normalize_y", [False, True])
+    @pytest.mark.parametrize("refit_every", [None, 7])
+    def testMatchesSklearn(self, normalize_y, refit_every) -> None:
+        arms = np.linspace(0, 300, 16)
+        rng = np.random.default_rng(2)
+        gp = GridGP(arms = arms, kernel = C(1.0, (1e-3, 1e3)) * RBF(1.0, (1e-3, 1e3)), alpha = 0.25,
+                    normalize_y = normalize_y, refit_every = refit_every, n_restarts_optimizer = 0)
+        X, y = [], []
+
+        # repeated observations of the arms, as the learners pulling them every day
+        for _ in range(50):
+            arm = arms[rng.integers(len(arms))]
+            X.append([arm])
+            y.append(np.sin(arm / 60) * 3 + rng.normal(scale = 0.5))
+
+            gp.fit(np.array(X), np.array(y))
+            means, sigmas = gp.predict(arms[:, None], return_std = True)
+
+            # whole data given to sklearn with the same hyperparameters
+            reference = GaussianProcessRegressor(kernel = gp.kernel_, alpha = gp.alpha, normalize_y = normalize_y,
+                                                 optimizer = None).fit(np.array(X), np.array(y))
+            reference_means, reference_sigmas = reference.predict(arms[:, None], return_std = True)
+
+            assert np.allclose(means, reference_means, rtol = 0, atol = 1e-9)
+            assert np.allclose(sigmas, reference_sigmas, rtol = 0, atol = 1e-9)
+            assert gp.lml_ == pytest.approx(reference.log_marginal_likelihood_value_ / len(y), abs = 1e-9)
+
+    def testOnlyGridObservations(self) -> None:
+        gp = GridGP(arms = [0, 10, 20], kernel = C(1.0) * RBF(1.0), alpha = 0.25)
+
+        with pytest.raises(Exception):
+            gp.fit([[5]], [1.0])
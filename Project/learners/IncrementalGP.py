@@ -0,0 +1,199 @@
+import warnings
+
+import numpy as np
+from scipy.linalg import cholesky, solve_triangular
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.gaussian_process import GaussianProcessRegressor
+
+from learners.GridGP import GridGP
+
+
+# legacy behaviour: hyperparameters optimised with 9 random restarts at every fit
+DEFAULT_HP_POLICY = {'refit_every': 1, 'n_restarts_optimizer': 9}
+
+
+class IncrementalGP:
+    """
+    Gaussian process regressor with the fit/predict interface of sklearn GaussianProcessRegressor, as used by the GP
+    learners: fit is called with the whole history after every observation and predict with the arms grid.
+
+    Kernel hyperparameters are optimised by sklearn every refit_every calls to fit (never if None) and whenever the
+    log marginal likelihood per observation under the current hyperparameters moves more than lml_drift away from
+    the value of the last refit. In between they are kept fixed and, when fit receives the previous history plus one
+    observation, the Cholesky factor of the kernel matrix is extended by one row in O(n^2) and the posterior over
+    the last predicted grid is updated in O(n * grid). When the oldest observation is also dropped (sliding window)
+    it is removed from the factor in O(n^2) as well.
+    With warm_start the optimisations after the first one start from the last hyperparameters found, with no random
+    restarts. With refit_every = 1 it gives the same predictions of the sklearn regressor.
+    """
+
+    def __init__(self, kernel, alpha = 1e-10, normalize_y = False, refit_every = 1, n_restarts_optimizer = 9,
+                 lml_drift = None, warm_start = False):
+        self.regressor = GaussianProcessRegressor(kernel = kernel,
+                                                  alpha = alpha,
+                                                  normalize_y = normalize_y,
+                                                  n_restarts_optimizer = n_restarts_optimizer)
+        self.alpha = alpha
+        self.normalize_y = normalize_y
+        self.refit_every = refit_every
+        self.lml_drift = lml_drift
+        self.warm_start = warm_start
+        self.kernel_ = None  # hyperparameters found by the last refit
+        self.lml_ = None  # log marginal likelihood per observation of the data with the current hyperparameters
+        self.refit_lml_ = None  # same, at the last refit
+        self.n_fits = 0
+        self.n_refits = 0
+
+        self.X = None
+        self.y = None
+        self.__from_regressor = False  # predictions given by the sklearn regressor fitted by the last refit
+
+        # L L^T = K(X, X) + alpha I, z_y = L^-1 y, z_1 = L^-1 1 and V = L^-1 K(X, grid)
+        self.__L = None
+        self.__z_y = None
+        self.__z_1 = None
+        self.__grid = None
+        self.__V = None
+
+    def fit(self, X, y) -> 'IncrementalGP':
+        X = np.atleast_2d(np.array(X, dtype = float))
+        y = np.array(y, dtype = float)
+
+        appended = self.X is not None and len(y) == len(self.y) + 1 and \
+            np.array_equal(X[:-1], self.X) and np.array_equal(y[:-1], self.y)
+        slid = self.X is not None and len(y) == len(self.y) > 1 and \
+            np.array_equal(X[:-1], self.X[1:]) and np.array_equal(y[:-1], self.y[1:])
+
+        scheduled = self.refit_every is not None and self.n_fits % self.refit_every == 0
+
+        if self.kernel_ is None or scheduled:
+            self.__refit(X, y)
+        else:
+            if appended and self.__L is not None:
+                self.__append(X[-1:], y[-1])
+            elif slid and self.__L is not None:
+                self.__remove_oldest()
+                self.__append(X[-1:], y[-1])
+            else:
+                self.__factorize(X, y)
+            self.lml_ = self.__log_marginal_likelihood(y)
+
+            if self.lml_drift is not None and abs(self.lml_ - self.refit_lml_) > self.lml_drift:
+                self.__refit(X, y)
+
+        self.n_fits += 1
+        self.X = X
+        self.y = y
+
+        return self
+
+    def predict(self, X, return_std = False):
+        if self.__from_regressor or self.kernel_ is None:
+            return self.regressor.predict(X, return_std = return_std)
+
+        X = np.atleast_2d(np.array(X, dtype = float))
+
+        if self.__grid is None or not np.array_equal(X, self.__grid):
+            self.__grid = X
+            self.__V = solve_triangular(self.__L, self.kernel_(self.X, X), lower = True)
+
+        y_mean, y_std = self.__normalization(self.y)
+        means = y_mean + self.__V.T @ (self.__z_y - y_mean * self.__z_1)
+
+        if not return_std:
+            return means
+
+        variances = self.kernel_.diag(X) - np.sum(self.__V ** 2, axis = 0)
+        variances = np.maximum(variances, 0.0)
+
+        return means, np.sqrt(variances) * y_std
+
+    def __normalization(self, y):
+        """ Same normalization of sklearn: the posterior is the one of (y - mean) / std, scaled back """
+        if not self.normalize_y:
+            return 0.0, 1.0
+        return np.mean(y), np.std(y) if np.std(y) > 0 else 1.0
+
+    def __log_marginal_likelihood(self, y) -> float:
+        """ Log marginal likelihood per observation of the (normalized) data, from the current factors """
+        y_mean, y_std = self.__normalization(y)
+        z = (self.__z_y - y_mean * self.__z_1) / y_std
+        lml = -0.5 * z @ z - np.sum(np.log(np.diag(self.__L))) - len(y) / 2 * np.log(2 * np.pi)
+        return lml / len(y)
+
+    def __refit(self, X, y) -> None:
+        if self.warm_start and self.kernel_ is not None:
+            # start the optimizer from the last hyperparameters, bounds are kept by the fitted kernel
+            self.regressor.kernel = self.kernel_
+            self.regressor.n_restarts_optimizer = 0
+
+        warnings.simplefilter(action = 'ignore', category = ConvergenceWarning)
+        self.regressor.fit(X, y)
+        self.kernel_ = self.regressor.kernel_
+        self.n_refits += 1
+        self.lml_ = self.refit_lml_ = self.regressor.log_marginal_likelihood_value_ / len(y)
+
+        # the regressor already holds the Cholesky factor under the new hyperparameters
+        self.__set_factors(self.regressor.L_.copy(), y)
+        self.__from_regressor = True
+
+    def __factorize(self, X, y) -> None:
+        K = self.kernel_(X) + self.alpha * np.eye(len(X))
+        self.__set_factors(cholesky(K, lower = True), y)
+
+    def __set_factors(self, L, y) -> None:
+        self.__L = L
+        self.__z_y = solve_triangular(L, y, lower = True)
+        self.__z_1 = solve_triangular(L, np.ones(len(y)), lower = True)
+        self.__V = None
+        self.__grid = None
+        self.__from_regressor = False
+
+    def __append(self, x, y) -> None:
+        """ Rank one extension of the factors with the observation (x, y) """
+        k = self.kernel_(self.X, x)[:, 0]
+        l = solve_triangular(self.__L, k, lower = True)
+        d = np.sqrt(max(self.kernel_(x)[0, 0] + self.alpha - l @ l, 1e-12))
+
+        n = len(self.__L)
+        L = np.zeros((n + 1, n + 1))
+        L[:n, :n] = self.__L
+        L[n, :n] = l
+        L[n, n] = d
+        self.__L = L
+
+        self.__z_y = np.append(self.__z_y, (y - l @ self.__z_y) / d)
+        self.__z_1 = np.append(self.__z_1, (1 - l @ self.__z_1) / d)
+
+        if self.__grid is not None:
+            v = (self.kernel_(x, self.__grid)[0] - l @ self.__V) / d
+            self.__V = np.vstack([self.__V, v])
+
+        self.__from_regressor = False
+
+    def __remove_oldest(self) -> None:
+        """ Remove the first observation from the factors: the Cholesky factor of the others is the trailing block
+            of the current one, updated with the rank one term of its first column """
+        L = self.__L[1:, 1:].copy()
+        v = self.__L[1:, 0].copy()
+
+        for k in range(len(v)):
+            r = np.hypot(L[k, k], v[k])
+            c = r / L[k, k]
+            s = v[k] / L[k, k]
+            L[k, k] = r
+            L[k + 1:, k] = (L[k + 1:, k] + s * v[k + 1:]) / c
+            v[k + 1:] = c * v[k + 1:] - s * L[k + 1:, k]
+
+        self.X = self.X[1:]
+        self.y = self.y[1:]
+        self.__set_factors(L, self.y)
+
+
+def make_gp(arms, kernel, alpha, hp_policy, grid_gp = False, normalize_y = False):
+    """ Regressor of the GP learners over the given arms: a GridGP over per-arm statistics, whose cost does not grow
+        with the observations, if grid_gp and an IncrementalGP otherwise. hp_policy holds the keyword arguments
+        of both that decide when the kernel hyperparameters are optimised """
+    if grid_gp:
+        return GridGP(arms = arms, kernel = kernel, alpha = alpha, normalize_y = normalize_y, **hp_policy)
+    return IncrementalGP(kernel = kernel, alpha = alpha, normalize_y = normalize_y, **hp_policy)
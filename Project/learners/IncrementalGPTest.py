@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel as C, RBF
+
+from learners.IncrementalGP import IncrementalGP
+
+
+def reference_regressor(gp: IncrementalGP, X, y) -> GaussianProcessRegressor:
+    """ sklearn regressor with the hyperparameters of the last refit of gp, not optimised again """
+    return GaussianProcessRegressor(kernel = gp.kernel_, alpha = gp.alpha, normalize_y = gp.normalize_y,
+                                    optimizer = None).fit(X, y)
+
+
+class TestIncrementalGP:
+
+    @pytest.mark.parametrize("normalize_y", [False, True])
+    @pytest.mark.parametrize("window", [None, 12])
+    def testUpdatesMatchSklearn(self, normalize_y, window) -> None:
+        arms = np.linspace(0, 300, 16)
+        rng = np.random.default_rng(0)
+        gp = IncrementalGP(kernel = C(1.0, (1e-3, 1e3)) * RBF(1.0, (1e-3, 1e3)), alpha = 0.25,
+                           normalize_y = normalize_y, refit_every = None, n_restarts_optimizer = 0)
+        X, y = [], []
+
+        for _ in range(35):
+            arm = arms[rng.integers(len(arms))]
+            X.append([arm])
+            y.append(np.sin(arm / 60) * 3 + rng.normal(scale = 0.5))
+
+            # one observation appended to the factors, and the oldest one removed once the window is full
+            X_fit, y_fit = np.array(X[-window:] if window else X), np.array(y[-window:] if window else y)
+            gp.fit(X_fit, y_fit)
+            means, sigmas = gp.predict(arms[:, None], return_std = True)
+
+            reference = reference_regressor(gp, X_fit, y_fit)
+            reference_means, reference_sigmas = reference.predict(arms[:, None], return_std = True)
+
+            assert np.allclose(means, reference_means, rtol = 0, atol = 1e-9)
+            assert np.allclose(sigmas, reference_sigmas, rtol = 0, atol = 1e-9)
+            assert gp.lml_ == pytest.approx(reference.log_marginal_likelihood_value_ / len(y_fit), abs = 1e-9)
+
+        assert gp.n_refits == 1
+
+    def testScheduledRefits(self) -> None:
+        rng = np.random.default_rng(1)
+        gp = IncrementalGP(kernel = C(1.0, (1e-3, 1e3)) * RBF(1.0, (1e-3, 1e3)), alpha = 0.25, refit_every = 4,
+                           n_restarts_optimizer = 0)
+        X = rng.uniform(0, 300, size = (10, 1))
+        y = np.sin(X[:, 0] / 60)
+
+        for n in range(1, 11):
+            gp.fit(X[:n], y[:n])
+
+        # fits 0, 4 and 8
+        assert gp.n_fits == 10 and gp.n_refits == 3
+
+    def testLmlDriftRefits(self) -> None:
+        rng = np.random.default_rng(2)
+        gp = IncrementalGP(kernel = C(1.0, (1e-3, 1e3)) * RBF(1.0, (1e-3, 1e3)), alpha = 0.25, refit_every = None,
+                           n_restarts_optimizer = 0, lml_drift = 0.5)
+        X = rng.uniform(0, 300, size = (40, 1))
+        # the function changes scale halfway, the hyperparameters of the first half do not explain it
+        y = np.sin(X[:, 0] / 60) + rng.normal(scale = 0.5, size = 40)
+        y[20:] *= 8
+        gp.fit(X[:1], y[:1])
+
+        for n in range(2, 41):
+            # log marginal likelihood per observation with the hyperparameters kept, against the one of the last refit
+            lml = reference_regressor(gp, X[:n], y[:n]).log_marginal_likelihood_value_ / n
+            drifted = abs(lml - gp.refit_lml_) > 0.5
+            refits = gp.n_refits
+            gp.fit(X[:n], y[:n])
+
+            assert gp.n_refits == refits + drifted
+            if drifted:
+                assert gp.lml_ == gp.refit_lml_
+            else:
+                assert gp.lml_ == pytest.approx(lml, abs = 1e-9)
+
+        assert gp.n_refits > 1
+
+    def testWarmStart(self) -> None:
+        np.random.seed(0)  # random restarts of the first refit
+        rng = np.random.default_rng(3)
+        gp = IncrementalGP(kernel = C(1.0, (1e-3, 1e3)) * RBF(1.0, (1e-3, 1e3)), alpha = 0.25, refit_every = 3,
+                           n_restarts_optimizer = 3, warm_start = True)
+        X = rng.uniform(0, 300, size = (12, 1))
+        y = np.sin(X[:, 0] / 60) * 3 + rng.normal(scale = 0.5, size = 12)
+
+        for n in range(1, 13):
+            kernel = gp.kernel_
+            gp.fit(X[:n], y[:n])
+
+            if n > 1 and (n - 1) % 3 == 0:
+                # the optimizer starts from the last hyperparameters found, with no random restarts
+                assert gp.regressor.kernel is kernel
+                assert gp.regressor.n_restarts_optimizer == 0
+                reference = GaussianProcessRegressor(kernel = kernel, alpha = 0.25, n_restarts_optimizer = 0)
+                reference.fit(X[:n], y[:n])
+                assert np.allclose(gp.kernel_.theta, reference.kernel_.theta)
+
+        assert gp.n_refits == 4
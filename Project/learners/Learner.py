@@ -1,42 +1,53 @@
 import numpy as np
-from learners.CUSUM import CUSUM
+from learners.CUSUM import CUSUMBank
+from learners.ObservationStore import ObservationStore
 
 
 class Learner:
     def __init__(self, n_arms, cusum_args = None, needs_boost = False):
         self.n_arms = n_arms
         self.t = 0  # current round variable
-        self.rewards_per_arm = [[] for _ in range(self.n_arms)]
-        self.collected_rewards = np.array([])
+        self.observations = ObservationStore()  # every (pulled arm, reward, t)
         self.cd_enabled = False
         self.bandit_name = 'Bandit'
         self.needs_boost = needs_boost
+        self.rng = None  # np.random.Generator used to pull arms, the numpy global random state when None
 
         if cusum_args:
             self.cd_enabled = True
             self.explorationAlpha = cusum_args['explorationAlpha']
-            self.valid_collected_rewards = np.array([])
+            self.valid_observations = ObservationStore()  # observations since the last change detection
             self.detections = [[] for _ in range(n_arms)]
 
             cusum_args = dict(cusum_args)  # avoiding modifying original dict
             del cusum_args['explorationAlpha']
-            self.change_detection = [CUSUM(**cusum_args) for _ in range(n_arms)]
+            # detectors of the arms, row cd_campaign of the bank (CombWrapper shares one bank among its learners)
+            self.change_detection = CUSUMBank(n_arms = n_arms, **cusum_args)
+            self.cd_campaign = 0
+
+    @property
+    def collected_rewards(self) -> np.ndarray:
+        return self.observations.rewards
+
+    @property
+    def valid_collected_rewards(self) -> np.ndarray:
+        return self.valid_observations.rewards
+
+    def set_rng(self, rng):
+        self.rng = rng
 
     def update_observations(self, pulled_arm, reward):
-        self.rewards_per_arm[pulled_arm].append(reward)
-        self.collected_rewards = np.append(self.collected_rewards, reward)  # optimizable
+        self.observations.append(pulled_arm, reward, self.t)
 
         if self.cd_enabled:
-            self.valid_collected_rewards = np.append(self.valid_collected_rewards, reward)  # optimizable
+            self.valid_observations.append(pulled_arm, reward, self.t)
 
     def reset(self):
         self.t = 0
-        self.rewards_per_arm = [[] for _ in range(self.n_arms)]
-        self.collected_rewards = np.array([])
+        self.observations.clear()
 
         if self.cd_enabled:
-            self.valid_collected_rewards = np.array([])
+            self.valid_observations.clear()
             self.detections = [[] for _ in range(self.n_arms)]
 
-            for cusum in self.change_detection:
-                cusum.reset()
\ No newline at end of file
+            self.change_detection.reset(campaigns = self.cd_campaign)
\ No newline at end of file
@@ -0,0 +1,95 @@
+import numpy as np
+
+
+class ObservationStore:
+    """
+    Observations of a learner (index of the pulled arm, reward, round t) kept in preallocated arrays, which double
+    their capacity when full. With a window only the last window observations are kept, in a ring of fixed capacity
+    where every append evicts the oldest observation once the ring is full.
+
+    pulled_arms, rewards and times are views over the stored observations, from the oldest, not copies: they are valid
+    until the next append or clear.
+
+    With a width every observation is made of width arms and rewards (one per campaign of a batched learner), stored
+    as rows of pulled_arms and rewards.
+    """
+
+    def __init__(self, capacity = 64, window = None, width = None):
+        self.window = window
+        self.width = width
+        self.capacity = capacity if window is None else window
+        # a ring writes every observation at i and at i + capacity, so that the stored ones are always a contiguous slice
+        length = self.capacity if window is None else 2 * self.capacity
+        shape = length if width is None else (length, width)
+        self.__arms = np.zeros(shape, dtype = int)
+        self.__rewards = np.zeros(shape)
+        self.__times = np.zeros(length, dtype = int)
+        self.start = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def pulled_arms(self) -> np.ndarray:
+        return self.__arms[self.start:self.start + self.size]
+
+    @property
+    def rewards(self) -> np.ndarray:
+        return self.__rewards[self.start:self.start + self.size]
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.__times[self.start:self.start + self.size]
+
+    def append(self, arm, reward, t):
+        """ Store an observation, return the one evicted from a full ring as (arm, reward, t), None otherwise """
+        if self.window is None:
+            if self.size == self.capacity:
+                self.__grow()
+            self.__write(self.size, arm, reward, t)
+            self.size += 1
+            return None
+
+        evicted = None
+        if self.size == self.capacity:
+            evicted = self.pop_oldest()
+
+        self.__write((self.start + self.size) % self.capacity, arm, reward, t)
+        self.size += 1
+
+        return evicted
+
+    def pop_oldest(self):
+        """ Remove the oldest observation of a ring and return it as (arm, reward, t) """
+        if self.window is None or self.size == 0:
+            raise Exception("Only windowed observation stores with observations can evict them")
+
+        if self.width is None:
+            oldest = (int(self.__arms[self.start]), float(self.__rewards[self.start]), int(self.__times[self.start]))
+        else:
+            oldest = (self.__arms[self.start].copy(), self.__rewards[self.start].copy(), int(self.__times[self.start]))
+        self.start = (self.start + 1) % self.capacity
+        self.size -= 1
+
+        return oldest
+
+    def clear(self):
+        self.start = 0
+        self.size = 0
+
+    def __write(self, i, arm, reward, t):
+        self.__arms[i] = arm
+        self.__rewards[i] = reward
+        self.__times[i] = t
+
+        if self.window is not None:
+            self.__arms[i + self.capacity] = arm
+            self.__rewards[i + self.capacity] = reward
+            self.__times[i + self.capacity] = t
+
+    def __grow(self):
+        self.capacity *= 2
+        self.__arms = np.concatenate([self.__arms, np.zeros_like(self.__arms)])
+        self.__rewards = np.concatenate([self.__rewards, np.zeros_like(self.__rewards)])
+        self.__times = np.concatenate([self.__times, np.zeros_like(self.__times)])
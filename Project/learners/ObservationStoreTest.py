@@ -0,0 +1,66 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from learners.ObservationStore import ObservationStore
+
+
+class TestObservationStore:
+
+    def testGrowth(self) -> None:
+        store = ObservationStore(capacity = 2)
+        capacities = []
+
+        for t in range(9):
+            store.append(t % 4, t / 2, t)
+            capacities.append(store.capacity)
+
+        # the capacity doubles when the arrays are full, the observations are kept in order
+        assert capacities == [2, 2, 4, 4, 8, 8, 8, 8, 16]
+        assert len(store) == 9
+        assert np.array_equal(store.pulled_arms, [t % 4 for t in range(9)])
+        assert np.array_equal(store.rewards, [t / 2 for t in range(9)])
+        assert np.array_equal(store.times, np.arange(9))
+
+        store.clear()
+        store.append(3, 1.5, 10)
+        assert len(store) == 1 and store.pulled_arms[0] == 3 and store.capacity == 16
+
+    @pytest.mark.parametrize("window", [1, 3, 4])
+    def testRingWraparound(self, window) -> None:
+        store = ObservationStore(window = window)
+        expected = deque()
+
+        for t in range(3 * window + 2):
+            evicted = store.append(t % 5, t * 1.5, t)
+
+            expected.append((t % 5, t * 1.5, t))
+            oldest = expected.popleft() if len(expected) > window else None
+
+            # the evicted observation is the oldest one, the others are a contiguous slice from the oldest
+            assert evicted == oldest
+            assert store.capacity == window
+            assert np.array_equal(store.pulled_arms, [arm for arm, _, _ in expected])
+            assert np.array_equal(store.rewards, [reward for _, reward, _ in expected])
+            assert np.array_equal(store.times, [t for _, _, t in expected])
+
+        assert store.pop_oldest() == expected.popleft()
+        assert len(store) == window - 1
+
+    def testWidth(self) -> None:
+        store = ObservationStore(capacity = 1, window = None, width = 3)
+
+        for t in range(5):
+            store.append(np.arange(3) + t, np.full(3, t / 4), t)
+
+        assert store.pulled_arms.shape == (5, 3)
+        assert np.array_equal(store.pulled_arms[:, 0], np.arange(5))
+        assert np.array_equal(store.rewards[-1], np.full(3, 1.0))
+
+        ring = ObservationStore(window = 2, width = 2)
+        for t in range(3):
+            evicted = ring.append(np.array([t, t + 1]), np.array([t, -t]), t)
+
+        assert np.array_equal(evicted[0], [0, 1]) and np.array_equal(evicted[1], [0, 0]) and evicted[2] == 0
+        assert np.array_equal(ring.pulled_arms, [[1, 2], [2, 3]])
@@ -1,4 +1,5 @@
 import numpy as np
+from entities.Utils import get_rng
 
 
 class OfflineWeightsLearner:
@@ -6,7 +7,7 @@ class OfflineWeightsLearner:
     # the estimation of the probability can be computed node by node independently , so we need just the targetNodes
 
     @staticmethod
-    def __generateEpisodesDataset(numOfEpisodes: int, probabilitiesMatrix):# -> list[list[np.ndarray]]:
+    def __generateEpisodesDataset(numOfEpisodes: int, probabilitiesMatrix, rng = None):# -> list[list[np.ndarray]]:
 
         def simulateEpisode(initialProbabilitiesMatrix: np.ndarray, numOfMaxSteps):# -> list[np.ndarray]:
             probabilitiesMatrix = initialProbabilitiesMatrix.copy()
@@ -15,7 +16,7 @@ class OfflineWeightsLearner:
             # active nodes at time 0 are chosen by drawing them from a binomial distribution with parameters 1, 0.1. it returns
             # an array of len numOfNodes, with values 0 or 1.
 
-            initialActiveNodes = np.random.binomial(1, 0.5, size = numOfNodes)
+            initialActiveNodes = get_rng(rng).binomial(1, 0.5, size = numOfNodes)
 
             # the dataset to exploit to estimate probabilities,
             # whose first row is the initial active nodes just found
@@ -37,8 +38,8 @@ class OfflineWeightsLearner:
                 # is from 0 and 1, and then compare this value with the probability of the corresponding edge: if the value of this drawn
                 # probability is bigger than the value of the probability associated with the edge, then the edge is activated.
                 # activatedEdges is a matrix of False and True values
-                activatedEdges = p > np.random.rand(p.shape[0],
-                                                    p.shape[1])  # one value for each edge of the active nodes!
+                activatedEdges = p > get_rng(rng).random((p.shape[0],
+                                                          p.shape[1]))  # one value for each edge of the active nodes!
                 # it is a boolean matrix of dim NxN, where eventually the rows of the active nodes have True values if edge is activated
 
                 # we remove from the probability matrix all the values of the probabilities related to the previously activated
@@ -68,10 +69,12 @@ class OfflineWeightsLearner:
     def estimateProbabilities(probabilitiesMatrix,
                               targetNodes,
                               numberOfNodes,
-                              numOfEpisodes) -> np.ndarray:
+                              numOfEpisodes,
+                              rng = None) -> np.ndarray:
 
         datasetOfDiffusionEpisodes = OfflineWeightsLearner.__generateEpisodesDataset(numOfEpisodes = numOfEpisodes,
-                                                                                     probabilitiesMatrix = probabilitiesMatrix)
+                                                                                     probabilitiesMatrix = probabilitiesMatrix,
+                                                                                     rng = rng)
 
         estimatedProbs = np.empty((len(targetNodes), numberOfNodes))
 
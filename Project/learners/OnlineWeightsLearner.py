@@ -1,10 +1,15 @@
-import math
+import heapq
 
 import numpy as np
 import matplotlib.pyplot as plt
 
 from entities.Graph import Graph
 from entities.LearnableGraph import LearnableGraph
+from entities.Utils import get_rng
+from learners.RRSets import RRSets
+
+# random numbers drawn at once for a batch of Monte Carlo repetitions, bounds the memory of __sample_live_edges
+MONTE_CARLO_BATCH_ELEMENTS = 2 ** 22
 
 
 class OnlineWeightsLearner:
@@ -14,33 +19,21 @@ class OnlineWeightsLearner:
     def get_total_error(graph1: Graph, graph2: Graph):
         if graph1.n_nodes == graph2.n_nodes:
 
-            adj_matrix_1 = graph1.get_adjacency_matrix()
-            adj_matrix_2 = graph2.get_adjacency_matrix()
+            adj_matrix_1 = graph1.adjacency
+            adj_matrix_2 = graph2.adjacency
 
-            error = 0
-            total_edges = 0
-            for i in range(graph1.n_nodes):
-                for j in range(graph2.n_nodes):
-                    if not math.isclose(adj_matrix_1[i][j], 0.0):
-                        total_edges += 1
-                        error += abs(adj_matrix_1[i][j] - adj_matrix_2[i][j])
-            return error / total_edges
+            edges = adj_matrix_1 != 0.0
+            return np.sum(np.abs(adj_matrix_1[edges] - adj_matrix_2[edges])) / np.count_nonzero(edges)
 
     @staticmethod
-    def __influence_episode(graph: LearnableGraph, seeds, true_graph: Graph):
-        binomial_matrix = np.zeros([graph.n_nodes, graph.n_nodes], dtype = np.float16)
-
-        candidates = graph.get_not_dangling_nodes()  # gets the coordinates of nodes having out-degree > 0
-
-        # generate a live edge graph and keep track of active edges with bionomial_matrix
-        for candidate in candidates:  # each candidate is a node having out degree > 0
-            neighbours = graph.get_neighbours(node = candidate)
-            for neighbour in neighbours:
-                true_probability = true_graph.get_weight(candidate, neighbour, fromId = True)
-                reward = np.random.binomial(1, true_probability)
-                binomial_matrix[candidate.id - 1][neighbour.id - 1] = reward
+    def __influence_episode(graph: LearnableGraph, seeds, true_graph: Graph, rng = None):
+        # generate a live edge graph, drawing every edge of graph with its true probability (same nodes indexes)
+        live_edges = np.zeros([graph.n_nodes, graph.n_nodes], dtype = bool)
+        live_edges[graph.edges] = get_rng(rng).binomial(1, true_graph.adjacency[graph.edges]) > 0
 
-        live_edges = binomial_matrix > 0
+        # outcomes of the edges during the episode, given to the beta posteriors at the end
+        activations = np.zeros([graph.n_nodes, graph.n_nodes], dtype = int)
+        failures = np.zeros([graph.n_nodes, graph.n_nodes], dtype = int)
 
         activated = []
         new_activated = seeds
@@ -49,90 +42,143 @@ class OnlineWeightsLearner:
             activated = new_activated + activated
             new_activated = []
             for active in activated:  # initially just the seed node is activated
+                i = graph.get_node_index(active)
                 for neighbour in graph.get_neighbours(node = active):
-                    if live_edges[active.id - 1][neighbour.id - 1] and not (
+                    j = graph.get_node_index(neighbour)
+                    if live_edges[i, j] and not (
                             neighbour in new_activated or neighbour in activated):  # active edges must be considered just once
-                        graph.update_beta_values(src = active, dest = neighbour,
-                                                 param = 'alpha')  # if the edge activating corresponds to the one with a seed, update beta
+                        activations[i, j] += 1  # if the edge activating corresponds to the one with a seed, update beta
                         new_activated.append(neighbour)
                     else:
                         if not (neighbour in new_activated or neighbour in activated):
-                            graph.update_beta_values(src = active, dest = neighbour, param = 'beta')
+                            failures[i, j] += 1
+
+        graph.update_betas(activations = activations, failures = failures)
 
         return len(activated) - len(seeds)
 
     @staticmethod
-    def __monte_carlo_spread(graph: LearnableGraph, seeds, max_repetitions):
-
-        nodes_activation_probabilities = np.zeros(graph.n_nodes, dtype = np.float16)
-
-        for _ in range(max_repetitions):
-
-            # np.random.rand generates a matrix of random (0, 1) numbers!
-            # We want a live_edges to work with
-            live_edges = graph.get_adjacency_matrix() > np.random.rand(graph.n_nodes,
-                                                                       graph.n_nodes)  # generate live-edge graph
-
-            activated = []
-            new_activated = seeds
-            while new_activated:
-                activated = new_activated + activated
-                new_activated = []  # keeps track of newly activated nodes, to know when to stop exploration.
-
-                for active in activated:  # initially just the seed is activated
-
-                    for neighbour in graph.get_neighbours(node = active):  # consider the nodes of the active edges
-
-                        # if the edge is active and the dest node has not been already considered, increment counter
-                        if live_edges[active.id - 1][neighbour.id - 1] and not (
-                                neighbour in new_activated or neighbour in activated):
-                            nodes_activation_probabilities[neighbour.id - 1] += 1
-                            new_activated.append(neighbour)
-
-        nodes_activation_probabilities = nodes_activation_probabilities / max_repetitions
-
-        return np.mean(nodes_activation_probabilities)  # measures the magnitude of the spread
+    def __sample_live_edges(graph: LearnableGraph, repetitions, rng = None):
+        """ Draw the live-edge graphs of repetitions independent cascades, in batches of at most
+            MONTE_CARLO_BATCH_ELEMENTS random numbers. The cascades are stacked as one graph of repetitions * n nodes,
+            where the node r * n + u is the node u in the cascade r, returned in CSR form as (indptr, targets) """
+        n_nodes = graph.n_nodes
+        sources, targets = np.nonzero(graph.adjacency)
+        probabilities = graph.adjacency[sources, targets]
+        batch_size = max(1, MONTE_CARLO_BATCH_ELEMENTS // max(1, len(sources)))
+
+        live_sources = []
+        live_targets = []
+        for start in range(0, repetitions, batch_size):
+            # one random (0, 1) number per edge of every cascade of the batch
+            live = get_rng(rng).random((min(batch_size, repetitions - start), len(sources))) < probabilities
+            cascades, edges = np.nonzero(live)
+            live_sources.append((start + cascades) * n_nodes + sources[edges])
+            live_targets.append((start + cascades) * n_nodes + targets[edges])
+
+        # nonzero is row major and the edges are sorted by source, so the stacked sources are sorted too
+        live_sources = np.concatenate(live_sources)
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(live_sources, minlength = repetitions * n_nodes))])
+
+        return indptr, np.concatenate(live_targets)
 
     @staticmethod
-    def __choose_seeds_from_sampling(graph: LearnableGraph, monte_carlo_repetitions):
-        candidates = graph.get_not_dangling_nodes()  # gets the coordinates of nodes having out-degree > 0
+    def __propagate(live_edges, reached, frontier) -> np.ndarray:
+        """ Frontier propagation on the stacked live-edge graphs of several seed sets at once: reached is the flat mask
+            of the reached nodes of the sets (set * stacked nodes + stacked node), frontier the newly reached keys.
+            reached is updated in place and returned """
+        indptr, targets = live_edges
+        n_stacked = len(indptr) - 1
 
-        # Retrieve for each of them alpha and beta, compute the deviation and update probability
-        for candidate in candidates:  # each candidate is a node having out degree > 0
-            neighbours = graph.get_neighbours(node = candidate)
+        while len(frontier) > 0:
+            sets, nodes = frontier // n_stacked, frontier % n_stacked
+            degrees = indptr[nodes + 1] - indptr[nodes]
+            offsets = np.arange(np.sum(degrees)) - np.repeat(np.cumsum(degrees) - degrees, degrees)
+            keys = np.repeat(sets, degrees) * n_stacked + targets[np.repeat(indptr[nodes], degrees) + offsets]
 
-            for neighbour in neighbours:
-                # update probability given a new Beta sample
-                alpha, beta, _ = graph.get_beta_parameters(src = candidate, dest = neighbour)
-                sample = np.random.beta(a = alpha, b = beta)
-                graph.set_weight(src = candidate, dest = neighbour, weight = sample)
+            keys = np.sort(keys[~reached[keys]])
+            frontier = keys[np.concatenate([[True], keys[1:] != keys[:-1]])] if len(keys) > 0 else keys
+            reached[frontier] = True
 
-        seeds = OnlineWeightsLearner.__monte_carlo_sampling(graph, monte_carlo_repetitions)
-
-        return seeds
-
-    # The function returns the best possible seed (the one maximizing the influence) given a certain graph
+        return reached
 
     @staticmethod
-    def __monte_carlo_sampling(graph, monte_carlo_repetitions):
-        spreads = []
-        best_node = None
-        nodes = graph.get_all_nodes()
-        best_spread = 0
-
-        for node in nodes:  # evaluate the spread of each node as a seed
-            spread = OnlineWeightsLearner.__monte_carlo_spread(graph = graph, seeds = [node],
-                                                               max_repetitions = monte_carlo_repetitions)
-            if spread > best_spread:
-                best_spread = spread
-                best_node = node
+    def __celf_seeds(graph: LearnableGraph, n_seeds, monte_carlo_repetitions, rng = None):
+        """ CELF lazy greedy selection of the n_seeds seeds maximising the spread (the mean activation probability of
+            the nodes which are not seeds), estimated on the same live-edge graphs for all the candidates. The spread is
+            submodular, so the marginal gain of a candidate can only decrease as seeds are added: candidates are kept
+            in a heap by their last gain, which is recomputed only when the candidate reaches the top.
+            Return the indexes of the seeds and their spread """
+        n_nodes = graph.n_nodes
+        n_seeds = min(n_seeds, n_nodes)
+        live_edges = OnlineWeightsLearner.__sample_live_edges(graph, monte_carlo_repetitions, rng = rng)
+        n_stacked = monte_carlo_repetitions * n_nodes
+        cascades = np.arange(monte_carlo_repetitions) * n_nodes
+
+        # nodes reached by every single seed in all the cascades, one set per node, for batches of nodes whose reached
+        # masks fit in MONTE_CARLO_BATCH_ELEMENTS
+        reached_counts = np.zeros(n_nodes, dtype = int)
+        batch_size = max(1, MONTE_CARLO_BATCH_ELEMENTS // n_stacked)
+        for start in range(0, n_nodes, batch_size):
+            nodes = np.arange(start, min(start + batch_size, n_nodes))
+            starts = ((nodes - start)[:, None] * n_stacked + nodes[:, None] + cascades).ravel()
+            reached = np.zeros(len(nodes) * n_stacked, dtype = bool)
+            reached[starts] = True
+            reached = OnlineWeightsLearner.__propagate(live_edges, reached, starts)
+            reached_counts[nodes] = np.count_nonzero(reached.reshape(len(nodes), n_stacked), axis = 1)
+
+        # (- marginal gain, node index, number of seeds when the gain was computed), ties go to the first node
+        gains = (reached_counts / monte_carlo_repetitions - 1) / n_nodes
+        heap = [(-gain, v, 0) for v, gain in enumerate(gains)]
+        heapq.heapify(heap)
+
+        # stacked nodes activated by the seeds in the cascades
+        seeds = []
+        spread = 0.0
+        seeds_reached = np.zeros(n_stacked, dtype = bool)
+
+        while len(seeds) < n_seeds:
+            neg_gain, v, computed_at = heapq.heappop(heap)
+
+            # nodes reached by the seeds and v, starting from v in the cascades where it is not active yet
+            frontier = (cascades + v)[~seeds_reached[cascades + v]]
+            reached = seeds_reached.copy()
+            reached[frontier] = True
+            reached = OnlineWeightsLearner.__propagate(live_edges, reached, frontier)
+
+            if computed_at == len(seeds):  # up to date gain, no other candidate can do better
+                seeds.append(v)
+                spread -= neg_gain
+                seeds_reached = reached
+                continue
+
+            # v stops counting as activated once it is a seed
+            new_reached = np.count_nonzero(reached) - np.count_nonzero(seeds_reached)
+            gain = (new_reached / monte_carlo_repetitions - 1) / n_nodes
+            heapq.heappush(heap, (-gain, v, len(seeds)))
+
+        return seeds, spread
 
-            spreads.append(best_spread)
+    @staticmethod
+    def __choose_seeds_from_sampling(graph: LearnableGraph, monte_carlo_repetitions, n_seeds = 1, n_rr_sets = None,
+                                     rng = None):
+        # Thompson sampling: draw every edge probability from its Beta posterior at once
+        graph.sample_weights(rng = rng)
+
+        if n_rr_sets is None:
+            seeds, _ = OnlineWeightsLearner.__celf_seeds(graph, n_seeds, monte_carlo_repetitions, rng = rng)
+            seeds = [graph.node_list[v] for v in seeds]
+        else:
+            rr_sets = RRSets(graph, n_rr_sets, rng = rng)
+            seeds = [graph.node_list[v] for v in rr_sets.select_seeds(n_seeds)]
 
-        return [best_node]
+        return seeds
 
     @staticmethod
-    def estimate_weights(true_graph: Graph, simulations, monte_carlo_repetitions, silent=True):
+    def estimate_weights(true_graph: Graph, simulations, monte_carlo_repetitions, silent=True, rng = None, n_seeds = 1,
+                         n_rr_sets = None):
+        """ With n_rr_sets the seeds of every round are chosen on that many reverse reachable sets (see RRSets),
+            instead of forward Monte Carlo with monte_carlo_repetitions cascades """
         # Copy the original graph and convert to a learnable one -> all weights are initially set to 0.5
         graph = LearnableGraph(g = true_graph)
 
@@ -151,10 +197,14 @@ class OnlineWeightsLearner:
                 print("Iteration: " + str(r + 1) + "/" + str(simulations), end = "")
             # epsilon = (1 - r / monte_carlo_repetitions) ** 2
             seeds = OnlineWeightsLearner.__choose_seeds_from_sampling(graph = graph,
-                                                                      monte_carlo_repetitions = monte_carlo_repetitions)
+                                                                      monte_carlo_repetitions = monte_carlo_repetitions,
+                                                                      n_seeds = n_seeds,
+                                                                      n_rr_sets = n_rr_sets,
+                                                                      rng = rng)
             OnlineWeightsLearner.__influence_episode(graph = graph,
                                                      seeds = seeds,
-                                                     true_graph = true_graph)
+                                                     true_graph = true_graph,
+                                                     rng = rng)
 
             error = OnlineWeightsLearner.get_total_error(graph, true_graph)
             total_error += error
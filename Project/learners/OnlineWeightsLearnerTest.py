@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import entities.Utils as util
+import learners.OnlineWeightsLearner
+from entities.Product import Product
+from learners.OnlineWeightsLearner import OnlineWeightsLearner
+
+sample_live_edges = OnlineWeightsLearner._OnlineWeightsLearner__sample_live_edges
+celf_seeds = OnlineWeightsLearner._OnlineWeightsLearner__celf_seeds
+
+
+def greedy_seeds(live_edges, n_nodes, repetitions, n_seeds):
+    """ Plain greedy on the stacked live-edge graphs, every candidate evaluated with a depth first visit """
+    indptr, targets = live_edges
+
+    def spread(seeds):
+        activated = 0
+        for r in range(repetitions):
+            visited = {r * n_nodes + seed for seed in seeds}
+            stack = list(visited)
+            while stack:
+                node = stack.pop()
+                for child in targets[indptr[node]:indptr[node + 1]]:
+                    if child not in visited:
+                        visited.add(child)
+                        stack.append(child)
+            activated += len(visited) - len(seeds)
+        return activated / repetitions / n_nodes
+
+    seeds = []
+    for _ in range(n_seeds):
+        spreads = [spread(seeds + [v]) if v not in seeds else -np.inf for v in range(n_nodes)]
+        seeds.append(int(np.argmax(spreads)))
+
+    return seeds, spread(seeds)
+
+
+class TestOnlineWeightsLearner:
+
+    @pytest.mark.parametrize("n_nodes, n_seeds", [(5, 1), (5, 3), (8, 8), (30, 4)])
+    def testCelfMatchesGreedy(self, n_nodes, n_seeds) -> None:
+        products = [Product(i + 1, 10) for i in range(n_nodes)]
+        graph_rng = np.random.default_rng(0)
+        if n_nodes <= 8:
+            graph = util.random_fully_connected_graph(products = products, rng = graph_rng)
+        else:
+            graph = util.get_ecommerce_graph(products = products, rng = graph_rng)
+        repetitions = 60
+
+        seeds, spread = celf_seeds(graph, n_seeds, repetitions, rng = np.random.default_rng(4))
+
+        # same generator seed, same live-edge graphs
+        live_edges = sample_live_edges(graph, repetitions, rng = np.random.default_rng(4))
+        greedy, greedy_spread = greedy_seeds(live_edges, n_nodes, repetitions, n_seeds)
+
+        assert seeds == greedy
+        assert spread == pytest.approx(greedy_spread, abs = 1e-12)
+
+    def testLiveEdgesBatches(self, monkeypatch) -> None:
+        products = [Product(i + 1, 10) for i in range(6)]
+        graph = util.random_fully_connected_graph(products = products, rng = np.random.default_rng(1))
+        indptr, targets = sample_live_edges(graph, 50, rng = np.random.default_rng(2))
+
+        # fewer elements than the edges of a cascade: one cascade per batch, same draws
+        monkeypatch.setattr(learners.OnlineWeightsLearner, 'MONTE_CARLO_BATCH_ELEMENTS', 7)
+        indptr_batched, targets_batched = sample_live_edges(graph, 50, rng = np.random.default_rng(2))
+
+        assert np.array_equal(indptr_batched, indptr)
+        assert np.array_equal(targets_batched, targets)
@@ -0,0 +1,105 @@
+import math
+
+import numpy as np
+
+from entities.Graph import Graph
+from entities.Utils import get_rng
+
+
+class RRSets:
+    """
+    Reverse reachable sets of the independent cascade on a graph: an RR set is made of the nodes which activate a root
+    node, chosen uniformly at random, in a random live-edge graph. The probability that a seed set intersects an RR set
+    is its expected number of activated nodes over n, so the spread is estimated by counting covered RR sets.
+
+    The sets are generated in bulk, one reverse propagation step for all of them at a time, and kept in CSR form:
+    the nodes of the set i are nodes[indptr[i]:indptr[i + 1]], sorted.
+    """
+
+    def __init__(self, graph: Graph, n_sets, rng = None):
+        self.n_nodes = graph.n_nodes
+        self.n_sets = n_sets
+
+        keys = self.__generate(graph.adjacency, n_sets, get_rng(rng))  # set * n_nodes + node, sorted
+        self.nodes = (keys % self.n_nodes).astype(np.int32)
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(keys // self.n_nodes, minlength = n_sets))])
+
+    @staticmethod
+    def get_n_sets(n_nodes, n_seeds, epsilon, delta) -> int:
+        """ Number of RR sets such that, with probability 1 - delta, the spread of every set of n_seeds seeds is
+            estimated within epsilon (Hoeffding bound on the covered fraction, union bound over the seed sets) """
+        n_seeds = min(n_seeds, n_nodes)
+        return int(np.ceil((math.log(2 / delta) + math.log(math.comb(n_nodes, n_seeds))) / (2 * epsilon ** 2)))
+
+    def select_seeds(self, n_seeds) -> list:
+        """ Greedy maximum coverage of the RR sets: indexes of the n_seeds nodes maximising the estimated spread """
+        counts = np.bincount(self.nodes, minlength = self.n_nodes)  # uncovered sets containing every node
+        covered = np.zeros(self.n_sets, dtype = bool)
+
+        # sets containing every node, from the node ordered entries of the CSR structure
+        entries_sets = np.repeat(np.arange(self.n_sets), np.diff(self.indptr))
+        node_order = np.argsort(self.nodes, kind = 'stable')
+        node_ptr = np.concatenate([[0], np.cumsum(counts)])
+
+        seeds = []
+        for _ in range(min(n_seeds, self.n_nodes)):
+            counts[seeds] = -1
+            v = int(np.argmax(counts))  # ties go to the first node
+            seeds.append(v)
+
+            sets = entries_sets[node_order[node_ptr[v]:node_ptr[v + 1]]]
+            sets = sets[~covered[sets]]
+            covered[sets] = True
+            counts -= np.bincount(self.nodes[self.__entries(sets)], minlength = self.n_nodes)
+
+        return seeds
+
+    def spread(self, seeds) -> float:
+        """ Estimated spread of the seeds (indexes of nodes), as the Monte Carlo one: the mean activation probability
+            of the nodes which are not seeds """
+        seeds = np.unique(seeds)
+        covered = np.zeros(self.n_sets, dtype = bool)
+        in_seeds = np.isin(self.nodes, seeds)
+        covered[np.repeat(np.arange(self.n_sets), np.diff(self.indptr))[in_seeds]] = True
+
+        return np.mean(covered) - len(seeds) / self.n_nodes
+
+    def __entries(self, sets) -> np.ndarray:
+        """ Indexes in nodes of all the entries of the given sets """
+        lengths = self.indptr[sets + 1] - self.indptr[sets]
+        offsets = np.arange(np.sum(lengths)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return np.repeat(self.indptr[sets], lengths) + offsets
+
+    @staticmethod
+    def __generate(weights, n_sets, rng) -> np.ndarray:
+        """ Reverse propagation from random roots: every step draws the incoming edges of the nodes reached at the
+            previous step, each edge of a set is drawn at most once as every node is expanded once """
+        n_nodes = len(weights)
+
+        # incoming edges of every node, sources[in_ptr[v]:in_ptr[v + 1]] are the nodes with an edge towards v
+        sources, targets = np.nonzero(weights.T)[::-1]
+        probabilities = weights[sources, targets]
+        in_ptr = np.concatenate([[0], np.cumsum(np.bincount(targets, minlength = n_nodes))])
+
+        frontier_sets = np.arange(n_sets)
+        frontier_nodes = rng.integers(n_nodes, size = n_sets)
+        visited = frontier_sets * n_nodes + frontier_nodes
+
+        while len(frontier_nodes) > 0:
+            degrees = in_ptr[frontier_nodes + 1] - in_ptr[frontier_nodes]
+            offsets = np.arange(np.sum(degrees)) - np.repeat(np.cumsum(degrees) - degrees, degrees)
+            edges = np.repeat(in_ptr[frontier_nodes], degrees) + offsets
+            edges_sets = np.repeat(frontier_sets, degrees)
+
+            live = rng.random(len(edges)) < probabilities[edges]
+            keys = np.sort(edges_sets[live] * n_nodes + sources[edges[live]])
+            keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])] if len(keys) > 0 else keys
+
+            # drop the nodes already in their set, visited is sorted
+            positions = np.minimum(np.searchsorted(visited, keys), len(visited) - 1)
+            keys = keys[visited[positions] != keys]
+
+            visited = np.sort(np.concatenate([visited, keys]))
+            frontier_sets, frontier_nodes = keys // n_nodes, keys % n_nodes
+
+        return visited
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import entities.Utils as util
+from entities.Product import Product
+from learners.RRSets import RRSets
+
+
+def monte_carlo_spread(graph, seeds, repetitions, rng) -> float:
+    """ Mean activation probability of the nodes which are not seeds, over independent cascades """
+    weights = graph.adjacency
+    activated = 0
+
+    for _ in range(repetitions):
+        live = rng.random(weights.shape) < weights
+        reached = set(seeds)
+        frontier = list(seeds)
+        while frontier:
+            node = frontier.pop()
+            for child in np.flatnonzero(live[node]):
+                if child not in reached:
+                    reached.add(child)
+                    frontier.append(child)
+        activated += len(reached) - len(seeds)
+
+    return activated / repetitions / graph.n_nodes
+
+
+def get_graph(n_nodes):
+    products = [Product(i + 1, 10) for i in range(n_nodes)]
+    if n_nodes <= 8:
+        return util.random_fully_connected_graph(products = products, rng = np.random.default_rng(0))
+    return util.get_ecommerce_graph(products = products, rng = np.random.default_rng(0))
+
+
+class TestRRSets:
+
+    @pytest.mark.parametrize("n_nodes", [8, 30])
+    def testSpreadMatchesMonteCarlo(self, n_nodes) -> None:
+        graph = get_graph(n_nodes)
+        rr_sets = RRSets(graph, 40000, rng = np.random.default_rng(1))
+        rng = np.random.default_rng(2)
+
+        for n_seeds in [1, 2, 4]:
+            seeds = [int(seed) for seed in rng.choice(n_nodes, n_seeds, replace = False)]
+            assert rr_sets.spread(seeds) == pytest.approx(monte_carlo_spread(graph, seeds, 3000, rng), abs = 0.02)
+
+        # the first greedy seed is the best single node
+        seeds = rr_sets.select_seeds(3)
+        assert len(set(seeds)) == 3
+        assert rr_sets.spread(seeds[:1]) == max(rr_sets.spread([v]) for v in range(n_nodes))
+        assert rr_sets.spread(seeds) == pytest.approx(monte_carlo_spread(graph, seeds, 3000, rng), abs = 0.02)
+
+    def testSetsLayout(self) -> None:
+        graph = get_graph(8)
+        rr_sets = RRSets(graph, 500, rng = np.random.default_rng(3))
+
+        assert len(rr_sets.indptr) == 501 and rr_sets.indptr[-1] == len(rr_sets.nodes)
+        for i in range(500):
+            nodes = rr_sets.nodes[rr_sets.indptr[i]:rr_sets.indptr[i + 1]]
+            # every set holds its root at least, sorted and without repetitions
+            assert len(nodes) > 0 and np.all(np.diff(nodes) > 0)
+
+    def testNumberOfSetsMonotone(self) -> None:
+        epsilons = [0.3, 0.2, 0.1, 0.05, 0.01]
+        deltas = [0.5, 0.2, 0.1, 0.01, 0.001]
+
+        # more sets for a tighter estimate or a higher confidence
+        by_epsilon = [RRSets.get_n_sets(30, 2, epsilon, 0.1) for epsilon in epsilons]
+        by_delta = [RRSets.get_n_sets(30, 2, 0.1, delta) for delta in deltas]
+        assert all(np.diff(by_epsilon) > 0)
+        assert all(np.diff(by_delta) > 0)
+        assert RRSets.get_n_sets(30, 3, 0.1, 0.1) > RRSets.get_n_sets(30, 2, 0.1, 0.1)
+        assert RRSets.get_n_sets(5, 10, 0.1, 0.1) == RRSets.get_n_sets(5, 5, 0.1, 0.1)
@@ -1,14 +1,21 @@
 import numpy as np
-import warnings
-from sklearn.exceptions import ConvergenceWarning
-from sklearn.gaussian_process import GaussianProcessRegressor
 from sklearn.gaussian_process.kernels import RBF, ConstantKernel as C
-from entities.Utils import BanditNames
+from entities.Utils import BanditNames, get_rng
+from learners.IncrementalGP import DEFAULT_HP_POLICY, make_gp
 from learners.Learner import Learner
+from learners.ObservationStore import ObservationStore
 
 
 class SwGPUCB1_Learner(Learner):
-    def __init__(self, arms, prior_mean, prior_sigma = 1, window_size = 3, delta = 0.1):  # arms are the budgets (e.g 0,10,20...)
+    """
+    GP-UCB1 learner fitted on the last window_size observations. hp_policy decides when the kernel hyperparameters
+    are optimised (see IncrementalGP): the default one optimises them at every update, as the legacy learner, so the
+    GP is fitted again on the whole window every day. The factors of the window are updated in place, adding the new
+    observation and removing the oldest one in O(n^2), only with refit_every != 1 (e.g. None or a schedule).
+    """
+
+    def __init__(self, arms, prior_mean, prior_sigma = 1, window_size = 3, delta = 0.1,
+                 hp_policy = None, grid_gp = False):  # arms are the budgets (e.g 0,10,20...)
         super().__init__(n_arms = len(arms), needs_boost = True)
         self.n_arms = len(arms)
         self.arms = arms
@@ -16,35 +23,33 @@ class SwGPUCB1_Learner(Learner):
         self.sigmas = np.ones(self.n_arms) * prior_sigma
         self.prior_sigma = prior_sigma
         self.prior_mean = prior_mean
-        self.pulled_arms = []  # One arm for campaign
         self.ucbs = np.ones(self.n_arms) * np.inf
         self.window_size = window_size
-        self.window_collected_rewards = np.array([])
+        # the last window_size observations, every update evicts the oldest one
+        self.window_observations = ObservationStore(window = window_size)
         self.bandit_name = BanditNames.SwGPUCB1_Learner.name
 
         """controls beta hyperparameter"""
         self.delta = delta
 
+        self.hp_policy = dict(DEFAULT_HP_POLICY) if hp_policy is None else hp_policy
+        self.grid_gp = grid_gp
+
+        self.gp = self.__new_gp()
+
+    def __new_gp(self):
         alpha = 0.5
         kernel = C(1.0, (1e-3, 1e3)) * RBF(1.0, (1e-3, 1e3))  # to be adjusted
-        self.gp = GaussianProcessRegressor(kernel = kernel,
-                                           alpha = alpha ** 2,
-                                           # normalize_y=True, #  TODO: SKLEARN NORMALIZATION DOES NOT WORK/I AM NOT
-                                           #                          USING IT RIGHT. NORMALIZE Y MANUALLY
-                                           n_restarts_optimizer = 9)
+        # normalize_y=True, #  TODO: SKLEARN NORMALIZATION DOES NOT WORK/I AM NOT
+        #                          USING IT RIGHT. NORMALIZE Y MANUALLY
+        return make_gp(self.arms, kernel, alpha ** 2, self.hp_policy, grid_gp = self.grid_gp)
 
     def update_observations(self, pulled_arm, reward):
         super().update_observations(pulled_arm, reward)
-        self.window_collected_rewards = np.append(self.window_collected_rewards, reward)
-        self.pulled_arms.append(self.arms[pulled_arm])
-        """        if not self.pulled_arms.any():
-            self.pulled_arms = np.append(self.pulled_arms, gpucb1_super_arm)
-        else:
-            self.pulled_arms = np.append(np.atleast_2d(self.pulled_arms), np.atleast_2d(gpucb1_super_arm), axis=0)"""
+        self.window_observations.append(pulled_arm, reward, self.t)
 
     def update_ucbs(self):
-        for armIdx in range(self.n_arms):
-            self.ucbs[armIdx] = self.compute_UCB(armIdx)
+        self.ucbs = self.compute_UCB(np.arange(self.n_arms))
 
     def compute_UCB(self, idx):
         if self.t == 0:
@@ -54,9 +59,8 @@ class SwGPUCB1_Learner(Learner):
         return self.means[idx] + self.sigmas[idx] * np.sqrt(beta)
 
     def update_model(self):
-        x = np.atleast_2d(self.pulled_arms).T
-        y = self.window_collected_rewards
-        warnings.simplefilter(action = 'ignore', category = ConvergenceWarning)
+        x = np.take(self.arms, self.window_observations.pulled_arms)[:, None]
+        y = self.window_observations.rewards
         self.gp.fit(x, y)  # TODO: y IS NOT NORMALIZED. DO IT MANUALLY IF NECESSARY
         self.means, self.sigmas = self.gp.predict(
                 np.atleast_2d(self.arms).T,
@@ -69,22 +73,10 @@ class SwGPUCB1_Learner(Learner):
         self.update_observations(pulled_super_arm, rewards)
         self.update_model()
 
-    def reset_window(self):
-        # reset samples information
-        self.window_collected_rewards = np.array([])
-        self.pulled_arms = []
-
     # Same as gts_learner
     def pull_arm(self) -> np.array:
         """ Pull an arm and the set of value of all the arms"""
-
-        if self.t % self.window_size == 0:
-            """
-            If a new sliding window starts, collected rewards and pulled arms bandit info have to be re initialized.
-            """
-            self.reset_window()
-
-        arms_value = np.random.normal(self.means, self.sigmas)
+        arms_value = get_rng(self.rng).normal(self.means, self.sigmas)
         idx = np.argmax(arms_value)
         return idx, arms_value
 
@@ -92,14 +84,7 @@ class SwGPUCB1_Learner(Learner):
         super(SwGPUCB1_Learner, self).reset()
         self.means = np.ones(self.n_arms) * self.prior_mean
         self.sigmas = np.ones(self.n_arms) * self.prior_sigma
-        self.pulled_arms = []  # One arm for campaign
         self.ucbs = np.ones(self.n_arms) * np.inf
-        self.window_collected_rewards = np.array([])
+        self.window_observations.clear()
 
-        alpha = 0.5
-        kernel = C(1.0, (1e-3, 1e3)) * RBF(1.0, (1e-3, 1e3))  # to be adjusted
-        self.gp = GaussianProcessRegressor(kernel = kernel,
-                                           alpha = alpha ** 2,
-                                           # normalize_y=True, #  TODO: SKLEARN NORMALIZATION DOES NOT WORK/I AM NOT
-                                           #                          USING IT RIGHT. NORMALIZE Y MANUALLY
-                                           n_restarts_optimizer = 9)
\ No newline at end of file
+        self.gp = self.__new_gp()
\ No newline at end of file
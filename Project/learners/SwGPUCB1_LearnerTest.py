@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from sklearn.gaussian_process import GaussianProcessRegressor
+
+from learners.SwGPUCB1_Learner import SwGPUCB1_Learner
+
+
+class TestSwGPUCB1_Learner:
+
+    @pytest.mark.parametrize("hp_policy, refits", [({'refit_every': None, 'n_restarts_optimizer': 0}, 1),
+                                                   ({'refit_every': 10, 'n_restarts_optimizer': 0}, 4)])
+    def testPosteriorMatchesSklearnOnWindow(self, hp_policy, refits) -> None:
+        arms = np.linspace(0, 300, 16)
+        learner = SwGPUCB1_Learner(arms, 10, window_size = 12, hp_policy = hp_policy)
+        rng = np.random.default_rng(0)
+
+        for _ in range(40):
+            arm = rng.integers(len(arms))
+            learner.update(arm, np.sin(arms[arm] / 60) * 3 + rng.normal(scale = 0.5))
+
+            # sklearn fitted on the window only, with the hyperparameters of the last refit
+            x = arms[learner.window_observations.pulled_arms][:, None]
+            regressor = GaussianProcessRegressor(kernel = learner.gp.kernel_, alpha = learner.gp.alpha,
+                                                 optimizer = None).fit(x, learner.window_observations.rewards)
+            means, sigmas = regressor.predict(arms[:, None], return_std = True)
+
+            assert len(x) == min(learner.t, 12)
+            assert np.allclose(learner.means, means, rtol = 0, atol = 1e-9)
+            assert np.allclose(learner.sigmas, np.maximum(sigmas, 1e-2), rtol = 0, atol = 1e-9)
+
+        # every other update slid the window in the factors
+        assert learner.gp.n_refits == refits
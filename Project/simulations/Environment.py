@@ -8,11 +8,15 @@ from entities.User import User
 from knapsack.Knapsack import Knapsack
 from learners.OfflineWeightsLearner import OfflineWeightsLearner
 from learners.OnlineWeightsLearner import OnlineWeightsLearner
+from learners.RRSets import RRSets
 import seaborn as sns
 
 class Environment:
-    def __init__(self):
+    def __init__(self, rng=None):
         # print("init env")
+        # np.random.Generator of the environment, the global random states are used when it is None
+        self.rng = rng
+
         """ Products SETUP """
         prod1 = Product(1, 0.50, secondary_list=[2, 3])
         prod2 = Product(2, 0.625, secondary_list=[3, 4])
@@ -64,9 +68,9 @@ class Environment:
         exp_number_purchase_2 = [1.5, 1.5, 1.1, 1.2, 1.3]  # 1   - 1.5
         exp_number_purchase_3 = [2, 1.6, 1.8, 2.0, 1.5]  # 1.5 - 2
 
-        graph1 = util.random_fully_connected_graph(self.products)
-        graph2 = util.random_fully_connected_graph(self.products)
-        graph3 = util.random_fully_connected_graph(self.products)
+        graph1 = util.random_fully_connected_graph(self.products, rng=rng)
+        graph2 = util.random_fully_connected_graph(self.products, rng=rng)
+        graph3 = util.random_fully_connected_graph(self.products, rng=rng)
 
         self.graphs = [graph1, graph2, graph3]
 
@@ -147,15 +151,19 @@ class Environment:
         self.noise_alpha = []
         self.exp_number_noise = []
 
+        # clairvoyant knapsacks kept between days, re-solved only from the first campaign whose rewards changed
+        self.knapsack_agg = Knapsack(compact=True)
+        self.knapsack_disagg = Knapsack(compact=True)
+
     def play_one_day(self, n_users, reference_price, daily_budget, step_k=2, alpha_noise=False, n_noise=False,
                      contexts=None):
         # generate noisy contractions matrix for alpha functions and exp number of purchase
         if alpha_noise:
-            self.noise_alpha = util.noise_matrix_alpha()
+            self.noise_alpha = util.noise_matrix_alpha(rng=self.rng)
         else:
             self.noise_alpha = util.no_noise_matrix()
         if n_noise:
-            self.exp_number_noise = util.noise_matrix_alpha(max_reduction=0.25, max_global_influence=0)
+            self.exp_number_noise = util.noise_matrix_alpha(max_reduction=0.25, max_global_influence=0, rng=self.rng)
         else:
             self.exp_number_noise = util.no_noise_matrix()
 
@@ -194,24 +202,24 @@ class Environment:
 
         # AGGREGATED
         row_label_rewards, row_labels_dp_table, col_labels = util.table_metadata(5, 1, avail_budgets)
-        K = Knapsack(rewards=agg_rewards, budgets=np.array(avail_budgets))
+        K = self.knapsack_agg
+        K.resolve(rewards=agg_rewards, budgets=np.array(avail_budgets))
         K.init_for_pretty_print(row_labels=row_labels_dp_table, col_labels=col_labels)
-        K.solve()
-        arg_max = np.argmax(K.get_output()[0][-1])
-        alloc_agg = np.array(K.get_output()[1][-1][arg_max])[1:]
+        arg_max = np.argmax(K.dp_table[-1])
+        alloc_agg = K.get_allocation(arg_max)[1:]
         # b_knap = budget_array_from_k_alloc_4(alloc)  # budgets vector for contextualized env
-        reward = K.get_output()[0][-1][arg_max]
+        reward = K.dp_table[-1][arg_max]
         reward_k_agg = reward
 
         # DISAGGREGATE
         row_label_rewards, row_labels_dp_table, col_labels = util.table_metadata(5, 4, avail_budgets)
-        K = Knapsack(rewards=rewards, budgets=np.array(avail_budgets))
+        K = self.knapsack_disagg
+        K.resolve(rewards=rewards, budgets=np.array(avail_budgets))
         K.init_for_pretty_print(row_labels=row_labels_dp_table, col_labels=col_labels)
-        K.solve()
-        arg_max = np.argmax(K.get_output()[0][-1])
-        alloc_disagg = np.array(K.get_output()[1][-1][arg_max])[1:]
+        arg_max = np.argmax(K.dp_table[-1])
+        alloc_disagg = K.get_allocation(arg_max)[1:]
         # b_knap = budget_array_from_k_alloc_4(alloc)  # budgets vector for contextualized env
-        reward = K.get_output()[0][-1][arg_max]
+        reward = K.dp_table[-1][arg_max]
         reward_k_disagg = reward
 
         return {
@@ -261,6 +269,60 @@ class Environment:
             "profit": np.sum(learner_rewards),
         }
 
+    def replicate_last_day_batch(self, super_arms, n_users, reference_price, alpha_noise=False, n_noise=False,
+                                 contexts=None):
+        """ replicate_last_day for L super arms at once, super_arms has shape (L, 5 * contexts).
+            learner_rewards and gross_rewards are stacked with one row per super arm and profit has shape (L) """
+        if alpha_noise:
+            noise_alpha = self.noise_alpha
+        else:
+            noise_alpha = util.no_noise_matrix()
+        if n_noise:
+            exp_number_noise = self.exp_number_noise
+        else:
+            exp_number_noise = util.no_noise_matrix()
+
+        if contexts is None:
+            ctx = [[1, 1, 1, 1]]
+        else:
+            ctx = contexts
+
+        super_arms = np.array(super_arms)
+        if super_arms.shape[1] / len(ctx) != 5.0:
+            raise ValueError(f"Super arms not compatible with context {super_arms.shape[1]}/{len(ctx)} != 5")
+
+        # same mapping of budget_array_from_superarm, for all the super arms
+        p_users = np.array(self.all_prob_users)
+        budgets = super_arms.reshape((len(super_arms), len(ctx), 5))
+        budgets_array = np.zeros((len(super_arms), 4, 5))
+        for i, mask in enumerate(ctx):
+            mask = np.array(mask)
+            scaled_mask = mask * p_users / np.sum(mask * p_users)
+            budgets_array += scaled_mask[np.newaxis, :, np.newaxis] * budgets[:, i, np.newaxis, :]
+
+        # noise replication as last available data in env
+        profit_blocks = self.profit_blocks(budgets_array=budgets_array,
+                                           noise=(self.noise_alpha, self.exp_number_noise),
+                                           n_users=n_users,
+                                           reference_price=reference_price)
+
+        # same aggregation of assemble_profit, (L x contexts x campaigns)
+        block = np.swapaxes(profit_blocks, -1, -2)  # transpose profit to (camp x usr)
+        gross_rewards = np.stack([block @ (np.array(mask) * p_users) for mask in ctx], axis=1)
+        gross_rewards = gross_rewards.reshape((len(super_arms), -1))
+        learner_rewards = gross_rewards - super_arms
+
+        return {
+            "learner_rewards": learner_rewards,
+            "gross_rewards": gross_rewards,
+            "noise": (noise_alpha, exp_number_noise),
+            "profit": np.sum(learner_rewards, axis=1),
+        }
+
+    def set_rng(self, rng):
+        """ Set the np.random.Generator used for the daily noise and the graph estimations """
+        self.rng = rng
+
     def get_core_entities(self):
         return self.users, self.products, self.campaigns, self.allocated_budget, self.prob_users, self.graphs
 
@@ -275,22 +337,36 @@ class Environment:
         if len(budgets_array) != 4:
             raise ValueError("Illegal budget array size")
 
-        old_budget = self.allocated_budget
-        blocks_p = []
+        return list(self.profit_blocks(budgets_array=budgets_array,
+                                       noise=(self.noise_alpha, self.exp_number_noise),
+                                       n_users=n_users,
+                                       reference_price=reference_price))
+
+    def profit_blocks(self, budgets_array, noise, n_users, reference_price):
+        """ Profit of every campaign for each of the 4 user classes given the budgets seen by every class,
+            budgets_array has shape (..., 4, campaigns) and leading dimensions are independent budget arrays.
+            noise is the (noise_alpha, exp_number_noise) pair of a day. Campaigns are only read and the expected
+            profit caches of the users are guarded by a lock, so many threads can evaluate budget arrays against
+            the same day, as long as the graphs of the users are not changed meanwhile
+            Alert -> The result is not scaled by user probability"""
+        budgets_array = np.asarray(budgets_array, dtype=float)
+        if budgets_array.shape[-2:] != (4, len(self.campaigns)):
+            raise ValueError(f"Illegal budget array shape {budgets_array.shape}")
+
+        noise_alpha, exp_number_noise = noise
         # trick for user1 appearing 2 times
         indexes = [0, 0, 1, 2]
 
-        for budget_i, user_i in enumerate(indexes):
-            budget = budgets_array[budget_i]
-            if len(budget) != len(self.campaigns):
-                raise ValueError(f"Illegal {budget_i} budget size")
-            # force a temporary budget
-            self.__set_campaign_budgets(budget)
-            profit = np.array(self.__profit_campaign_per_user(user_i, n_users, reference_price))
-            blocks_p.append(profit)
+        # effect of budget over campaign (alpha function), one alpha function per (user, campaign)
+        alphas = np.stack([np.stack([self.users[user_i].alpha_functions[i](budgets_array[..., budget_i, i]).clip(0.0)
+                                     * cmp.alpha_i_max for i, cmp in enumerate(self.campaigns)], axis=-1)
+                           for budget_i, user_i in enumerate(indexes)], axis=-2)
+        noise_a = np.array(noise_alpha)[indexes]  # noise over (i,j)
+        # expected profit of user j over graph + noise n effect
+        exp_profit = np.array([self.users[user_i].expected_profit(exp_number_noise[user_i]) for user_i in indexes])
 
-        self.__set_campaign_budgets(old_budget)  # restore old budget
-        return blocks_p
+        # expected profit of campaign not scaled by user probability, converted in euro
+        return noise_a * alphas * exp_profit * n_users * reference_price
 
     def budget_array_from_superarm(self, super_arm, contexts):
         """ map the super arm result with blocks of budget for every possible context participant """
@@ -309,11 +385,6 @@ class Environment:
 
         return result  # matrix of scaled budgets
 
-    def __set_campaign_budgets(self, budget_array):
-        for i, cmp in enumerate(self.campaigns):
-            self.campaigns[i].change_budget(budget_array[i])
-            self.allocated_budget[i] = budget_array[i]
-
     def assemble_profit(self, profit_blocks, contexts, flatten=False):
         """Perform addition and scale by user probability in the context"""
         assembled_profit = []
@@ -342,66 +413,67 @@ class Environment:
             return tmp.flatten()
         return tmp
 
+    def __gross_profits(self, users, prob_users, noise_alpha, exp_number_noise, budgets, n_users, reference_price):
+        """ Expected gross profit of every (user class, campaign, budget) as a (classes x campaigns x budgets) array
+            of singles, budgets has shape (classes x budgets) and holds the budget seen by every user class.
+            The budgets are not set in the campaigns """
+        # alpha functions are given one per (user, campaign), each one is evaluated on all the budgets at once
+        alphas = np.array([[user.alpha_functions[cmp_index](budgets[user_idx]).clip(0.0)
+                            for cmp_index in range(len(self.campaigns))] for user_idx, user in enumerate(users)])
+        alpha_i_max = np.array([cmp.alpha_i_max for cmp in self.campaigns])
+        value_per_click = np.array([user.expected_profit(exp_number_noise[user_idx])
+                                    for user_idx, user in enumerate(users)])
+
+        alphas = alphas * alpha_i_max[np.newaxis, :, np.newaxis] * np.array(noise_alpha)[:, :, np.newaxis]
+        expected_gross_profit = np.array(prob_users)[:, np.newaxis, np.newaxis] * alphas * \
+                                value_per_click[:, :, np.newaxis] * n_users * reference_price
+
+        return np.single(expected_gross_profit)
+
     def __rewards_knapsack_4_user(self, n_users, reference_price, noise_alpha, exp_number_noise, step_size=5,
                                   n_budgets=10):
         """Return knapsack rewards compatible with full split of user classes"""
-        old_budget = self.allocated_budget
-
         available_budget = [step_size * (i + 1) for i in range(n_budgets)]
         n_classes = 4
-        n_campaigns = len(self.products)
         prob_users = self.all_prob_users
         users = [self.users[0], self.users[0], self.users[1], self.users[2]]
+        true_idx = [0, 0, 1, 2]  # normalization to not replicate alpha noise
+
+        profits = self.__gross_profits(users=users,
+                                       prob_users=prob_users,
+                                       noise_alpha=[noise_alpha[i] for i in true_idx],
+                                       exp_number_noise=[exp_number_noise[i] for i in true_idx],
+                                       budgets=np.tile(available_budget, (n_classes, 1)),
+                                       n_users=n_users,
+                                       reference_price=reference_price)
+
+        # one row per (campaign, user class)
+        profits = profits.transpose((1, 0, 2)).reshape((-1, n_budgets))
+        rewards = (-1 * np.array(available_budget) + profits).astype(int)
 
-        rewards = []
-        for _ in range(n_classes * n_campaigns):
-            rewards.append(-1 * np.array(available_budget.copy()))
-        rewards = np.array(rewards)
-
-        for cmp_index, cmp in enumerate(self.campaigns):
-            for budget_idx in range(n_budgets):
-                cmp.change_budget(available_budget[budget_idx])
-                for user_idx, user in enumerate(users):
-                    true_idx = user_idx
-                    if user_idx >= 1:
-                        true_idx = user_idx - 1  # normalization to not replicate alpha noise
-                    alpha = cmp.get_alpha_i(user.alpha_functions[cmp_index]) * \
-                            noise_alpha[true_idx][
-                                cmp_index]
-                    value_per_click = user.expected_profit(exp_number_noise[true_idx])[cmp_index]
-                    expected_gross_profit = prob_users[
-                                                user_idx] * alpha * value_per_click * n_users * reference_price
-                    rewards[cmp_index * n_classes + user_idx][budget_idx] += np.single(expected_gross_profit)
-
-        self.__set_campaign_budgets(old_budget)  # restore old budget
         return rewards, available_budget
 
     def __rewards_knapsack_aggregated(self, n_users, reference_price, noise_alpha, exp_number_noise, step_size=5,
                                       n_budgets=10, mask=None):
         """Return knapsack rewards for fully aggregated user classes"""
-        old_budget = self.allocated_budget
         prob_users = self.all_prob_users[1:]
         available_budget = [step_size * (i + 1) for i in range(n_budgets)]
-        n_campaigns = len(self.products)
-        rewards = []
-        for _ in range(n_campaigns):
-            rewards.append(-1 * np.array(available_budget.copy()))
-        rewards = np.array(rewards)
-
-        for cmp_index in range(n_campaigns):
-            for budget_idx in range(n_budgets):
-                for user_idx, user in enumerate(self.users):
-                    self.campaigns[cmp_index].change_budget(available_budget[budget_idx] * prob_users[
-                        user_idx])  # scale allocated budget by probability of user
-                    alpha = self.campaigns[cmp_index].get_alpha_i(user.alpha_functions[cmp_index]) * \
-                            noise_alpha[user_idx][cmp_index]
-                    value_per_click = user.expected_profit(exp_number_noise[user_idx])[cmp_index]
-                    expected_gross_profit = prob_users[
-                                                user_idx] * alpha * value_per_click * n_users * reference_price
-                    multiplier = 2 if user_idx == 0 else 1
-                    rewards[cmp_index][budget_idx] += np.single(expected_gross_profit) * multiplier
-
-        self.__set_campaign_budgets(old_budget)  # restore old budget
+
+        # scale allocated budget by probability of user
+        profits = self.__gross_profits(users=self.users,
+                                       prob_users=prob_users,
+                                       noise_alpha=noise_alpha,
+                                       exp_number_noise=exp_number_noise,
+                                       budgets=np.outer(prob_users, available_budget),
+                                       n_users=n_users,
+                                       reference_price=reference_price)
+
+        rewards = np.tile(-1 * np.array(available_budget), (len(self.products), 1))
+        for user_idx in range(len(self.users)):
+            multiplier = 2 if user_idx == 0 else 1
+            # rewards are integers, every user contribution is truncated when added
+            rewards = (rewards + profits[user_idx] * multiplier).astype(int)
+
         return rewards, available_budget
 
     def __rewards_knapsack_pseudo_aggregated(self, mask, n_users, reference_price, noise_alpha, exp_number_noise,
@@ -410,58 +482,29 @@ class Environment:
         """Return knapsack rewards for fully aggregated user classes"""
         noise_alpha = [noise_alpha[0]] + self.noise_alpha
         exp_number_noise = [exp_number_noise[0]] + self.exp_number_noise
-        old_budget = self.allocated_budget
         prob_users = [0, 0, 0, 0]
         users = [self.users[0]] + self.users
         for i, bit in enumerate(mask):
             if bit == 1:
                 prob_users[i] = self.all_prob_users[i]
         available_budget = [step_size * (i + 1) for i in range(n_budgets)]
-        n_campaigns = len(self.products)
-        rewards = []
-        for _ in range(n_campaigns):
-            rewards.append(-1 * np.array(available_budget.copy()))
-        rewards = np.array(rewards)
-
-        for cmp_index in range(n_campaigns):
-            for budget_idx in range(n_budgets):
-                for user_idx, user in enumerate(users):
-                    if prob_users[user_idx] != 0:
-                        self.campaigns[cmp_index].change_budget(float(available_budget[budget_idx]) * prob_users[
-                            user_idx] / float(sum(prob_users)))  # scale allocated budget by probability of user
-                        alpha = self.campaigns[cmp_index].get_alpha_i(user.alpha_functions[cmp_index]) * \
-                                noise_alpha[user_idx][cmp_index]
-                        value_per_click = user.expected_profit(exp_number_noise[user_idx])[cmp_index]
-                        expected_gross_profit = prob_users[
-                                                    user_idx] * alpha * value_per_click * n_users * reference_price
-                        rewards[cmp_index][budget_idx] += np.single(expected_gross_profit)
-
-        self.__set_campaign_budgets(old_budget)  # restore old budget
-        return rewards, available_budget
-
-    def __profit_campaign_per_user(self, user_index, n_users, reference_price):
-        """ Not scaled user probability profit for a campaign with forced budget of caller"""
-        noise_alpha = self.noise_alpha
-        exp_number_noise = self.exp_number_noise
-        campaign_profits = []
-        u = self.users[user_index]
-
-        for i, cmp in enumerate(self.campaigns):
-
-            noise_a = noise_alpha[user_index][i]  # noise over (i,j)
-            alpha_f_res = cmp.get_alpha_i(u.alpha_functions[i])  # effect of budget over campaign (alpha function)
-            exp_profit = u.expected_profit(exp_number_noise[user_index])[
-                i]  # expected profit of user j over graph + noise n effect
-            profit_u = noise_a * alpha_f_res * exp_profit  # expected profit of campaign not scaled by user probability
+        in_context = [i for i in range(len(users)) if prob_users[i] != 0]
+
+        # scale allocated budget by probability of user
+        profits = self.__gross_profits(users=[users[i] for i in in_context],
+                                       prob_users=[prob_users[i] for i in in_context],
+                                       noise_alpha=[noise_alpha[i] for i in in_context],
+                                       exp_number_noise=[exp_number_noise[i] for i in in_context],
+                                       budgets=np.outer([prob_users[i] for i in in_context],
+                                                        np.array(available_budget, dtype=float)) / float(sum(prob_users)),
+                                       n_users=n_users,
+                                       reference_price=reference_price)
+
+        rewards = np.tile(-1 * np.array(available_budget), (len(self.products), 1))
+        for profit in profits:
+            rewards = (rewards + profit).astype(int)
 
-            campaign_profits.append(profit_u)
-
-        # convert the pure number in euro
-        for i, cmp_profit in enumerate(campaign_profits):
-            euro_val = cmp_profit * n_users * reference_price
-            campaign_profits[i] = euro_val
-
-        return campaign_profits
+        return rewards, available_budget
 
     def __set_user_graph(self, index, graph):
         self.users[index].change_graph(graph)
@@ -477,6 +520,7 @@ class Environment:
                            delta=0.2,  # higher delta, fewer simulations
                            epsilon=0.1,
                            seeds=1,
+                           rr_sets=False,  # choose the seeds on reverse reachable sets, for large graphs
                            silent=True):
         true_result_history = []
         estimation_fully_con = []
@@ -490,7 +534,8 @@ class Environment:
             estimatedProbs = OfflineWeightsLearner.estimateProbabilities(numOfEpisodes=numOfEpisodes,
                                                                          targetNodes=[i for i in range(n_campaigns)],
                                                                          numberOfNodes=n_campaigns,
-                                                                         probabilitiesMatrix=adjacency_matrix)
+                                                                         probabilitiesMatrix=adjacency_matrix,
+                                                                         rng=self.rng)
 
             if not silent:
                 print("\n-" * 10 + " Weights estimation - OFFLINE - fully connected graph " + "-" * 10)
@@ -508,12 +553,18 @@ class Environment:
 
             # deltas = [0.95, 0.8, 0.4, 0.2]
             monte_carlo_repetitions = int((1 / (epsilon ** 2)) * np.log(seeds + 1) * np.log(1 / delta))
+            n_rr_sets = RRSets.get_n_sets(user.weighted_graph.n_nodes, seeds, epsilon, delta) if rr_sets else None
             if not silent:
                 print("\nmonte carlo simulations: " + str(monte_carlo_repetitions))
+                if rr_sets:
+                    print("\nreverse reachable sets: " + str(n_rr_sets))
             plt.close()
             estimatedGraph = OnlineWeightsLearner.estimate_weights(true_graph=user.weighted_graph,
                                                                    simulations=simulations,
-                                                                   monte_carlo_repetitions=monte_carlo_repetitions)
+                                                                   monte_carlo_repetitions=monte_carlo_repetitions,
+                                                                   rng=self.rng,
+                                                                   n_seeds=seeds,
+                                                                   n_rr_sets=n_rr_sets)
             estimation_fully_con.append(estimatedGraph)
             if not silent:
                 print("\nTrue Probability Matrix: \n",
@@ -534,12 +585,17 @@ class Environment:
             monte_carlo_repetitions = int((1 / (epsilon ** 2)) * np.log(seeds + 1) * np.log(1 / delta))
             if not silent:
                 print("\nmonte carlo simulations: " + str(monte_carlo_repetitions))
+                if rr_sets:
+                    print("\nreverse reachable sets: " + str(n_rr_sets))
             plt.close()
 
-            ecommerceGraph = util.get_ecommerce_graph(products=self.products)
+            ecommerceGraph = util.get_ecommerce_graph(products=self.products, rng=self.rng)
             estimatedGraph = OnlineWeightsLearner.estimate_weights(true_graph=ecommerceGraph,
                                                                    simulations=simulations,
-                                                                   monte_carlo_repetitions=monte_carlo_repetitions)
+                                                                   monte_carlo_repetitions=monte_carlo_repetitions,
+                                                                   rng=self.rng,
+                                                                   n_seeds=seeds,
+                                                                   n_rr_sets=n_rr_sets)
             estimation_2_neigh.append(estimatedGraph)
             true_result_history.append(ecommerceGraph)
             if not silent:
@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+
+from knapsack.Knapsack import Knapsack
+from simulations.Environment import Environment
+
+N_USERS = 100
+REFERENCE_PRICE = 4.0
+CONTEXTS = [[1, 1, 0, 0], [0, 0, 1, 1]]
+
+
+def scalar_rewards(env, users, prob_users, noise_alpha, exp_number_noise, budgets, multipliers, n_rows) -> np.ndarray:
+    """ knapsack rewards as they were built budget by budget, setting every budget in the campaign.
+        budgets[user_idx][budget_idx] is the budget seen by the user, its contribution goes to row
+        n_rows * cmp_index + user_idx % n_rows and every contribution is truncated when added """
+    old_budget = list(env.allocated_budget)
+    n_budgets = len(budgets[0])
+    available_budget = [5 * (i + 1) for i in range(n_budgets)]
+    rewards = np.array([-1 * np.array(available_budget) for _ in range(n_rows * len(env.campaigns))])
+
+    for cmp_index, cmp in enumerate(env.campaigns):
+        for budget_idx in range(n_budgets):
+            for user_idx, user in enumerate(users):
+                cmp.change_budget(budgets[user_idx][budget_idx])
+                alpha = cmp.get_alpha_i(user.alpha_functions[cmp_index]) * noise_alpha[user_idx][cmp_index]
+                value_per_click = user.expected_profit(exp_number_noise[user_idx])[cmp_index]
+                expected_gross_profit = prob_users[user_idx] * alpha * value_per_click * N_USERS * REFERENCE_PRICE
+                rewards[n_rows * cmp_index + user_idx % n_rows][budget_idx] += \
+                    np.single(expected_gross_profit) * multipliers[user_idx]
+
+    for cmp_index, budget in enumerate(old_budget):
+        env.set_campaign_budget(cmp_index, budget)
+    return rewards
+
+
+def best_allocation(rewards, budgets) -> np.ndarray:
+    """ allocation of the best reward of a knapsack solved from scratch """
+    k = Knapsack(rewards = rewards, budgets = np.array(budgets))
+    k.solve()
+    return k.get_allocation(np.argmax(k.get_output()[0][-1]))[1:]
+
+
+class TestEnvironment:
+
+    @pytest.mark.parametrize("contexts", [None, CONTEXTS])
+    def testRewardsMatchScalarBuild(self, contexts) -> None:
+        env = Environment(rng = np.random.default_rng(7))
+        budgets = [5 * (i + 1) for i in range(20)]
+
+        for _ in range(3):
+            day = env.play_one_day(N_USERS, REFERENCE_PRICE, 100, step_k = 5, alpha_noise = True, n_noise = True,
+                                   contexts = contexts)
+            noise_alpha, exp_number_noise = day['noise']
+            assert day['k_budgets'] == budgets
+
+            # aggregated: budgets scaled by the probability of every user, the first user counted twice
+            prob_users = env.all_prob_users[1:]
+            agg = scalar_rewards(env, env.users, prob_users, noise_alpha, exp_number_noise,
+                                 budgets = np.outer(prob_users, budgets), multipliers = [2, 1, 1], n_rows = 1)
+            assert np.array_equal(day['rewards_agg'], agg)
+
+            # disaggregated: one row per (campaign, user class), the first user is split in two classes
+            users = [env.users[0], env.users[0], env.users[1], env.users[2]]
+            true_idx = [0, 0, 1, 2]
+            disagg = scalar_rewards(env, users, env.all_prob_users, [noise_alpha[i] for i in true_idx],
+                                    [exp_number_noise[i] for i in true_idx], budgets = [budgets] * 4,
+                                    multipliers = [1, 1, 1, 1], n_rows = 4)
+            assert np.array_equal(day['rewards_disagg'], disagg)
+
+            assert np.array_equal(day['alloc_agg'][0], best_allocation(agg, budgets))
+            assert np.array_equal(day['alloc_disagg'][0], best_allocation(disagg, budgets))
+            assert env.allocated_budget == [40, 40, 40, 40, 40]
+
+            if contexts is None:
+                assert len(day['rewards_mix']) == 0
+                continue
+
+            # one table per context, budgets scaled by the probability of the users inside the context
+            mix = []
+            for mask in contexts:
+                in_context = [i for i, bit in enumerate(mask) if bit == 1]
+                p_context = [env.all_prob_users[i] for i in in_context]
+                users = [env.users[true_idx[i]] for i in in_context]
+                mix.append(scalar_rewards(env, users, p_context,
+                                          [([noise_alpha[0]] + env.noise_alpha)[i] for i in in_context],
+                                          [([exp_number_noise[0]] + env.exp_number_noise)[i] for i in in_context],
+                                          budgets = np.outer(p_context, budgets) / sum(p_context),
+                                          multipliers = [1] * len(in_context), n_rows = 1))
+            assert np.array_equal(day['rewards_mix'], np.concatenate(mix))
+
+    @pytest.mark.parametrize("contexts", [None, CONTEXTS])
+    def testReplicateBatchMatchesSingle(self, contexts) -> None:
+        env = Environment(rng = np.random.default_rng(3))
+        env.play_one_day(N_USERS, REFERENCE_PRICE, 100, step_k = 5, alpha_noise = True, n_noise = True,
+                         contexts = contexts)
+        campaign_budgets = [cmp.allocated_budget for cmp in env.campaigns]
+        n_contexts = 1 if contexts is None else len(contexts)
+        super_arms = np.random.default_rng(4).integers(0, 100, size = (6, 5 * n_contexts))
+
+        batch = env.replicate_last_day_batch(super_arms, N_USERS, REFERENCE_PRICE, alpha_noise = True,
+                                             n_noise = True, contexts = contexts)
+
+        assert batch['learner_rewards'].shape == (6, 5 * n_contexts)
+        for i, super_arm in enumerate(super_arms):
+            single = env.replicate_last_day(list(super_arm), N_USERS, REFERENCE_PRICE, alpha_noise = True,
+                                            n_noise = True, contexts = contexts)
+            assert np.allclose(batch['learner_rewards'][i], single['learner_rewards'])
+            assert np.allclose(batch['gross_rewards'][i], single['gross_rewards'])
+            assert np.isclose(batch['profit'][i], single['profit'])
+        assert [cmp.allocated_budget for cmp in env.campaigns] == campaign_budgets
+        assert env.allocated_budget == campaign_budgets
+
+        with pytest.raises(ValueError):
+            env.replicate_last_day_batch(super_arms[:, :4], N_USERS, REFERENCE_PRICE, contexts = contexts)
+
+    def testProfitBlocks(self) -> None:
+        env = Environment(rng = np.random.default_rng(5))
+        env.play_one_day(N_USERS, REFERENCE_PRICE, 100, step_k = 5, alpha_noise = True, n_noise = True)
+        noise = (env.noise_alpha, env.exp_number_noise)
+        budgets_arrays = np.random.default_rng(6).uniform(0, 100, size = (3, 2, 4, 5))
+
+        blocks = env.profit_blocks(budgets_arrays, noise, N_USERS, REFERENCE_PRICE)
+
+        # every budget array on its own, alpha of the campaign with that budget for the class of every row
+        assert blocks.shape == (3, 2, 4, 5)
+        for index in np.ndindex(3, 2):
+            for row, user_i in enumerate([0, 0, 1, 2]):
+                user = env.users[user_i]
+                for cmp_index, cmp in enumerate(env.campaigns):
+                    cmp.change_budget(budgets_arrays[index][row][cmp_index])
+                    expected = cmp.get_alpha_i(user.alpha_functions[cmp_index]) * \
+                        noise[0][user_i][cmp_index] * user.expected_profit(noise[1][user_i])[cmp_index] * \
+                        N_USERS * REFERENCE_PRICE
+                    assert np.isclose(blocks[index][row][cmp_index], expected)
+        assert np.allclose(env.get_context_building_blocks(budgets_arrays[0, 0], N_USERS, REFERENCE_PRICE),
+                           blocks[0, 0])
+
+        for shape in [(4, 4), (3, 5), (5,), (2, 5, 4)]:
+            with pytest.raises(ValueError):
+                env.profit_blocks(np.ones(shape), noise, N_USERS, REFERENCE_PRICE)
@@ -11,9 +11,11 @@ from learners.CombWrapper import CombWrapper
 from tqdm import tqdm
 import matplotlib
 import json
+import random
+from concurrent.futures import ProcessPoolExecutor
 from simulations.Environment import Environment
 
-matplotlib.use("TkAgg")
+matplotlib.use("TkAgg", force = False)  # keep the default backend where Tk is not available
 
 
 class SimulationHandler:
@@ -43,18 +45,20 @@ class SimulationHandler:
                  save_results_to_file = True,
                  simulation_name: str = 'simulation',
                  learner_profit_plot = None,
-                 plot_confidence_intervals = True):
+                 plot_confidence_intervals = True,
+                 n_jobs: int = 1,
+                 seed: int = None):
         self.environmentConstructor = environmentConstructor
-        self.environment = self.environmentConstructor()
+        if seed is None:
+            self.environment = self.environmentConstructor()
+        else:
+            # the first child of the seed builds the environment, the next ones run the experiments
+            self.environment = self.environmentConstructor(rng = np.random.default_rng(self.__seed_sequences(seed, 0)[0]))
         self.learners = learners
         self.learners_rewards_per_experiment = [[] for _ in range(len(self.learners))]
-        self.learners_rewards_per_day = [[] for _ in range(len(self.learners))]
-        self.super_arms = []
 
         self.clairvoyant_rewards_per_experiment_t1 = []
         self.clairvoyant_rewards_per_experiment_t2 = []
-        self.clairvoyant_rewards_per_day_t1 = []
-        self.clairvoyant_rewards_per_day_t2 = []
 
         self.avg_clairvoyant_profit_functions_t1 = []
         self.avg_clairvoyant_profit_functions_t2 = []
@@ -80,6 +84,10 @@ class SimulationHandler:
         self.save_results_to_file = save_results_to_file
         self.plot_confidence_intervals = plot_confidence_intervals
 
+        # experiments run in a pool of n_jobs processes, each one seeded from the seed of the simulation
+        self.n_jobs = n_jobs
+        self.seed = seed
+
         if save_results_to_file:
             if not os.path.isdir("../results"):
                 os.makedirs("../results")
@@ -132,7 +140,12 @@ class SimulationHandler:
         if self.clairvoyant_type == 'both':
             self.clairvoyant_rewards_per_experiment_t2 = []
 
-        if self.plot_regressor_progress:
+        regressor_progress = None
+
+        if self.plot_regressor_progress and self.n_jobs > 1:
+            print("Regressor progress can not be plotted running experiments in parallel")
+
+        elif self.plot_regressor_progress:
             img, axss = plt.subplots(nrows = 2, ncols = 3, figsize = self.figsize)
             axs = axss.flatten()
             plt.subplots_adjust(left = 0.05, right = 0.95, hspace = 0.6, top = 0.9, wspace = 0.4, bottom = 0.1)
@@ -144,229 +157,38 @@ class SimulationHandler:
             sns.despine()
             sns.set_context('notebook')
 
-            learner_to_observe = None
-
             for idx, learner in enumerate(self.learners):
                 if learner.bandit_name == self.plot_regressor_progress:
-                    learner_to_observe = learner
-                    idx_learner_to_observe = idx
+                    regressor_progress = (axs, util.get_colors(), idx)
                     break
 
-            colors = util.get_colors()
-
-        for experiment in range(self.experiments):
+        seeds = self.__experiment_seeds()
 
-            if experiment > 0:
-                util.clear_output()
-
-            if True:
-                print(f"\n***** EXPERIMENT {experiment + 1} *****")
-
-            self.super_arms = []
-
-            for index, learner in enumerate(self.learners):
-                learner.reset()
-                self.super_arms.append(learner.pull_super_arm())
-
-            self.learners_rewards_per_day = [[] for _ in range(len(self.learners))]
+        if self.n_jobs > 1:
+            with ProcessPoolExecutor(max_workers = self.n_jobs) as executor:
+                results = list(executor.map(self.run_experiment, range(self.experiments), seeds))
+        else:
+            results = [self.run_experiment(experiment, seed, regressor_progress = regressor_progress)
+                       for experiment, seed in zip(range(self.experiments), seeds)]
 
-            self.clairvoyant_rewards_per_day_t1 = []
+        # merge the experiments, the average profit functions are the ones of the last experiment
+        for result in results:
+            self.clairvoyant_rewards_per_experiment_t1.append(result['clairvoyant_rewards_t1'])
 
             if self.clairvoyant_type == 'both':
-                self.clairvoyant_rewards_per_day_t2 = []
-
-            self.learners_rewards_per_day = [[] for _ in range(len(self.learners))]
-
-            if self.is_unknown_graph:
-                #   **** MONTE CARLO EXECUTION BEFORE EXPERIMENT ITERATION ****
-                users, products, campaigns, allocated_budget, prob_users, real_graphs = self.environment.get_core_entities()
-                self.real_graphs = copy.deepcopy(real_graphs)
-                estimated_fully_conn_graphs, estimated_2_neighs_graphs, true_2_neighs_graphs = self.environment.run_graph_estimate()
-                self.estimated_fully_conn_graphs = estimated_fully_conn_graphs
-                #   ************************************************
-
-            # -- Day Loop --
-            for day in tqdm(range(self.days)):
-
-                if self.is_unknown_graph:
-                    self.environment.set_user_graphs(self.real_graphs)  # set real real_graphs for clavoyrant algorithm
-
-                if self.non_stationary_env:
-                    current_phase = day % len(self.phase_sizes)
-                    self.n_users = self.num_users_phases[current_phase]
-                    self.environment.prob_users = self.prob_users_phases[current_phase]
-
-                if self.print_basic_debug:
-                    print(f"\n***** DAY {day + 1} *****")
-
-                users, products, campaigns, allocated_budget, prob_users, _ = self.environment.get_core_entities()
-
-                sim_obj = self.environment.play_one_day(self.n_users, self.reference_price, self.daily_budget,
-                                                        self.step_k,
-                                                        self.bool_alpha_noise,
-                                                        self.bool_n_noise)  # object with all the day info
-
-                if self.clairvoyant_type == 'both':
-
-                    # AGGREGATED
-                    self.clairvoyant_rewards_per_day_t1.append(sim_obj["reward_k_agg"])
-
-                    for idx, r in enumerate(sim_obj["rewards_agg"]):
-                        if len(self.avg_clairvoyant_profit_functions_t1[idx]) == 0:
-                            self.avg_clairvoyant_profit_functions_t1[idx].append(r)
-                        else:
-                            self.avg_clairvoyant_profit_functions_t1[idx] = (self.avg_clairvoyant_profit_functions_t1[
-                                                                                 idx] * day + r) / (day + 1)
-
-                    # DISAGGREGATED
-                    self.clairvoyant_rewards_per_day_t2.append(sim_obj["reward_k_disagg"])
+                self.clairvoyant_rewards_per_experiment_t2.append(result['clairvoyant_rewards_t2'])
 
-                    for idx, r in enumerate(sim_obj["rewards_disagg"]):
-                        if len(self.avg_clairvoyant_profit_functions_t2[idx]) == 0:
-                            self.avg_clairvoyant_profit_functions_t2[idx].append(r)
-                        else:
-
-                            self.avg_clairvoyant_profit_functions_t2[idx] = (self.avg_clairvoyant_profit_functions_t2[
-                                                                                 idx] * day + r) / (day + 1)
-
-                else:
-                    reward_k = sim_obj["reward_k_agg"] if self.clairvoyant_type == 'aggregated' else sim_obj[
-                        "reward_k_disagg"]
-                    self.clairvoyant_rewards_per_day_t1.append(reward_k)
-
-                    reward = sim_obj["rewards_agg"] if self.clairvoyant_type == 'aggregated' else sim_obj[
-                        "rewards_disagg"]
-
-                    for idx, r in enumerate(reward):
-                        if len(self.avg_clairvoyant_profit_functions_t1[idx]) == 0:
-                            self.avg_clairvoyant_profit_functions_t1[idx].append(r)
-                        else:
-
-                            self.avg_clairvoyant_profit_functions_t1[idx] = (self.avg_clairvoyant_profit_functions_t1[
-                                                                                 idx] * day + r) / (
-                                                                                    day + 1)
-                # -----------------------------------------------------------------
-
-                if self.is_unknown_graph:
-                    """print("Estimated Graph setted")"""
-                    self.environment.set_user_graphs(
-                            self.estimated_fully_conn_graphs)  # set real real_graphs for clavoyrant algorithm
-
-                # --- uniform allocation benchmark ----
-
-                uniform_allocation = [self.daily_budget / 5 for _ in range(5)]
-                sim_obj_2 = self.environment.replicate_last_day(uniform_allocation,
-                                                                self.n_users,
-                                                                self.reference_price,
-                                                                self.bool_n_noise,
-                                                                self.bool_n_noise)
-                self.uniform_allocation_profits.append(np.sum(sim_obj_2["learner_rewards"]))
-
-                # ------
-
-                for learnerIdx, learner in enumerate(self.learners):
-                    # update with data from today for tomorrow
-                    super_arm = self.super_arms[learnerIdx]
-
-                    # BOOST (Random exploration) DONE ONLY TO LEARNERS USING GP REGRESSOR
-                    if self.boost_start and learner.needs_boost and day < 4:
-                        idx = np.random.choice(len(learner.arms) - 1, 5, replace = True)
-                        loop = 0
-                        while np.sum(np.array(learner.arms)[idx]) >= self.daily_budget:
-                            idx = np.random.choice(len(learner.arms) - 1 - loop, 5, replace = True)
-                            loop += 1
-                        # force random exploration
-                        super_arm = np.array(learner.arms)[idx]
-
-                    sim_obj_2 = self.environment.replicate_last_day(super_arm,
-                                                                    self.n_users,
-                                                                    self.reference_price,
-                                                                    self.bool_n_noise,
-                                                                    self.bool_n_noise)
-                    profit_env = sim_obj_2["profit"]
-                    learner_rewards = sim_obj_2["learner_rewards"]
-                    net_profit_learner = np.sum(learner_rewards)
-                    learner.update_observations(super_arm, learner_rewards)
-
-                    # solve comb problem for tomorrow
-                    self.super_arms[learnerIdx] = learner.pull_super_arm()
-
-                    self.learners_rewards_per_day[learnerIdx].append(net_profit_learner)
-
-                    self.buds = sim_obj["k_budgets"]
-
-                    mean, std = learner.get_gp_data()
-
-                    for i, m in enumerate(mean):
-
-                        if len(self.learner_profit_functions_per_experiment[learnerIdx][i]) == 0:
-                            self.learner_profit_functions_per_experiment[learnerIdx][i].append(m)
-                            self.learner_profit_functions_per_experiment_std[learnerIdx][i].append(std[i])
-                        else:
-                            self.learner_profit_functions_per_experiment[learnerIdx][i] = (
-                                                                                                  self.learner_profit_functions_per_experiment[
-                                                                                                      learnerIdx][
-                                                                                                      i] * day + m) / (
-                                                                                                  day + 1)
-
-                            self.learner_profit_functions_per_experiment_std[learnerIdx][i] = (
-                                                                                                      self.learner_profit_functions_per_experiment_std[
-                                                                                                          learnerIdx][
-                                                                                                          i] * day +
-                                                                                                      std[i]) / (
-                                                                                                      day + 1)
-
-                if self.plot_regressor_progress and learner_to_observe:
-                    axs[5].cla()
-                    x = sim_obj["k_budgets"]
-                    x2 = learner_to_observe.arms
-                    for i, rw in enumerate(sim_obj["rewards_agg"]):
-                        axs[i].cla()
-                        axs[i].set_xlabel("budget")
-                        axs[i].set_ylabel("profit")
-                        axs[i].plot(x, rw, colors[-1], label = 'clairvoyant profit', alpha = 0.5)
-                        # axs[i].plot(x2, comb_learner.last_knapsack_reward[i])
-                        mean, std = learner_to_observe.get_gp_data()
-                        # print(std[0])
-                        # print(mean[0][0])
-                        axs[i].plot(x2, mean[i], colors[i], label = 'estimated profit', alpha = 0.5)
-                        axs[i].fill_between(
-                                np.array(x2).ravel(),
-                                mean[i] - 1.96 * std[i],
-                                mean[i] + 1.96 * std[i],
-                                alpha = 0.1,
-                                label = r"95% confidence interval",
-                                color = colors[i]
-                        )
-
-                        axs[i].legend(bbox_to_anchor = (0., 1.02, 1., .102), loc = 3,
-                                      ncol = 2, mode = "expand", borderaxespad = 0.)
-
-                        axs[i].set_title('Profit curve - Campaign ' + str(i + 1), y = 1.0, pad = 43)
-
-                    d = np.linspace(0, len(self.clairvoyant_rewards_per_day_t1),
-                                    len(self.clairvoyant_rewards_per_day_t1))
-                    axs[5].set_xlabel("days")
-                    axs[5].set_ylabel("reward")
-                    axs[5].plot(d, self.clairvoyant_rewards_per_day_t1, colors[-1], label = "clairvoyant reward",
-                                alpha = 0.5)
-                    axs[5].plot(d, self.learners_rewards_per_day[idx_learner_to_observe], colors[-2],
-                                label = "bandit reward", alpha = 0.5)
-                    axs[5].legend(bbox_to_anchor = (0., 1.02, 1., .102), loc = 3,
-                                  ncol = 2, mode = "expand", borderaxespad = 0.)
-
-                    axs[5].set_title('Reward', y = 1.0, pad = 28)
-
-                    # axs[5].plot(d, rewards_disaggregated)
-                    plt.pause(0.02)  # no need for this,
+            for learnerIdx in range(len(self.learners)):
+                self.learners_rewards_per_experiment[learnerIdx].append(result['learners_rewards'][learnerIdx])
 
-            self.clairvoyant_rewards_per_experiment_t1.append(self.clairvoyant_rewards_per_day_t1)
+            self.uniform_allocation_profits.extend(result['uniform_allocation_profits'])
 
-            if self.clairvoyant_type == 'both':
-                self.clairvoyant_rewards_per_experiment_t2.append(self.clairvoyant_rewards_per_day_t2)
-
-            for learnerIdx in range(len(self.learners)):
-                self.learners_rewards_per_experiment[learnerIdx].append(self.learners_rewards_per_day[learnerIdx])
+        if len(results) > 0:
+            self.avg_clairvoyant_profit_functions_t1 = results[-1]['avg_clairvoyant_profit_functions_t1']
+            self.avg_clairvoyant_profit_functions_t2 = results[-1]['avg_clairvoyant_profit_functions_t2']
+            self.learner_profit_functions_per_experiment = results[-1]['learner_profit_functions']
+            self.learner_profit_functions_per_experiment_std = results[-1]['learner_profit_functions_std']
+            self.buds = results[-1]['buds']
 
         # self.__plot_results(sns_style = 'white') # looks nice
 
@@ -420,6 +242,266 @@ class SimulationHandler:
 
         self.__plot_results(sns_style = 'matplotlib')  # uses default matplotlib style
 
+    def __experiment_seeds(self) -> list:
+        """ One seed sequence per experiment spawned from the seed of the simulation. Without a seed serial experiments
+            keep using the global random state, parallel ones need a fresh entropy to not replicate the same run """
+        if self.seed is None and self.n_jobs <= 1:
+            return [None for _ in range(self.experiments)]
+
+        return self.__seed_sequences(self.seed, self.experiments)[1:]
+
+    @staticmethod
+    def __seed_sequences(seed, experiments) -> list:
+        """ Seed sequences of the environment and of the experiments, the same ones at every call """
+        return np.random.SeedSequence(seed).spawn(experiments + 1)
+
+    def run_experiment(self, experiment: int, seed: np.random.SeedSequence = None, regressor_progress = None) -> dict:
+        """ Run a single experiment on copies of the environment and of the learners, without changing the handler.
+            The given seed sequence spawns the random generators of the environment, of every learner and of the boost.
+            regressor_progress is (axes, colors, index of the learner) to plot the progress of a learner day by day.
+            Return the rewards of the experiment """
+        environment = copy.deepcopy(self.environment)
+        learners = copy.deepcopy(self.learners)
+        n_users = self.n_users
+        uniform_allocation_profits = []
+        boost_rng = None
+
+        if seed is not None:
+            global_seed, environment_seed, learners_seed, boost_seed = seed.spawn(4)
+
+            # sklearn regressors still draw from the global random states
+            np_seed, random_seed = global_seed.generate_state(2)
+            np.random.seed(np_seed)
+            random.seed(int(random_seed))
+
+            environment.set_rng(np.random.default_rng(environment_seed))
+            for learner, learner_seed in zip(learners, learners_seed.spawn(len(learners))):
+                learner.set_seed(learner_seed)
+            boost_rng = np.random.default_rng(boost_seed)
+
+        n_profit_functions_t1 = self.campaigns * self.n_users if self.clairvoyant_type == 'disaggregated' else self.campaigns
+        avg_clairvoyant_profit_functions_t1 = [[] for _ in range(n_profit_functions_t1)]
+        avg_clairvoyant_profit_functions_t2 = [[] for _ in range(self.campaigns * self.n_users)]
+        learner_profit_functions_per_experiment = [[[] for _ in range(self.campaigns)] for _ in range(len(learners))]
+        learner_profit_functions_per_experiment_std = [[[] for _ in range(self.campaigns)] for _ in range(len(learners))]
+
+        learner_to_observe = None
+        if regressor_progress is not None:
+            axs, colors, idx_learner_to_observe = regressor_progress
+            learner_to_observe = learners[idx_learner_to_observe]
+
+        if experiment > 0:
+            util.clear_output()
+
+        if True:
+            print(f"\n***** EXPERIMENT {experiment + 1} *****")
+
+        for index, learner in enumerate(learners):
+            learner.reset()
+
+        pulled_super_arms = CombWrapper.pull_super_arms(learners)
+
+        learners_rewards_per_day = [[] for _ in range(len(learners))]
+
+        clairvoyant_rewards_per_day_t1 = []
+        clairvoyant_rewards_per_day_t2 = []  # filled only by 'both' clairvoyants
+        buds = []
+
+        if self.is_unknown_graph:
+            #   **** MONTE CARLO EXECUTION BEFORE EXPERIMENT ITERATION ****
+            users, products, campaigns, allocated_budget, prob_users, real_graphs = environment.get_core_entities()
+            real_graphs = copy.deepcopy(real_graphs)
+            estimated_fully_conn_graphs, estimated_2_neighs_graphs, true_2_neighs_graphs = environment.run_graph_estimate()
+            #   ************************************************
+
+        # -- Day Loop --
+        for day in tqdm(range(self.days), disable = self.n_jobs > 1):
+
+            if self.is_unknown_graph:
+                environment.set_user_graphs(real_graphs)  # set real real_graphs for clavoyrant algorithm
+
+            if self.non_stationary_env:
+                current_phase = day % len(self.phase_sizes)
+                n_users = self.num_users_phases[current_phase]
+                environment.prob_users = self.prob_users_phases[current_phase]
+
+            if self.print_basic_debug:
+                print(f"\n***** DAY {day + 1} *****")
+
+            users, products, campaigns, allocated_budget, prob_users, _ = environment.get_core_entities()
+
+            sim_obj = environment.play_one_day(n_users, self.reference_price, self.daily_budget,
+                                               self.step_k,
+                                               self.bool_alpha_noise,
+                                               self.bool_n_noise)  # object with all the day info
+
+            if self.clairvoyant_type == 'both':
+
+                # AGGREGATED
+                clairvoyant_rewards_per_day_t1.append(sim_obj["reward_k_agg"])
+
+                for idx, r in enumerate(sim_obj["rewards_agg"]):
+                    if len(avg_clairvoyant_profit_functions_t1[idx]) == 0:
+                        avg_clairvoyant_profit_functions_t1[idx].append(r)
+                    else:
+                        avg_clairvoyant_profit_functions_t1[idx] = (avg_clairvoyant_profit_functions_t1[
+                                                                             idx] * day + r) / (day + 1)
+
+                # DISAGGREGATED
+                clairvoyant_rewards_per_day_t2.append(sim_obj["reward_k_disagg"])
+
+                for idx, r in enumerate(sim_obj["rewards_disagg"]):
+                    if len(avg_clairvoyant_profit_functions_t2[idx]) == 0:
+                        avg_clairvoyant_profit_functions_t2[idx].append(r)
+                    else:
+
+                        avg_clairvoyant_profit_functions_t2[idx] = (avg_clairvoyant_profit_functions_t2[
+                                                                             idx] * day + r) / (day + 1)
+
+            else:
+                reward_k = sim_obj["reward_k_agg"] if self.clairvoyant_type == 'aggregated' else sim_obj[
+                    "reward_k_disagg"]
+                clairvoyant_rewards_per_day_t1.append(reward_k)
+
+                reward = sim_obj["rewards_agg"] if self.clairvoyant_type == 'aggregated' else sim_obj[
+                    "rewards_disagg"]
+
+                for idx, r in enumerate(reward):
+                    if len(avg_clairvoyant_profit_functions_t1[idx]) == 0:
+                        avg_clairvoyant_profit_functions_t1[idx].append(r)
+                    else:
+
+                        avg_clairvoyant_profit_functions_t1[idx] = (avg_clairvoyant_profit_functions_t1[
+                                                                             idx] * day + r) / (
+                                                                                day + 1)
+            # -----------------------------------------------------------------
+
+            if self.is_unknown_graph:
+                """print("Estimated Graph setted")"""
+                environment.set_user_graphs(
+                        estimated_fully_conn_graphs)  # set real real_graphs for clavoyrant algorithm
+
+            # --- uniform allocation benchmark and learners super arms, evaluated in a single batch ----
+
+            uniform_allocation = [self.daily_budget / 5 for _ in range(5)]
+            super_arms = []
+
+            for learnerIdx, learner in enumerate(learners):
+                # update with data from today for tomorrow
+                super_arm = pulled_super_arms[learnerIdx]
+
+                # BOOST (Random exploration) DONE ONLY TO LEARNERS USING GP REGRESSOR
+                if self.boost_start and learner.needs_boost and day < 4:
+                    idx = util.get_rng(boost_rng).choice(len(learner.arms) - 1, 5, replace = True)
+                    loop = 0
+                    while np.sum(np.array(learner.arms)[idx]) >= self.daily_budget:
+                        idx = util.get_rng(boost_rng).choice(len(learner.arms) - 1 - loop, 5, replace = True)
+                        loop += 1
+                    # force random exploration
+                    super_arm = np.array(learner.arms)[idx]
+
+                super_arms.append(super_arm)
+
+            sim_obj_2 = environment.replicate_last_day_batch([uniform_allocation] + super_arms,
+                                                             n_users,
+                                                             self.reference_price,
+                                                             self.bool_n_noise,
+                                                             self.bool_n_noise)
+            uniform_allocation_profits.append(np.sum(sim_obj_2["learner_rewards"][0]))
+
+            # ------
+
+            for learnerIdx, learner in enumerate(learners):
+                super_arm = super_arms[learnerIdx]
+                profit_env = sim_obj_2["profit"][learnerIdx + 1]
+                learner_rewards = sim_obj_2["learner_rewards"][learnerIdx + 1]
+                net_profit_learner = np.sum(learner_rewards)
+                learner.update_observations(super_arm, learner_rewards)
+
+                learners_rewards_per_day[learnerIdx].append(net_profit_learner)
+
+                buds = sim_obj["k_budgets"]
+
+                mean, std = learner.get_gp_data()
+
+                for i, m in enumerate(mean):
+
+                    if len(learner_profit_functions_per_experiment[learnerIdx][i]) == 0:
+                        learner_profit_functions_per_experiment[learnerIdx][i].append(m)
+                        learner_profit_functions_per_experiment_std[learnerIdx][i].append(std[i])
+                    else:
+                        learner_profit_functions_per_experiment[learnerIdx][i] = (
+                                                                                              learner_profit_functions_per_experiment[
+                                                                                                  learnerIdx][
+                                                                                                  i] * day + m) / (
+                                                                                              day + 1)
+
+                        learner_profit_functions_per_experiment_std[learnerIdx][i] = (
+                                                                                                  learner_profit_functions_per_experiment_std[
+                                                                                                      learnerIdx][
+                                                                                                      i] * day +
+                                                                                                  std[i]) / (
+                                                                                                  day + 1)
+
+            # solve comb problems for tomorrow, all learners at once
+            pulled_super_arms = CombWrapper.pull_super_arms(learners)
+
+            if self.plot_regressor_progress and learner_to_observe:
+                axs[5].cla()
+                x = sim_obj["k_budgets"]
+                x2 = learner_to_observe.arms
+                for i, rw in enumerate(sim_obj["rewards_agg"]):
+                    axs[i].cla()
+                    axs[i].set_xlabel("budget")
+                    axs[i].set_ylabel("profit")
+                    axs[i].plot(x, rw, colors[-1], label = 'clairvoyant profit', alpha = 0.5)
+                    # axs[i].plot(x2, comb_learner.last_knapsack_reward[i])
+                    mean, std = learner_to_observe.get_gp_data()
+                    # print(std[0])
+                    # print(mean[0][0])
+                    axs[i].plot(x2, mean[i], colors[i], label = 'estimated profit', alpha = 0.5)
+                    axs[i].fill_between(
+                            np.array(x2).ravel(),
+                            mean[i] - 1.96 * std[i],
+                            mean[i] + 1.96 * std[i],
+                            alpha = 0.1,
+                            label = r"95% confidence interval",
+                            color = colors[i]
+                    )
+
+                    axs[i].legend(bbox_to_anchor = (0., 1.02, 1., .102), loc = 3,
+                                  ncol = 2, mode = "expand", borderaxespad = 0.)
+
+                    axs[i].set_title('Profit curve - Campaign ' + str(i + 1), y = 1.0, pad = 43)
+
+                d = np.linspace(0, len(clairvoyant_rewards_per_day_t1),
+                                len(clairvoyant_rewards_per_day_t1))
+                axs[5].set_xlabel("days")
+                axs[5].set_ylabel("reward")
+                axs[5].plot(d, clairvoyant_rewards_per_day_t1, colors[-1], label = "clairvoyant reward",
+                            alpha = 0.5)
+                axs[5].plot(d, learners_rewards_per_day[idx_learner_to_observe], colors[-2],
+                            label = "bandit reward", alpha = 0.5)
+                axs[5].legend(bbox_to_anchor = (0., 1.02, 1., .102), loc = 3,
+                              ncol = 2, mode = "expand", borderaxespad = 0.)
+
+                axs[5].set_title('Reward', y = 1.0, pad = 28)
+
+                # axs[5].plot(d, rewards_disaggregated)
+                plt.pause(0.02)  # no need for this,
+
+        return {
+            'clairvoyant_rewards_t1': clairvoyant_rewards_per_day_t1,
+            'clairvoyant_rewards_t2': clairvoyant_rewards_per_day_t2,
+            'learners_rewards': learners_rewards_per_day,
+            'uniform_allocation_profits': uniform_allocation_profits,
+            'avg_clairvoyant_profit_functions_t1': avg_clairvoyant_profit_functions_t1,
+            'avg_clairvoyant_profit_functions_t2': avg_clairvoyant_profit_functions_t2,
+            'learner_profit_functions': learner_profit_functions_per_experiment,
+            'learner_profit_functions_std': learner_profit_functions_per_experiment_std,
+            'buds': buds
+        }
+
     # TODO A PLOT HANDLER SHOULD DO ALL THE WORK HERE !
     # TODO -> PLOT CONFIDENCE INTERVALS !
 
@@ -0,0 +1,80 @@
+import random
+
+import numpy as np
+
+from learners.CombWrapper import CombWrapper
+from learners.GTS_Learner import GTS_Learner
+from learners.SwGTSLearner import SwGTSLearner
+from simulations.Environment import Environment
+from simulations.SimulationHandler import SimulationHandler
+
+
+def get_handler(**kwargs) -> SimulationHandler:
+    learners = [CombWrapper(GTS_Learner, 5, 16, 300, is_gaussian = True),
+                CombWrapper(SwGTSLearner, 5, 16, 300, is_gaussian = True, kwargs = {'window_size': 3})]
+
+    return SimulationHandler(environmentConstructor = Environment,
+                             learners = learners,
+                             experiments = 2,
+                             days = 3,
+                             campaigns = 5,
+                             reference_price = 4.0,
+                             daily_budget = 300,
+                             n_users = 100,
+                             n_arms = 16,
+                             bool_alpha_noise = True,
+                             bool_n_noise = True,
+                             print_basic_debug = False,
+                             print_knapsack_info = False,
+                             step_k = 5,
+                             save_results_to_file = False,
+                             **kwargs)
+
+
+class TestSimulationHandler:
+
+    def testRunExperimentAlone(self) -> None:
+        handler = get_handler()
+        attributes = dict(vars(handler))
+
+        result = handler.run_experiment(0, np.random.SeedSequence(5))
+
+        assert np.array(result['learners_rewards']).shape == (2, 3)
+        assert len(result['clairvoyant_rewards_t1']) == 3
+        assert len(result['avg_clairvoyant_profit_functions_t1']) == 5
+        # the experiment works on copies, the handler is left as it was
+        assert all(vars(handler)[key] is value for key, value in attributes.items())
+
+    def testSameSeedSameResults(self, monkeypatch) -> None:
+        monkeypatch.setattr(SimulationHandler, '_SimulationHandler__plot_results', lambda *args, **kwargs: None)
+        results = []
+
+        for global_seed in [1, 2]:
+            # the seed of the simulation must be the only source of randomness
+            np.random.seed(global_seed)
+            random.seed(global_seed)
+            handler = get_handler(seed = 123)
+            handler.run_simulation()
+            results.append(handler)
+
+        first, second = results
+        assert np.array_equal(first.learners_rewards_per_experiment, second.learners_rewards_per_experiment)
+        assert np.array_equal(first.clairvoyant_rewards_per_experiment_t1, second.clairvoyant_rewards_per_experiment_t1)
+        assert np.array_equal(first.uniform_allocation_profits, second.uniform_allocation_profits)
+
+    def testProcessPoolSameResults(self, monkeypatch) -> None:
+        monkeypatch.setattr(SimulationHandler, '_SimulationHandler__plot_results', lambda *args, **kwargs: None)
+        results = []
+
+        # experiments run in a pool of processes give the results of the sequential run
+        for n_jobs in [1, 2]:
+            handler = get_handler(seed = 123, n_jobs = n_jobs)
+            handler.run_simulation()
+            results.append(handler)
+
+        sequential, pool = results
+        assert np.array_equal(sequential.learners_rewards_per_experiment, pool.learners_rewards_per_experiment)
+        assert np.array_equal(sequential.clairvoyant_rewards_per_experiment_t1,
+                              pool.clairvoyant_rewards_per_experiment_t1)
+        assert np.array_equal(sequential.avg_clairvoyant_profit_functions_t1, pool.avg_clairvoyant_profit_functions_t1)
+        assert np.array_equal(sequential.uniform_allocation_profits, pool.uniform_allocation_profits)
@@ -38,6 +38,21 @@ if __name__ == '__main__':
 
     kwargs_sw = {'window_size': window_size}
 
+    """ GP kernel hyperparameters: None optimises them from scratch every day, as the results of the report.
+        fast_hp_refits optimises them every 10 days or when the fit of the data drifts, starting from the previous
+        ones (see IncrementalGP): much faster, with slightly different results """
+    fast_hp_refits = False
+    hp_policy = None
+
+    if fast_hp_refits:
+        hp_policy = {'refit_every':          10,
+                     'n_restarts_optimizer': 9,
+                     'lml_drift':            0.5,
+                     'warm_start':           True}
+
+    kwargs_gp_sw = {**kwargs_sw, 'hp_policy': hp_policy}
+    kwargs_gp_cusum = {**kwargs_cusum, 'hp_policy': hp_policy}
+
     """ @@@@ ---------------- @@@@ """
 
     sw_gpucb1_learner = CombWrapper(SwGPUCB1_Learner,
@@ -45,14 +60,14 @@ if __name__ == '__main__':
                                     n_arms,
                                     daily_budget,
                                     is_ucb = True,
-                                    kwargs = kwargs_sw,
+                                    kwargs = kwargs_gp_sw,
                                     is_gaussian = True)
     cusum_gpucb1_learner = CombWrapper(CusumGPUCB1Learner,
                                        5,
                                        n_arms,
                                        daily_budget,
                                        is_ucb = True,
-                                       kwargs = kwargs_cusum,
+                                       kwargs = kwargs_gp_cusum,
                                        is_gaussian = True)
 
     sw_gts_learner = CombWrapper(SwGTSLearner,
@@ -68,6 +68,10 @@ ctx_reward = []
 
 ctx_algorithm = GPTS_Learner
 #ctx_algorithm = GTS_Learner
+# grid_gp keeps the GP learners on per-arm statistics, so the cost of a day does not grow over the 230 days
+# (see GridGP). Same posterior of the default GP, with slightly different results through the hyperparameter fits
+grid_gp = False
+ctx_kwargs = {'grid_gp': True} if grid_gp and ctx_algorithm is GPTS_Learner else None
 
 img, axss = plt.subplots(nrows=4, ncols=5, figsize=(13, 6))  # alpha plots
 axs = axss.flatten()
@@ -146,7 +150,8 @@ def instantiate_new_learner(comb_learner, _contexts, _new_contexts, _ctx_algorit
                             _daily_budget):
     learner = CombWrapper(_ctx_algorithm, _n_campaigns_ctx, _n_arms, _daily_budget, arm_distance,
                           is_ucb=False,
-                          is_gaussian=True)
+                          is_gaussian=True,
+                          kwargs=ctx_kwargs)
 
     return learner
 
@@ -227,7 +232,8 @@ n_campaigns_ctx = 5 * size_ctx
 
 base_learner = CombWrapper(ctx_algorithm, n_campaigns_ctx, n_arms, daily_budget, arm_distance,
                            is_ucb=False,
-                           is_gaussian=True)
+                           is_gaussian=True,
+                           kwargs=ctx_kwargs)
 super_arm = base_learner.pull_super_arm()
 last_superarm = super_arm
 